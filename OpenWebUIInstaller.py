@@ -1,13 +1,36 @@
 # main_script.py
 
+import sys
+import time
+
+_STARTED_AT = time.perf_counter()
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Command line arguments select the headless CLI, which never loads tkinter
+    from helpers.cli import main
+    sys.exit(main(started_at=_STARTED_AT))
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import threading
-from datetime import datetime
-from helpers.docker_manager import DockerManager, SECONDARY_CONTAINER_COMMAND
+from helpers.docker_manager import DockerManager
+from helpers.flavors import PIPELINES_SPEC
+from helpers.docker_api import DockerAPIClient
+from helpers.docker_events import DockerEventWatcher
 from helpers.option_panel import OptionPanel
+from helpers.monitor_panel import MonitorWindow
 from helpers.logger import Logger
+from helpers.pull_progress import format_pull_progress
+from helpers.file_log import LOG_DIR, LOG_FORMAT_ENV, new_log_file_path, prune_logs
+from helpers.tracing import TRACE_DIR_ENV, Tracer
+from helpers.image_cache import IMAGE_CACHE_ENV, ImageCache
+from helpers.downloader import DOWNLOAD_CACHE_DIR, DOWNLOAD_CACHE_ENV
+from helpers.step_journal import DEFAULT_JOURNAL_PATH, JOURNAL_ENV, StepJournal
+from helpers.volume_snapshot import SNAPSHOT_DIR, SNAPSHOT_DIR_ENV
+from helpers.last_known_state import (
+    DEFAULT_LAST_KNOWN_STATE_PATH, LAST_KNOWN_STATE_ENV, LastKnownState, check_installer_status
+)
 
 class OpenWebUIInstaller(tk.Tk):
     def __init__(self):
@@ -16,27 +39,73 @@ class OpenWebUIInstaller(tk.Tk):
         self.geometry("700x450")
         # self.bind("<FocusIn>", lambda event: self.after(100, self.update_button_states))
 
-        # Create the logs directory if it doesn't exist
-        log_dir = "./logs"
-        os.makedirs(log_dir, exist_ok=True)
+        # Remove old log files, then create a timestamped log file name within the logs directory
+        prune_logs(LOG_DIR)
+        self.json_logs = os.environ.get(LOG_FORMAT_ENV) == "json"
+        self.log_file_name = new_log_file_path(LOG_DIR, json_lines=self.json_logs)
 
-        # Create a timestamped log file name within the logs directory
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_file_name = os.path.join(log_dir, f"installer_{timestamp}.log")
+        # Steps and commands are traced only when a trace directory is configured
+        self.trace_dir = os.environ.get(TRACE_DIR_ENV)
+        self.tracer = Tracer(enabled=bool(self.trace_dir))
 
         # Initialize DockerManager with a placeholder logger (will be set in create_widgets)
         self.logger = None
-        self.docker_manager = DockerManager(log_callback=self.log_callback_placeholder)
-        
+        # Status checks go through the Engine API socket when it is reachable, the docker CLI otherwise
+        # Images come from a local or shared image cache when one is configured
+        # Completed install steps are journaled, so reinstalling only verifies them
+        # Volumes are snapshotted before an update, so a rolled back update also rolls back their data
+        image_cache_dir = os.environ.get(IMAGE_CACHE_ENV)
+        self.docker_manager = DockerManager(
+            log_callback=self.log_callback_placeholder, api_client=DockerAPIClient.from_env(), tracer=self.tracer,
+            image_cache=ImageCache(image_cache_dir) if image_cache_dir else None,
+            download_cache_dir=os.environ.get(DOWNLOAD_CACHE_ENV, DOWNLOAD_CACHE_DIR),
+            journal=StepJournal(os.environ.get(JOURNAL_ENV, DEFAULT_JOURNAL_PATH)),
+            snapshot_dir=os.environ.get(SNAPSHOT_DIR_ENV, SNAPSHOT_DIR)
+        )
+
+        # Status checks run in a background thread; a request arriving during one runs another after it
+        self.last_known_state = LastKnownState(os.environ.get(LAST_KNOWN_STATE_ENV, DEFAULT_LAST_KNOWN_STATE_PATH))
+        self.status_lock = threading.Lock()
+        self.status_thread = None
+        self.status_check_requested = False
+        # Checks are numbered as they start; a result is only shown if no later one has been shown
+        self.status_sequence = 0
+        self.status_applied = 0
+        # The status shown is from a check made by this process, not the saved one
+        self.status_confirmed = False
+
         self.create_widgets()
         
         # Log the starting message and perform initial checks
         self.perform_initial_checks()
 
-    def log_callback_placeholder(self, message, output_mode="both"):
+        # Refresh the buttons as soon as a managed container starts, stops or is removed
+        self.event_watcher = DockerEventWatcher(self.docker_manager)
+        self.event_watcher.subscribe(self.on_container_state_change)
+        self.event_watcher.start()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def log_callback_placeholder(self, message, output_mode="both", **fields):
         """Placeholder log callback before the actual logger is set up."""
         pass
 
+    def on_container_state_change(self, container_name, state):
+        """Called from the event watcher thread when a managed container changes state."""
+        self.logger.log(f"Container '{container_name}' is now {state or 'removed'}.", output_mode="file")
+        # Widgets must only be touched from the Tk main loop
+        self.after(0, self.update_button_states)
+
+    def on_close(self):
+        """Stop background work before closing the window."""
+        self.event_watcher.stop()
+        if self.monitor_window is not None and self.monitor_window.winfo_exists():
+            self.monitor_window.close()
+        if self.trace_dir:
+            trace_path, metrics_path = self.tracer.export(self.trace_dir)
+            self.logger.log(f"Trace written to {trace_path}, metrics to {metrics_path}", output_mode="file")
+        self.logger.close()
+        self.destroy()
+
     def create_widgets(self):
 
 
@@ -55,6 +124,8 @@ class OpenWebUIInstaller(tk.Tk):
         info_frame = ttk.LabelFrame(self, text="Information")
         info_frame.pack(fill="both", **padding)
         ttk.Label(info_frame, text="Select a flavor and follow the steps to install Docker and set up containers.").pack(padx=10, pady=5)
+        self.status_label = ttk.Label(info_frame, text="Checking Docker...")
+        self.status_label.pack(padx=10, pady=(0, 5))
 
         # Main Frame for Docker actions (no padding here)
         main_frame = ttk.Frame(self)
@@ -68,12 +139,16 @@ class OpenWebUIInstaller(tk.Tk):
         self.install_button.grid(row=0, column=0, padx=5)
         self.setup_button = ttk.Button(button_frame, text="Set Up Containers", command=self.setup_containers)
         self.setup_button.grid(row=0, column=1, padx=5)
-        # self.update_button = ttk.Button(button_frame, text="Update Containers", command=self.update_containers)
-        # self.update_button.grid(row=0, column=2, padx=5)
+        self.update_button = ttk.Button(button_frame, text="Update Containers", command=self.update_containers)
+        self.update_button.grid(row=0, column=2, padx=5)
+        self.monitor_button = ttk.Button(button_frame, text="Monitor", command=self.open_monitor)
+        self.monitor_button.grid(row=0, column=3, padx=5)
+        # Resource monitor window, open while it is shown
+        self.monitor_window = None
 
         # Progress Frame, positioned below the Options Panel
         progress_frame = ttk.LabelFrame(main_frame, text="Progress")
-        self.logger = Logger(progress_frame, log_file_path=self.log_file_name)
+        self.logger = Logger(progress_frame, log_file_path=self.log_file_name, json_lines=self.json_logs)
 
         # Option Panel, visually placed above the "Progress" area
         self.option_panel = OptionPanel(main_frame, log_callback=self.logger.log)
@@ -87,13 +162,79 @@ class OpenWebUIInstaller(tk.Tk):
         # Update DockerManager to use the actual logger
         self.docker_manager.log_callback = self.logger.log
 
-        # Initial button states
-        self.update_button_states()
+        # Initial button states, from the last run until the checks finish
+        last_known_status = self.last_known_state.load()
+        if last_known_status:
+            self.apply_status(last_known_status, confirmed=False)
+        else:
+            self.install_button.config(state=tk.DISABLED)
+            self.setup_button.config(state=tk.DISABLED)
+            self.update_button.config(state=tk.DISABLED)
 
     def update_button_states(self):
-        """Recheck installation and setup status, and update button states."""
-        docker_installed = self.docker_manager.is_docker_installed()
-        containers_set_up = docker_installed and self.docker_manager.are_containers_set_up()
+        """
+        Recheck installation and setup status in the background, then update button states.
+
+        Returns at once and may be called from any thread; the buttons change once Docker has answered.
+        """
+        with self.status_lock:
+            if self.status_thread is not None:
+                self.status_check_requested = True
+                return
+            self.status_thread = threading.Thread(target=self._check_status_thread, name="status-check", daemon=True)
+            self.status_thread.start()
+
+    def _check_status_thread(self):
+        """Check the status until no further check was requested meanwhile, showing each result."""
+        try:
+            while True:
+                with self.status_lock:
+                    self.status_check_requested = False
+                    self.status_sequence += 1
+                    sequence = self.status_sequence
+                status = check_installer_status(self.docker_manager)
+                # Saved before the thread is released, so a later check cannot be overwritten by this one
+                self.last_known_state.save(status)
+                # Widgets must only be touched from the Tk main loop
+                try:
+                    self.after(0, self._apply_checked_status, sequence, status)
+                except (RuntimeError, tk.TclError):
+                    # The window was closed while Docker was being checked
+                    return
+                with self.status_lock:
+                    if not self.status_check_requested:
+                        self.status_thread = None
+                        return
+        finally:
+            # A failed check must not keep later ones from starting
+            with self.status_lock:
+                if self.status_thread is threading.current_thread():
+                    self.status_thread = None
+
+    def _apply_checked_status(self, sequence, status):
+        """Show the result of a status check unless a later check has been shown already."""
+        if sequence <= self.status_applied:
+            return
+        self.status_applied = sequence
+        self.apply_status(status)
+
+    def apply_status(self, status, confirmed=True):
+        """
+        Set the buttons and status line from an InstallerStatus.
+
+        Args:
+            status (InstallerStatus): The status to show.
+            confirmed (bool): Whether it comes from a check made now rather than the saved state.
+        """
+        docker_installed = status.docker_installed
+        containers_set_up = status.containers_set_up
+        self.status_confirmed = confirmed
+        docker_text = "Docker installed" if docker_installed else "Docker not installed"
+        containers_text = "containers set up" if containers_set_up else "containers not set up"
+        if confirmed:
+            self.status_label.config(text=f"{docker_text}, {containers_text}.")
+        else:
+            self.status_label.config(text=f"{docker_text}, {containers_text} as of {status.checked_at}. Checking Docker...")
 
         # Enable the install button if Docker is NOT installed, disable it if Docker is installed
         self.install_button.config(state=tk.NORMAL if not docker_installed else tk.DISABLED)
@@ -102,14 +243,17 @@ class OpenWebUIInstaller(tk.Tk):
         self.setup_button.config(state=tk.NORMAL if docker_installed and not containers_set_up else tk.DISABLED)
 
         # Enable the update button if containers are set up, otherwise disable it
-        # self.update_button.config(state=tk.NORMAL if docker_installed and containers_set_up else tk.DISABLED)
+        self.update_button.config(state=tk.NORMAL if docker_installed and containers_set_up else tk.DISABLED)
 
-        # Additional check for the "watchtower" container to disable the update button
-        if self.docker_manager.is_container_present("watchtower"):
-            self.update_button.config(state=tk.DISABLED)       
+    def open_monitor(self):
+        """Show the resource monitor window, or bring it to the front if it is open."""
+        if self.monitor_window is not None and self.monitor_window.winfo_exists():
+            self.monitor_window.lift()
+            return
+        self.monitor_window = MonitorWindow(self, self.docker_manager, self.logger.log)
 
     def perform_initial_checks(self):
-        """Run initial Docker check and update button states accordingly."""
+        """Start the initial Docker check; the window shows the last known state until it finishes."""
         # Log "Running initial Docker check" first
 
         
@@ -124,7 +268,8 @@ class OpenWebUIInstaller(tk.Tk):
     def _install_docker_thread(self):
         """Threaded Docker installation to avoid UI freezing."""
         self.logger.log("Starting Docker installation...", output_mode="both")
-        self.docker_manager.install_docker()
+        # Show the installer output in the progress pane as it is produced
+        self.docker_manager.install_docker(progress_callback=lambda line: self.logger.log(line, output_mode="text"))
         
         # Force a re-check of Docker status after installation
         self.docker_manager.reset_docker_status()
@@ -137,54 +282,56 @@ class OpenWebUIInstaller(tk.Tk):
         # Disable the setup button to prevent additional clicks
         self.setup_button.config(state=tk.DISABLED)
 
-        if self.docker_manager.is_docker_installed():
-            flavor_command = self.option_panel.get_selected_flavor_command()
-            if flavor_command:
-                # Start the main container setup in a separate thread
-                threading.Thread(target=self._setup_containers_thread, args=(flavor_command,)).start()
-            else:
-                # Show warning and re-enable the button if no flavor is selected
-                messagebox.showwarning("Selection Needed", "Please select a flavor to set up containers.")
-                self.setup_button.config(state=tk.NORMAL)  # Re-enable button if setup was not initiated
+        flavor_spec = self.option_panel.get_selected_flavor_spec()
+        if flavor_spec:
+            # Checking Docker spawns a command, so it happens in the setup thread as well
+            threading.Thread(target=self._setup_containers_thread, args=(flavor_spec,)).start()
         else:
-            # Show warning and re-enable the button if Docker is not installed
-            messagebox.showwarning("Docker Not Installed", "Please install Docker first.")
+            # Show warning and re-enable the button if no flavor is selected
+            messagebox.showwarning("Selection Needed", "Please select a flavor to set up containers.")
             self.setup_button.config(state=tk.NORMAL)  # Re-enable button if setup was not initiated
 
-
-    def _setup_containers_thread(self, flavor_command):
+    def _setup_containers_thread(self, flavor_spec):
         """Threaded container setup for both main and secondary containers to avoid UI freezing."""
         """Threaded container setup for watchtower added."""
-        self.logger.log("Setting up containers...", output_mode="both")
-        self.logger.log("Container [Open WebUI]", output_mode="both")
-        # Run the main container first
-        self.docker_manager.run_container(flavor_command)
-        self.logger.log("Container [Pipeline]", output_mode="both")
-        # Run the secondary container after main container setup
-        self.docker_manager.run_container(SECONDARY_CONTAINER_COMMAND)
-        # Run the watchtower container after pipeline container setup
-        self.logger.log("Container [Watchtower]", output_mode="both")
-        self.docker_manager.update_containers()
+        if not self.docker_manager.is_docker_installed():
+            self.after(0, self._docker_not_installed, self.setup_button)
+            return
+        # Updates replace the containers with a cutover, so watchtower must not restart them in place
+        self.docker_manager.setup_containers(flavor_spec, progress_callback=self.log_pull_progress, watchtower=False)
 
         # Update button states after setting up containers
         self.update_button_states()
 
+    def _docker_not_installed(self, button):
+        """Warn that Docker is missing and re-enable the button whose action was not started."""
+        messagebox.showwarning("Docker Not Installed", "Please install Docker first.")
+        button.config(state=tk.NORMAL)
+
+    def log_pull_progress(self, progress):
+        """Show a progress line in the UI each time a layer of an image finishes downloading."""
+        if progress.status != "Pull complete":
+            return
+        self.logger.log(format_pull_progress(progress), output_mode="text")
+
     def update_containers(self):
         """Initiate update process for containers in a separate thread to avoid UI freezing."""
+        # Disable the update button temporarily to prevent repeated clicks
         self.update_button.config(state=tk.DISABLED)
-        if self.docker_manager.is_docker_installed():
-            # Disable the update button temporarily to prevent repeated clicks
-            
-            threading.Thread(target=self._update_containers_thread).start()
+
+        flavor_spec = self.option_panel.get_selected_flavor_spec()
+        if flavor_spec:
+            threading.Thread(target=self._update_containers_thread, args=(flavor_spec,)).start()
         else:
+            messagebox.showwarning("Selection Needed", "Please select the flavor of the containers to update.")
             self.update_button.config(state=tk.NORMAL)
-            messagebox.showwarning("Docker Not Installed", "Please install Docker first.")
 
-    def _update_containers_thread(self):
-        """Threaded container update process to avoid UI freezing."""
-        self.logger.log("Setting up containers...", output_mode="both")
-        self.logger.log("Container [Watchtower]", output_mode="both")
-        self.docker_manager.update_containers()
+    def _update_containers_thread(self, flavor_spec):
+        """Threaded blue/green update of the flavor and pipelines containers to avoid UI freezing."""
+        if not self.docker_manager.is_docker_installed():
+            self.after(0, self._docker_not_installed, self.update_button)
+            return
+        self.docker_manager.blue_green_update([flavor_spec, PIPELINES_SPEC], progress_callback=self.log_pull_progress)
         self.update_button_states()
 
 if __name__ == "__main__":
@@ -0,0 +1,470 @@
+# benchmarks/fake_docker.py
+"""
+Deterministic stand-in for the docker CLI.
+
+Run through the 'docker' shim written by install_fake_docker(). Containers are kept as JSON
+files in a state directory and every invocation is appended to a call log there, so
+benchmarks can count subprocess spawns. Behaviour is controlled by environment variables:
+
+    FAKE_DOCKER_STATE         State directory (required).
+    FAKE_DOCKER_LATENCY       Seconds every command takes before answering (default 0).
+    FAKE_DOCKER_OUTPUT_LINES  Progress lines printed per layer by 'pull' (default 10).
+    FAKE_DOCKER_LAYERS        Layers per pulled image (default 5).
+    FAKE_DOCKER_IMAGE_BYTES   Size of the archives written by 'save' (default 1 MB).
+    FAKE_DOCKER_EPHEMERAL_PORT  Host port given to ports published without one (default: the next free one from 49153).
+    FAKE_DOCKER_STATS_INTERVAL  Seconds between two refreshes of 'stats' (default 1).
+    FAKE_DOCKER_FAIL_START    Comma separated container names that 'start' fails for, to exercise rollbacks.
+
+'docker run --rm' runs the command after the image on this machine, with the paths of mounted
+named volumes pointing at directories under the state directory's volumes/ and /tmp/ at a
+private temporary directory, so helper containers using sh, tar, find and stat work as they would.
+
+Images listed in the state directory's registry.json (image reference to digest, kept by
+fake_registry.FakeRegistry) are pulled at that digest, which changes their image ID.
+"""
+
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import re
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+STATE_ENV = "FAKE_DOCKER_STATE"
+LATENCY_ENV = "FAKE_DOCKER_LATENCY"
+OUTPUT_LINES_ENV = "FAKE_DOCKER_OUTPUT_LINES"
+LAYERS_ENV = "FAKE_DOCKER_LAYERS"
+IMAGE_BYTES_ENV = "FAKE_DOCKER_IMAGE_BYTES"
+EPHEMERAL_PORT_ENV = "FAKE_DOCKER_EPHEMERAL_PORT"
+STATS_INTERVAL_ENV = "FAKE_DOCKER_STATS_INTERVAL"
+FAIL_START_ENV = "FAKE_DOCKER_FAIL_START"
+
+# First host port handed out for ports published without one
+FIRST_EPHEMERAL_PORT = 49153
+
+# File in the state directory with one line per docker invocation
+CALL_LOG = "calls.log"
+
+
+# File in the state directory mapping the images that have been pulled or loaded to their registry digest
+IMAGES_FILE = "images.json"
+
+# File in the state directory mapping image references to the digest the registry serves
+REGISTRY_FILE = "registry.json"
+
+# First line of the archives written by 'save', followed by the image reference
+ARCHIVE_HEADER = b"FAKE-DOCKER-ARCHIVE "
+
+
+def image_id(image, digest=None):
+    """Return the ID the fake daemon reports for an image, pulled at a registry digest if given."""
+    return "sha256:" + hashlib.sha256((image + (digest or "")).encode()).hexdigest()
+
+
+def install_fake_docker(directory, latency=0, output_lines=10, layers=5):
+    """
+    Write a 'docker' shim into directory and return the environment that puts it first on PATH.
+
+    Args:
+        directory (str): Directory for the shim and the fake daemon's state.
+        latency (float): Seconds every docker command takes.
+        output_lines (int): Progress lines printed per layer by 'docker pull'.
+        layers (int): Number of layers of every image.
+
+    Returns:
+        dict: A copy of os.environ for running the installer against the fake.
+    """
+    bin_dir = os.path.join(directory, "bin")
+    state_dir = os.path.join(directory, "state")
+    os.makedirs(bin_dir, exist_ok=True)
+    os.makedirs(state_dir, exist_ok=True)
+
+    shim = os.path.join(bin_dir, "docker")
+    with open(shim, "w", encoding="utf-8") as shim_file:
+        shim_file.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" "$@"\n')
+    os.chmod(shim, os.stat(shim).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    env = dict(os.environ)
+    env["PATH"] = bin_dir + os.pathsep + env.get("PATH", "")
+    env[STATE_ENV] = state_dir
+    env[LATENCY_ENV] = str(latency)
+    env[OUTPUT_LINES_ENV] = str(output_lines)
+    env[LAYERS_ENV] = str(layers)
+    # An ssh:// host has no Engine API client, so every query goes through the fake CLI
+    env["DOCKER_HOST"] = "ssh://fake-docker"
+    env.pop("DOCKER_CONTEXT", None)
+    return env
+
+
+def count_calls(state_dir):
+    """Return the number of docker invocations recorded so far."""
+    try:
+        with open(os.path.join(state_dir, CALL_LOG), encoding="utf-8") as call_log:
+            return sum(1 for _ in call_log)
+    except FileNotFoundError:
+        return 0
+
+
+def _container_path(state_dir, name):
+    return os.path.join(state_dir, f"container-{name}.json")
+
+
+def _load_container(state_dir, name):
+    try:
+        with open(_container_path(state_dir, name), encoding="utf-8") as container_file:
+            return json.load(container_file)
+    except FileNotFoundError:
+        return None
+
+
+def _save_container(state_dir, container):
+    # Replace the file in one step, parallel commands read it while it is written
+    path = _container_path(state_dir, container["Name"])
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as container_file:
+        json.dump(container, container_file)
+    os.replace(temporary_path, path)
+
+
+def _load_json(state_dir, file_name):
+    try:
+        with open(os.path.join(state_dir, file_name), encoding="utf-8") as json_file:
+            return json.load(json_file)
+    except FileNotFoundError:
+        return {}
+
+
+def _load_images(state_dir):
+    return _load_json(state_dir, IMAGES_FILE)
+
+
+def _add_image(state_dir, image, digest=None):
+    # Parallel pulls add images at the same time; the lock keeps one from dropping the other's
+    path = os.path.join(state_dir, IMAGES_FILE)
+    with open(path + ".lock", "w", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        images = _load_images(state_dir)
+        if image not in images or digest:
+            images[image] = digest or images.get(image)
+            temporary_path = f"{path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as images_file:
+                json.dump(images, images_file)
+            os.replace(temporary_path, path)
+
+
+def _repo_digests(image, digest):
+    return [f"{image.rsplit(':', 1)[0] if ':' in image.split('/')[-1] else image}@{digest}"] if digest else []
+
+
+def _save(state_dir, image):
+    if image not in _load_images(state_dir):
+        print(f"Error response from daemon: reference does not exist: {image}", file=sys.stderr)
+        return 1
+    size = int(os.environ.get(IMAGE_BYTES_ENV, str(1000 ** 2)))
+    output = sys.stdout.buffer
+    output.write(ARCHIVE_HEADER + image.encode() + b"\n")
+    block = hashlib.sha256(image.encode()).digest() * 2048
+    for offset in range(0, size, len(block)):
+        output.write(block[:size - offset])
+    return 0
+
+
+def _load(state_dir):
+    data = sys.stdin.buffer.read()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    if not data.startswith(ARCHIVE_HEADER):
+        print("Error: unrecognized image archive", file=sys.stderr)
+        return 1
+    image = data[len(ARCHIVE_HEADER):data.index(b"\n")].decode()
+    _add_image(state_dir, image)
+    print(f"Loaded image: {image}")
+    return 0
+
+
+def _pull(image):
+    lines_per_layer = int(os.environ.get(OUTPUT_LINES_ENV, "10"))
+    layers = int(os.environ.get(LAYERS_ENV, "5"))
+    tag = image.rsplit(":", 1)[1] if ":" in image.split("/")[-1] else "latest"
+    print(f"{tag}: Pulling from {image.split(':')[0]}")
+    for layer in range(layers):
+        layer_id = f"{layer:012x}"
+        for line in range(lines_per_layer):
+            done = (line + 1) * 10 // lines_per_layer
+            print(f"{layer_id}: Downloading [{'=' * done}>{' ' * (10 - done)}]  {line + 1}MB/{lines_per_layer}MB")
+        print(f"{layer_id}: Pull complete")
+    print(f"Status: Downloaded newer image for {image}")
+
+
+def _publish(state_dir, ports):
+    """Return NetworkSettings.Ports for '-p' values, handing out host ports to those without one."""
+    bindings = {}
+    for port in ports:
+        parts = port.split(":")
+        container_port = parts[-1] if "/" in parts[-1] else parts[-1] + "/tcp"
+        host_port = parts[-2] if len(parts) > 1 else ""
+        if not host_port:
+            host_port = os.environ.get(EPHEMERAL_PORT_ENV) or str(FIRST_EPHEMERAL_PORT + len(_used_ports(state_dir)))
+        bindings[container_port] = [{"HostIp": "0.0.0.0", "HostPort": host_port}]
+    return bindings
+
+
+def _containers(state_dir):
+    for file_name in sorted(os.listdir(state_dir)):
+        if file_name.startswith("container-") and file_name.endswith(".json"):
+            # A container renamed or removed by a parallel command since the listing is skipped
+            try:
+                with open(os.path.join(state_dir, file_name), encoding="utf-8") as container_file:
+                    container = json.load(container_file)
+            except FileNotFoundError:
+                continue
+            yield container
+
+
+def _host_ports(container):
+    return {binding["HostPort"] for bindings in container["NetworkSettings"]["Ports"].values() for binding in bindings}
+
+
+def _used_ports(state_dir):
+    return {port for container in _containers(state_dir) for port in _host_ports(container)}
+
+
+def _start(state_dir, container):
+    """Mark a container running, failing like Docker if one of its host ports is taken."""
+    others = [other for other in _containers(state_dir) if other["Name"] != container["Name"]]
+    taken = {port for other in others if other["State"]["Status"] == "running" for port in _host_ports(other)}
+    conflicts = sorted(_host_ports(container) & taken)
+    if conflicts:
+        print(f"Error response from daemon: Bind for 0.0.0.0:{conflicts[0]} failed: port is already allocated",
+              file=sys.stderr)
+        return 125
+    container["State"]["Status"] = "running"
+    _save_container(state_dir, container)
+    return 0
+
+
+def _stats(state_dir, stream):
+    """Print 'docker stats' refreshes for the running containers, with load that rises and falls over a minute."""
+    interval = float(os.environ.get(STATS_INTERVAL_ENV, "1"))
+    refresh = 0
+    while True:
+        # Like Docker, every refresh starts by clearing the terminal
+        lines = ["\x1b[2J\x1b[H"]
+        for container in _containers(state_dir):
+            if container["State"]["Status"] != "running":
+                continue
+            load = (refresh % 60) / 60
+            lines.append(json.dumps({
+                "Name": container["Name"], "ID": container["Id"][:12], "CPUPerc": f"{load * 200:.2f}%",
+                "MemUsage": f"{0.5 + load:.2f}GiB / 2GiB", "MemPerc": f"{(0.5 + load) / 2:.2%}",
+                "NetIO": f"{refresh * 1.5:.1f}kB / {refresh * 0.5:.1f}kB", "BlockIO": f"{refresh * 2}MB / 0B",
+                "PIDs": "12",
+            }))
+        print("\n".join(lines), flush=True)
+        if not stream:
+            return 0
+        refresh += 1
+        time.sleep(interval)
+
+
+def _volume_dir(state_dir, name):
+    path = os.path.abspath(os.path.join(state_dir, "volumes", name))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _port_bindings(ports):
+    """Return HostConfig.PortBindings for '-p' values: the requested host ports, empty where Docker picks one."""
+    bindings = {}
+    for port in ports:
+        parts = port.split(":")
+        container_port = parts[-1] if "/" in parts[-1] else parts[-1] + "/tcp"
+        bindings[container_port] = [{"HostIp": parts[-3] if len(parts) > 2 else "",
+                                     "HostPort": parts[-2] if len(parts) > 1 else ""}]
+    return bindings
+
+
+def _mounts(state_dir, args):
+    """Return the Mounts of the named volumes among '-v' values, creating their directories."""
+    mounts = []
+    for index, arg in enumerate(args):
+        if arg == "-v":
+            source, destination = args[index + 1].split(":")[:2]
+            if not source.startswith("/"):
+                mounts.append({"Type": "volume", "Name": source, "Source": _volume_dir(state_dir, source),
+                               "Destination": destination})
+    return mounts
+
+
+def _run_removed(state_dir, args, command):
+    """Run the command of a 'docker run --rm' container here, with volume paths mapped to local directories."""
+    with tempfile.TemporaryDirectory(dir=state_dir) as private_tmp:
+        replacements = {mount["Destination"]: mount["Source"] for mount in _mounts(state_dir, args)}
+        replacements["/tmp"] = private_tmp
+        # One pass, so mapped paths are not mapped again
+        pattern = re.compile("|".join(re.escape(path) + "(?=/|$|[\\s'\"])" for path in replacements))
+        mapped = [pattern.sub(lambda match: replacements[match.group(0)], part) for part in command]
+        return subprocess.run(mapped).returncode
+
+
+def _run(state_dir, args, start=True):
+    name = args[args.index("--name") + 1] if "--name" in args else f"container-{time.monotonic_ns()}"
+    if _load_container(state_dir, name):
+        print(f'docker: Error response from daemon: Conflict. The container name "/{name}" is already in use.',
+              file=sys.stderr)
+        return 125
+    labels = {}
+    ports = []
+    host_config = {"Binds": [], "ExtraHosts": [], "RestartPolicy": {"Name": "no"}, "DeviceRequests": None}
+    env = []
+    for index, arg in enumerate(args):
+        if arg == "--label":
+            key, _, value = args[index + 1].partition("=")
+            labels[key] = value
+        elif arg == "-p":
+            ports.append(args[index + 1])
+        elif arg == "-v":
+            host_config["Binds"].append(args[index + 1])
+        elif arg == "-e":
+            env.append(args[index + 1])
+        elif arg == "--restart":
+            host_config["RestartPolicy"] = {"Name": args[index + 1]}
+        elif arg.startswith("--add-host="):
+            host_config["ExtraHosts"].append(arg.split("=", 1)[1])
+        elif arg.startswith("--gpus="):
+            host_config["DeviceRequests"] = [{"Driver": "", "Count": -1, "Capabilities": [["gpu"]]}]
+    # The image is the first argument that is neither an option nor an option's value
+    options_with_values = {"-p", "-v", "-e", "--name", "--restart", "--label"}
+    image = ""
+    index = 0
+    while index < len(args):
+        if args[index] in options_with_values:
+            index += 2
+            continue
+        if not args[index].startswith("-"):
+            image = args[index]
+            break
+        index += 1
+    if "--rm" in args:
+        return _run_removed(state_dir, args, args[index + 1:])
+    container = {
+        "Id": hashlib.sha256(name.encode()).hexdigest(), "Name": name,
+        "Image": image_id(image, _load_images(state_dir).get(image)),
+        "Config": {"Image": image, "Labels": labels, "Env": env, "Cmd": args[index + 1:] or None},
+        "HostConfig": {**host_config, "PortBindings": _port_bindings(ports)},
+        "State": {"Status": "created", "ExitCode": 0},
+        "NetworkSettings": {"Ports": _publish(state_dir, ports)}, "Mounts": _mounts(state_dir, args),
+    }
+    _save_container(state_dir, container)
+    if start and _start(state_dir, container):
+        return 125
+    print(container["Id"])
+    return 0
+
+
+def _inspect(state_dir, args):
+    container = _load_container(state_dir, args[-1])
+    if container is None:
+        print(f"Error: No such container: {args[-1]}", file=sys.stderr)
+        return 1
+    print(json.dumps(container["State"] if "{{json .State}}" in args else container))
+    return 0
+
+
+def _ps(state_dir):
+    for container in _containers(state_dir):
+        labels = ",".join(f"{key}={value}" for key, value in container["Config"]["Labels"].items())
+        print(json.dumps({"ID": container["Id"], "Names": container["Name"], "Image": container["Config"]["Image"],
+                          "State": container["State"]["Status"], "Labels": labels}))
+    return 0
+
+
+def _rename(state_dir, name, new_name):
+    container = _load_container(state_dir, name)
+    if container is None or _load_container(state_dir, new_name):
+        print(f"Error response from daemon: cannot rename {name} to {new_name}", file=sys.stderr)
+        return 1
+    os.remove(_container_path(state_dir, name))
+    container["Name"] = new_name
+    _save_container(state_dir, container)
+    return 0
+
+
+def main(args):
+    state_dir = os.environ[STATE_ENV]
+    with open(os.path.join(state_dir, CALL_LOG), "a", encoding="utf-8") as call_log:
+        call_log.write(" ".join(args) + "\n")
+    time.sleep(float(os.environ.get(LATENCY_ENV, "0")))
+
+    command = args[0] if args else ""
+    if command == "--version":
+        print("Docker version 27.0.0, build fake")
+    elif command == "version":
+        print("27.0.0")
+    elif command == "pull":
+        _pull(args[-1])
+        _add_image(state_dir, args[-1], _load_json(state_dir, REGISTRY_FILE).get(args[-1]))
+    elif command == "image":
+        images = _load_images(state_dir)
+        if args[-1] not in images:
+            print(f"Error: No such image: {args[-1]}", file=sys.stderr)
+            return 1
+        digest = images[args[-1]]
+        if "RepoDigests" in " ".join(args):
+            print(json.dumps(_repo_digests(args[-1], digest)))
+        else:
+            print(image_id(args[-1], digest))
+    elif command == "save":
+        return _save(state_dir, args[-1])
+    elif command == "load":
+        return _load(state_dir)
+    elif command == "run":
+        return _run(state_dir, args[1:])
+    elif command == "create":
+        return _run(state_dir, args[1:], start=False)
+    elif command == "volume":
+        if not os.path.isdir(os.path.join(state_dir, "volumes", args[-1])):
+            print(f"Error response from daemon: get {args[-1]}: no such volume", file=sys.stderr)
+            return 1
+        print(json.dumps([{"Name": args[-1], "Driver": "local"}]))
+    elif command == "rename":
+        return _rename(state_dir, args[1], args[2])
+    elif command == "inspect":
+        return _inspect(state_dir, args)
+    elif command == "ps":
+        return _ps(state_dir)
+    elif command == "rm":
+        try:
+            os.remove(_container_path(state_dir, args[-1]))
+        except FileNotFoundError:
+            pass
+    elif command == "stop":
+        container = _load_container(state_dir, args[-1])
+        if container is None:
+            return 1
+        container["State"]["Status"] = "exited"
+        _save_container(state_dir, container)
+    elif command == "start":
+        container = _load_container(state_dir, args[-1])
+        if container is None:
+            return 1
+        if args[-1] in os.environ.get(FAIL_START_ENV, "").split(","):
+            print(f"Error response from daemon: failed to start container {args[-1]}", file=sys.stderr)
+            return 1
+        return _start(state_dir, container)
+    elif command == "stats":
+        return _stats(state_dir, stream="--no-stream" not in args)
+    elif command == "events":
+        # Stream nothing until the watcher terminates the process
+        while True:
+            time.sleep(60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,133 @@
+# benchmarks/fake_engine_api.py
+"""
+Local stand-in for the Docker Engine API, served on a unix socket.
+
+Answers the read-only endpoints DockerAPIClient uses for status checks from the fake docker
+CLI's state directory, so both see the same containers:
+
+    GET /_ping                    'OK'
+    GET /version                  The daemon version
+    GET /containers/json          Container summaries, stopped ones only with all=1
+    GET /containers/{name}/json   Low-level information, 404 if the container does not exist
+
+    api = FakeEngineAPI(state_dir, latency=0.02)
+    client = DockerAPIClient(socket_path=api.socket_path)
+    ...
+    api.stop()
+"""
+
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, unquote, urlparse
+
+from benchmarks.fake_docker import _containers, _load_container
+
+# Version reported by /version, the same as 'docker version' of the fake CLI
+API_VERSION = "1.46"
+SERVER_VERSION = "27.0.0"
+
+
+class FakeEngineAPI:
+    """Threaded HTTP server on a unix socket implementing the status endpoints of the Engine API."""
+
+    def __init__(self, state_dir, latency=0, socket_path=None):
+        """
+        Args:
+            state_dir (str): State directory of the fake docker daemon.
+            latency (float): Seconds every request takes before it is answered.
+            socket_path (str): Where to listen, 'engine.sock' in the state directory by default.
+        """
+        self.state_dir = state_dir
+        self.latency = latency
+        self.socket_path = socket_path or os.path.join(state_dir, "engine.sock")
+        # Number of requests answered, so benchmarks can tell how many round trips a check took
+        self.requests = 0
+        self._lock = threading.Lock()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        try:
+            os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def _summary(self, container):
+        return {
+            "Id": container["Id"], "Names": ["/" + container["Name"]], "Image": container["Config"]["Image"],
+            "ImageID": container["Image"], "State": container["State"]["Status"],
+            "Labels": container["Config"]["Labels"],
+        }
+
+    def _list(self, query):
+        show_all = query.get("all", ["0"])[0] in ("1", "true")
+        names = json.loads(query.get("filters", ["{}"])[0]).get("name", [])
+        return [
+            self._summary(container) for container in _containers(self.state_dir)
+            if (show_all or container["State"]["Status"] == "running")
+            and (not names or any(name in container["Name"] for name in names))
+        ]
+
+    def _inspect(self, name):
+        container = _load_container(self.state_dir, name)
+        if container is None:
+            return None
+        # Like Docker, the name of an inspected container starts with a slash
+        return {**container, "Name": "/" + container["Name"]}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections open like the daemon does, DockerAPIClient pools them
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with api._lock:
+                    api.requests += 1
+                time.sleep(api.latency)
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                if url.path == "/_ping":
+                    self._send(200, b"OK", "text/plain")
+                elif url.path == "/version":
+                    self._send_json({"Version": SERVER_VERSION, "ApiVersion": API_VERSION})
+                elif url.path == "/containers/json":
+                    self._send_json(api._list(parse_qs(url.query)))
+                elif len(parts) == 3 and parts[0] == "containers" and parts[2] == "json":
+                    details = api._inspect(unquote(parts[1]))
+                    if details is None:
+                        self._send_json({"message": f"No such container: {unquote(parts[1])}"}, status=404)
+                    else:
+                        self._send_json(details)
+                else:
+                    self._send_json({"message": "page not found"}, status=404)
+
+            def _send_json(self, body, status=200):
+                self._send(status, json.dumps(body).encode(), "application/json")
+
+            def _send(self, status, payload, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def address_string(self):
+                # Unix socket clients have no address
+                return "unix"
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,135 @@
+# benchmarks/fake_file_server.py
+"""
+Local HTTP server for one file, standing in for the Docker Desktop download servers.
+
+Answers HEAD with the size, an ETag and 'Accept-Ranges: bytes', and GET with the whole file or a
+single byte range. Like real servers it sends the whole file (200) instead of a range when the
+If-Range ETag no longer matches. Responses can be cut short to exercise resuming:
+
+    server = FakeFileServer(content)
+    server.interrupt(1, after=1024 * 1024)              # the next GET stops after 1 MB
+    server.interrupt(1, after=1024 * 1024, publish=new)  # ... and then the file changes
+    url = server.url("Docker.dmg")
+    ...
+    server.stop()
+
+Every request is recorded in server.requests as a FileRequest.
+"""
+
+import hashlib
+import re
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# One request as the server saw it; range and if_range are the request headers, None if absent
+FileRequest = namedtuple("FileRequest", ["method", "range", "if_range", "status"])
+
+_RANGE = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+
+def etag_for(content):
+    return '"' + hashlib.sha256(content).hexdigest()[:16] + '"'
+
+
+class FakeFileServer:
+    """Threaded HTTP server serving one file with HEAD, ranged GET and If-Range support."""
+
+    def __init__(self, content):
+        """
+        Args:
+            content (bytes): The file served at every path.
+        """
+        self.requests = []
+        self._lock = threading.Lock()
+        self._interruptions = []
+        self.publish(content)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.address = f"127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self, file_name):
+        return f"http://{self.address}/{file_name}"
+
+    def publish(self, content):
+        """Serve new content under a new ETag, as after a release."""
+        with self._lock:
+            self.content = content
+            self.etag = etag_for(content)
+
+    def interrupt(self, count, after, publish=None):
+        """
+        Close the connection of the next count GET responses after the given number of body bytes.
+
+        Args:
+            count (int): Responses to cut short.
+            after (int): Body bytes sent before the connection is closed.
+            publish (bytes): Content served from the first interruption on.
+        """
+        with self._lock:
+            self._interruptions += [(after, publish)] * count
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                with server._lock:
+                    content, etag = server.content, server.etag
+                    server.requests.append(FileRequest("HEAD", None, None, 200))
+                self._send_headers(200, len(content), etag)
+
+            def do_GET(self):
+                requested_range = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                with server._lock:
+                    content, etag = server.content, server.etag
+                    interruption = server._interruptions.pop(0) if server._interruptions else None
+                    if interruption and interruption[1] is not None:
+                        server.content, server.etag = interruption[1], etag_for(interruption[1])
+
+                    match = _RANGE.match(requested_range or "")
+                    start, end = 0, len(content) - 1
+                    status = 200
+                    if match and (if_range is None or if_range == etag):
+                        start = int(match.group(1))
+                        end = min(int(match.group(2)), end) if match.group(2) else end
+                        status = 206
+                    server.requests.append(FileRequest("GET", requested_range, if_range, status))
+
+                if status == 206 and start > end:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(content)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self._send_headers(status, end + 1 - start, etag, (start, end, len(content)) if status == 206 else None)
+                body = content[start:end + 1]
+                if interruption:
+                    # Announce the whole body but drop the connection part way through it
+                    self.wfile.write(body[:interruption[0]])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+            def _send_headers(self, status, length, etag, content_range=None):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(length))
+                self.send_header("ETag", etag)
+                self.send_header("Accept-Ranges", "bytes")
+                if content_range:
+                    self.send_header("Content-Range", "bytes {}-{}/{}".format(*content_range))
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
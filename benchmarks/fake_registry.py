@@ -0,0 +1,118 @@
+# benchmarks/fake_registry.py
+"""
+Local stand-in for an image registry, serving manifest digests over HTTP.
+
+Digests live in the fake docker state directory's registry.json, so images pulled with the fake
+docker CLI get the digest the registry served. Image references must name the registry by its
+address, e.g. '127.0.0.1:5123/open-webui/open-webui:main'; addresses on 127.0.0.1 are reached over
+plain HTTP like Docker's own insecure localhost registries.
+
+    registry = FakeRegistry(state_dir, require_token=True)
+    image = registry.image("open-webui/open-webui:main")
+    registry.publish(image)       # a new digest, as after a release
+    ...
+    registry.stop()
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fake_docker import REGISTRY_FILE
+
+# Token handed out by the /token endpoint and expected on manifest requests when tokens are required
+TOKEN = "fake-registry-token"
+
+
+class FakeRegistry:
+    """Threaded HTTP server implementing the manifest HEAD/GET and token endpoints of the registry API."""
+
+    def __init__(self, state_dir, require_token=False):
+        """
+        Args:
+            state_dir (str): State directory of the fake docker daemon.
+            require_token (bool): Answer manifest requests without a bearer token with a 401 challenge.
+        """
+        self.state_dir = state_dir
+        self.require_token = require_token
+        # Number of manifest requests answered, so tests can tell a check was made
+        self.manifest_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.address = f"127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def image(self, repository_and_tag):
+        """Return the reference of an image hosted by this registry."""
+        return f"{self.address}/{repository_and_tag}"
+
+    def publish(self, image, digest=None):
+        """Make the registry serve a digest for an image reference, a new random one by default. Returns the digest."""
+        digest = digest or "sha256:" + hashlib.sha256(f"{image} {time.time_ns()}".encode()).hexdigest()
+        with self._lock:
+            digests = self._digests()
+            digests[image] = digest
+            with open(os.path.join(self.state_dir, REGISTRY_FILE), "w", encoding="utf-8") as registry_file:
+                json.dump(digests, registry_file)
+        return digest
+
+    def _digests(self):
+        try:
+            with open(os.path.join(self.state_dir, REGISTRY_FILE), encoding="utf-8") as registry_file:
+                return json.load(registry_file)
+        except FileNotFoundError:
+            return {}
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._answer(send_body=True)
+
+            def do_HEAD(self):
+                self._answer(send_body=False)
+
+            def _answer(self, send_body):
+                if self.path.startswith("/token"):
+                    self._send(200, {"Content-Type": "application/json"}, json.dumps({"token": TOKEN}).encode(), send_body)
+                    return
+                if not self.path.startswith("/v2/") or "/manifests/" not in self.path:
+                    self._send(404, {}, b"", send_body)
+                    return
+                if registry.require_token and self.headers.get("Authorization") != f"Bearer {TOKEN}":
+                    challenge = f'Bearer realm="http://{registry.address}/token",service="fake-registry"'
+                    self._send(401, {"WWW-Authenticate": challenge}, b"", send_body)
+                    return
+                repository, _, tag = self.path[len("/v2/"):].partition("/manifests/")
+                with registry._lock:
+                    registry.manifest_requests += 1
+                    digest = registry._digests().get(f"{registry.address}/{repository}:{tag}")
+                if digest is None:
+                    self._send(404, {}, b"", send_body)
+                    return
+                headers = {"Content-Type": "application/vnd.oci.image.index.v1+json", "Docker-Content-Digest": digest}
+                self._send(200, headers, json.dumps({"schemaVersion": 2, "digest": digest}).encode(), send_body)
+
+            def _send(self, status, headers, body, send_body):
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
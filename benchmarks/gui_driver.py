@@ -0,0 +1,86 @@
+# benchmarks/gui_driver.py
+"""
+Measures the GUI in a process of its own, so the start-up time includes every import.
+
+Usage: gui_driver.py <time.time() at spawn> <refreshes> <log lines>
+
+Prints one JSON object with the measurements, or {"skipped": reason} when no display is available.
+With 0 refreshes and 0 log lines only the start-up is measured.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+
+STARTED_AT = float(sys.argv[1])
+
+
+def main():
+    refreshes = int(sys.argv[2])
+    log_lines = int(sys.argv[3])
+
+    import tkinter as tk
+    from benchmarks.fake_docker import count_calls
+    from helpers.last_known_state import check_installer_status
+
+    try:
+        import OpenWebUIInstaller
+        app = OpenWebUIInstaller.OpenWebUIInstaller()
+    except tk.TclError as e:
+        print(json.dumps({"skipped": f"no display ({e})"}))
+        return
+
+    # First paint: the window and its widgets have been drawn once
+    app.update()
+    first_paint = time.time() - STARTED_AT
+
+    # Status reconciled: the background checks have finished and the buttons show their result
+    while not app.status_confirmed:
+        app.update()
+        time.sleep(0.001)
+    status_reconciled = time.time() - STARTED_AT
+    measurements = {"cold_start_first_paint": first_paint, "cold_start_status_reconciled": status_reconciled}
+
+    # The hardware probe runs 'docker info' in the background; keep it out of the spawn counts
+    app.option_panel.probe_thread.join()
+    state_dir = os.environ["FAKE_DOCKER_STATE"]
+    # The checks and button updates update_button_states makes in the background, timed in the foreground
+    cold, spawns = [], []
+    for _ in range(refreshes):
+        app.docker_manager.reset_docker_status()
+        calls_before = count_calls(state_dir)
+        refresh_started = time.perf_counter()
+        app.apply_status(check_installer_status(app.docker_manager))
+        cold.append(time.perf_counter() - refresh_started)
+        spawns.append(count_calls(state_dir) - calls_before)
+
+    cached = []
+    for _ in range(refreshes):
+        refresh_started = time.perf_counter()
+        app.apply_status(check_installer_status(app.docker_manager))
+        cached.append(time.perf_counter() - refresh_started)
+    if refreshes:
+        measurements.update({
+            "update_button_states": statistics.median(cold),
+            "update_button_states_cached": statistics.median(cached),
+            "update_button_states_spawns": max(spawns),
+        })
+
+    # Logger throughput: from the first log() call until every line is in the text area
+    logging_started = time.perf_counter()
+    for index in range(log_lines):
+        app.logger.log(f"Benchmark line {index}", output_mode="both")
+    while not app.logger._pending.empty():
+        app.update()
+    logger_seconds = time.perf_counter() - logging_started
+    if log_lines:
+        measurements["logger_throughput"] = log_lines / logger_seconds
+
+    app.on_close()
+    print(json.dumps(measurements))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmarks for the installer's hot paths, run against the fake docker CLI in fake_docker.py.
+
+    python -m benchmarks.run_benchmarks --output results.json
+    python -m benchmarks.run_benchmarks --baseline results.json --tolerance 0.2
+
+Run from the repository root. GUI benchmarks need a display and are reported as skipped without one.
+The exit code is 1 when a metric regressed against the baseline by more than the tolerance.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_docker import CALL_LOG, FAIL_START_ENV, count_calls, image_id, install_fake_docker  # noqa: E402
+from benchmarks.fake_engine_api import FakeEngineAPI  # noqa: E402
+
+# Unit and direction of every metric
+METRICS = {
+    "cold_start_first_paint": ("s", "lower"),
+    "cold_start_status_reconciled": ("s", "lower"),
+    "cold_start_first_paint_slow_daemon": ("s", "lower"),
+    "cold_start_status_reconciled_slow_daemon": ("s", "lower"),
+    "update_button_states": ("s", "lower"),
+    "update_button_states_cached": ("s", "lower"),
+    "update_button_states_spawns": ("spawns", "lower"),
+    "logger_throughput": ("lines/s", "higher"),
+    "status_refresh": ("s", "lower"),
+    "status_refresh_spawns": ("spawns", "lower"),
+    "status_refresh_cached_spawns": ("spawns", "lower"),
+    "status_refresh_api": ("s", "lower"),
+    "status_refresh_api_spawns": ("spawns", "lower"),
+    "status_refresh_api_requests": ("requests", "lower"),
+    "setup_containers": ("s", "lower"),
+    "setup_containers_rerun": ("s", "lower"),
+    "setup_containers_rerun_pulls": ("pulls", "lower"),
+    "update_unchanged": ("s", "lower"),
+    "update_unchanged_pulls": ("pulls", "lower"),
+    "update_cutover": ("s", "lower"),
+    "update_rollback": ("s", "lower"),
+    "file_log_throughput": ("lines/s", "higher"),
+    "download_stream": ("s", "lower"),
+    "download_parallel": ("s", "lower"),
+    "download_resume": ("s", "lower"),
+}
+
+# Allowed relative change against the baseline before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+@contextmanager
+def fake_docker(latency, output_lines):
+    """Point docker at a fresh fake daemon for the duration of the block and yield its state directory."""
+    with tempfile.TemporaryDirectory(prefix="installer-bench-") as directory:
+        env = install_fake_docker(directory, latency=latency, output_lines=output_lines)
+        saved_environ = dict(os.environ)
+        saved_cwd = os.getcwd()
+        os.environ.clear()
+        os.environ.update(env)
+        # Log files land in ./logs, keep them out of the repository
+        os.chdir(directory)
+        try:
+            yield env["FAKE_DOCKER_STATE"]
+        finally:
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_environ)
+
+
+def _quiet_log(message, output_mode="both", **fields):
+    pass
+
+
+def _refresh_status(docker_manager):
+    """The checks update_button_states makes, without the widgets."""
+    if docker_manager.is_docker_installed():
+        docker_manager.are_containers_set_up()
+        docker_manager.is_container_present("watchtower")
+
+
+def bench_status_refresh(args):
+    from helpers.docker_manager import DockerManager
+
+    timings, spawns, cached_spawns = [], [], []
+    for _ in range(args.repeat):
+        with fake_docker(args.latency, args.output_lines) as state_dir:
+            docker_manager = DockerManager(log_callback=_quiet_log)
+            started_at = time.perf_counter()
+            _refresh_status(docker_manager)
+            timings.append(time.perf_counter() - started_at)
+            spawns.append(count_calls(state_dir))
+            _refresh_status(docker_manager)
+            cached_spawns.append(count_calls(state_dir) - spawns[-1])
+    return {
+        "status_refresh": statistics.median(timings),
+        "status_refresh_spawns": max(spawns),
+        "status_refresh_cached_spawns": max(cached_spawns),
+    }
+
+
+def bench_status_refresh_api(args):
+    """The status refresh answered by the Engine API on a unix socket, which needs no docker processes."""
+    from helpers.docker_api import DockerAPIClient
+    from helpers.docker_manager import DockerManager
+
+    timings, spawns, requests = [], [], []
+    for _ in range(args.repeat):
+        with fake_docker(args.latency, args.output_lines) as state_dir:
+            api = FakeEngineAPI(state_dir, latency=args.latency)
+            client = DockerAPIClient(socket_path=api.socket_path)
+            try:
+                # A container to find, so the refresh sees both a present and a missing (404) one
+                subprocess.run(["docker", "run", "-d", "--name", "open-webui", "ghcr.io/open-webui/open-webui:main"],
+                               check=True, capture_output=True)
+                calls_before = count_calls(state_dir)
+                docker_manager = DockerManager(log_callback=_quiet_log, api_client=client)
+                started_at = time.perf_counter()
+                _refresh_status(docker_manager)
+                timings.append(time.perf_counter() - started_at)
+                spawns.append(count_calls(state_dir) - calls_before)
+                requests.append(api.requests)
+                assert docker_manager.inspect_container("open-webui")["State"]["Status"] == "running"
+                assert docker_manager.inspect_container("missing") is None
+            finally:
+                client.close()
+                api.stop()
+    return {
+        "status_refresh_api": statistics.median(timings),
+        "status_refresh_api_spawns": max(spawns),
+        "status_refresh_api_requests": max(requests),
+    }
+
+
+def bench_setup_containers(args):
+    from helpers.docker_manager import DockerManager
+    from helpers.flavors import FLAVOR_OPTIONS
+
+    first, rerun, rerun_pulls = [], [], []
+    for _ in range(args.repeat):
+        with fake_docker(args.latency, args.output_lines) as state_dir:
+            docker_manager = DockerManager(log_callback=_quiet_log)
+            flavor_spec = FLAVOR_OPTIONS["Default (Ollama Local)"]
+            # The fake daemon serves no HTTP, so readiness probing is left out
+            for timings in (first, rerun):
+                calls_before = count_calls(state_dir)
+                started_at = time.perf_counter()
+                if not docker_manager.setup_containers(flavor_spec, wait_ready=False):
+                    raise RuntimeError("Container setup failed against the fake docker CLI.")
+                timings.append(time.perf_counter() - started_at)
+            # Every container is up to date on the rerun, so no image is pulled
+            rerun_pulls.append(sum(1 for call in _docker_calls(state_dir, calls_before) if call.startswith("pull ")))
+    return {
+        "setup_containers": statistics.median(first), "setup_containers_rerun": statistics.median(rerun),
+        "setup_containers_rerun_pulls": max(rerun_pulls),
+    }
+
+
+def _docker_calls(state_dir, calls_before):
+    """Return the docker invocations recorded since count_calls() returned calls_before."""
+    with open(os.path.join(state_dir, CALL_LOG), encoding="utf-8") as call_log:
+        return [line.strip() for line in list(call_log)[calls_before:]]
+
+
+def _check_cutover(docker_manager, state_dir, calls_before, name, image, digest):
+    """Raise RuntimeError unless the container runs the image at digest and no cutover container is left."""
+    from helpers.flavors import WATCHTOWER_LABELS
+
+    calls = _docker_calls(state_dir, calls_before)
+    details = docker_manager.inspect_container(name) or {}
+    if details.get("Image") != image_id(image, digest) or details.get("State", {}).get("Status") != "running":
+        raise RuntimeError(f"'{name}' does not run {image}@{digest} after the update:\n" + "\n".join(calls))
+    for suffix in ("-canary", "-cutover", "-previous"):
+        if docker_manager.inspect_container(name + suffix) is not None:
+            raise RuntimeError(f"'{name}{suffix}' was left behind by the update:\n" + "\n".join(calls))
+    if set(details["Config"]["Labels"]) & set(WATCHTOWER_LABELS):
+        raise RuntimeError(f"'{name}' still carries the watchtower label after the update.")
+    return calls
+
+
+def bench_update(args):
+    """
+    Updates against the local registry stand-in: nothing changed, a new release that is cut over,
+    and a new release whose container fails to start and is rolled back, together with its volume.
+    """
+    from benchmarks.fake_registry import FakeRegistry
+    from helpers.docker_manager import DockerManager
+    from helpers.flavors import FLAVOR_OPTIONS, PIPELINES_SPEC
+    from helpers.volume_snapshot import VolumeSnapshots
+
+    timings, pulls, cutovers, rollbacks = [], [], [], []
+    for _ in range(args.repeat):
+        with fake_docker(args.latency, args.output_lines) as state_dir:
+            registry = FakeRegistry(state_dir, require_token=True)
+            try:
+                # No published ports: the fake daemon serves no HTTP, so there is nothing to probe
+                specs = [
+                    spec.with_overrides(image=registry.image(spec.image.split("/", 1)[1]), ports=[])
+                    for spec in (FLAVOR_OPTIONS["Default (Ollama Local)"], PIPELINES_SPEC)
+                ]
+                for spec in specs:
+                    registry.publish(spec.image)
+                docker_manager = DockerManager(log_callback=_quiet_log, snapshot_dir=os.path.join(state_dir, "snapshots"))
+                if not docker_manager.blue_green_update(specs):
+                    raise RuntimeError("Update failed against the fake docker CLI.")
+                calls_before = count_calls(state_dir)
+                started_at = time.perf_counter()
+                docker_manager.blue_green_update(specs)
+                timings.append(time.perf_counter() - started_at)
+                pulls.append(sum(1 for line in _docker_calls(state_dir, calls_before) if line.startswith("pull ")))
+
+                # A new release of the Open WebUI image is cut over
+                webui = specs[0]
+                old_digest = registry.publish(webui.image)
+                calls_before = count_calls(state_dir)
+                started_at = time.perf_counter()
+                if not docker_manager.blue_green_update(specs):
+                    raise RuntimeError("The cutover to a new release failed against the fake docker CLI.")
+                cutovers.append(time.perf_counter() - started_at)
+                calls = _check_cutover(docker_manager, state_dir, calls_before, webui.name, webui.image, old_digest)
+                expected = [
+                    f"rename {webui.name} {webui.name}-previous", f"start {webui.name}-cutover",
+                    f"rename {webui.name}-cutover {webui.name}", f"rm -f {webui.name}-previous",
+                ]
+                if [call for call in calls if call in expected] != expected:
+                    raise RuntimeError("The cutover ran out of order:\n" + "\n".join(calls))
+
+                # The next release does not start; the previous container and its data must come back
+                registry.publish(webui.image)
+                docker_manager.command_env[FAIL_START_ENV] = f"{webui.name}-cutover"
+                volume = webui.named_volumes()[0]
+                data_path = os.path.join(state_dir, "volumes", volume, "webui.db")
+                with open(data_path, "w", encoding="utf-8") as data:
+                    data.write("before the update")
+                # The canary runs the new version's migrations on the shared volume
+                original_run_container = docker_manager.run_container
+
+                def run_migrating_canary(spec, progress_callback=None):
+                    with open(data_path, "w", encoding="utf-8") as data:
+                        data.write("migrated by the canary")
+                    return original_run_container(spec, progress_callback)
+                docker_manager.run_container = run_migrating_canary
+                calls_before = count_calls(state_dir)
+                started_at = time.perf_counter()
+                if docker_manager.blue_green_update(specs):
+                    raise RuntimeError("An update whose container did not start was reported as successful.")
+                rollbacks.append(time.perf_counter() - started_at)
+                _check_cutover(docker_manager, state_dir, calls_before, webui.name, webui.image, old_digest)
+                del docker_manager.command_env[FAIL_START_ENV]
+                docker_manager.run_container = original_run_container
+                with open(data_path, encoding="utf-8") as data:
+                    if data.read() != "before the update":
+                        raise RuntimeError(f"The rollback did not restore volume '{volume}'.")
+                if len(VolumeSnapshots(docker_manager, docker_manager.snapshot_dir).list(volume)) != 2:
+                    raise RuntimeError(f"Expected a snapshot of volume '{volume}' before each cutover.")
+            finally:
+                registry.stop()
+    return {
+        "update_unchanged": statistics.median(timings), "update_unchanged_pulls": max(pulls),
+        "update_cutover": statistics.median(cutovers), "update_rollback": statistics.median(rollbacks),
+    }
+
+
+def _check_download(path, content, requests, expected_ranges):
+    """Raise RuntimeError unless the file holds content and the GET requests asked for the expected ranges."""
+    with open(path, "rb") as downloaded:
+        if downloaded.read() != content:
+            raise RuntimeError(f"{path} does not hold the served file.")
+    ranges = sorted(request.range or "" for request in requests if request.method == "GET")
+    if ranges != sorted(expected_ranges):
+        raise RuntimeError(f"Expected GET ranges {sorted(expected_ranges)}, the server saw {ranges}.")
+
+
+def bench_download(args):
+    """
+    Downloads from a local file server: one stream, parallel ranges, and an interrupted download
+    resumed by the next run. Also checks that a file changed during a download is fetched again in
+    full (If-Range) and that a checksum mismatch fails.
+    """
+    from benchmarks.fake_file_server import FakeFileServer
+    from helpers.downloader import Downloader, DownloadError, MAX_ATTEMPTS
+
+    size = args.download_mb * 1024 * 1024
+    content = os.urandom(size)
+    digest = hashlib.sha256(content).hexdigest()
+    half, eighth = size // 2, size // 8
+    streams, parallels, resumes = [], [], []
+    server = FakeFileServer(content)
+    try:
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix="installer-bench-") as directory:
+                server.publish(content)
+                for timings, chunks in ((streams, 1), (parallels, 4)):
+                    server.requests.clear()
+                    downloader = Downloader(os.path.join(directory, f"cache-{chunks}"), parallel_chunks=chunks,
+                                            min_parallel_size=1)
+                    started_at = time.perf_counter()
+                    path = downloader.download(server.url("Docker.dmg"), sha256=digest)
+                    timings.append(time.perf_counter() - started_at)
+                    quarter = size // 4
+                    expected = [""] if chunks == 1 else [
+                        f"bytes={start}-{min(start + quarter, size) - 1}" for start in range(0, size, quarter)
+                    ]
+                    _check_download(path, content, server.requests, expected)
+
+                # Every attempt of the first run stops after an eighth; the next run only fetches the rest.
+                # Only downloads with a pinned checksum are resumed across runs.
+                cache_dir = os.path.join(directory, "cache-resume")
+                server.interrupt(MAX_ATTEMPTS, after=eighth)
+                try:
+                    Downloader(cache_dir, parallel_chunks=1).download(server.url("Docker.dmg"), sha256=digest)
+                    raise RuntimeError("An interrupted download did not fail.")
+                except DownloadError:
+                    pass
+                server.requests.clear()
+                started_at = time.perf_counter()
+                path = Downloader(cache_dir, parallel_chunks=1).download(server.url("Docker.dmg"), sha256=digest)
+                resumes.append(time.perf_counter() - started_at)
+                _check_download(path, content, server.requests, [f"bytes={eighth * MAX_ATTEMPTS}-"])
+
+                # The file changes after the first half arrived: If-Range makes the server send all of it
+                changed = os.urandom(size)
+                server.requests.clear()
+                server.interrupt(1, after=half, publish=changed)
+                path = Downloader(os.path.join(directory, "cache-changed"), parallel_chunks=1).download(
+                    server.url("Docker.dmg")
+                )
+                _check_download(path, changed, server.requests, ["", f"bytes={half}-"])
+                server.publish(content)
+
+                try:
+                    Downloader(os.path.join(directory, "cache-mismatch"), parallel_chunks=1).download(
+                        server.url("Docker.dmg"), sha256="0" * 64
+                    )
+                    raise RuntimeError("A download with the wrong checksum did not fail.")
+                except DownloadError:
+                    pass
+    finally:
+        server.stop()
+    return {
+        "download_stream": statistics.median(streams), "download_parallel": statistics.median(parallels),
+        "download_resume": statistics.median(resumes),
+    }
+
+
+def bench_file_log(args):
+    from helpers.file_log import FileLogWriter
+
+    rates = []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory(prefix="installer-bench-") as directory:
+            writer = FileLogWriter(os.path.join(directory, "bench.log"))
+            started_at = time.perf_counter()
+            for index in range(args.log_lines):
+                writer.write(f"Benchmark line {index}", step="bench", duration=0.1)
+            # close() waits until the background thread has written every line
+            writer.close()
+            rates.append(args.log_lines / (time.perf_counter() - started_at))
+    return {"file_log_throughput": statistics.median(rates)}
+
+
+def _run_gui_driver(args, latency, refreshes, log_lines):
+    """Run gui_driver.py against a fresh fake daemon once per repeat and return the median of each measurement."""
+    runs = []
+    for _ in range(args.repeat):
+        with fake_docker(latency, args.output_lines) as state_dir:
+            env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+            command = [sys.executable, os.path.join(REPO_ROOT, "benchmarks", "gui_driver.py"),
+                       repr(time.time()), str(refreshes), str(log_lines)]
+            result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=os.path.dirname(state_dir))
+        if result.returncode != 0:
+            raise RuntimeError(f"GUI driver failed:\n{result.stderr}")
+        measurements = json.loads(result.stdout.strip().splitlines()[-1])
+        if "skipped" in measurements:
+            return measurements
+        runs.append(measurements)
+    return {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+
+
+def bench_gui(args):
+    return _run_gui_driver(args, args.latency, args.refreshes, args.log_lines)
+
+
+def bench_gui_slow_daemon(args):
+    """Start-up while every docker command takes --slow-latency seconds; first paint must not wait for them."""
+    measurements = _run_gui_driver(args, args.slow_latency, 0, 0)
+    if "skipped" in measurements:
+        return measurements
+    return {f"{name}_slow_daemon": value for name, value in measurements.items()}
+
+
+BENCHMARKS = {
+    "gui": bench_gui,
+    "gui_slow_daemon": bench_gui_slow_daemon,
+    "status": bench_status_refresh,
+    "status_api": bench_status_refresh_api,
+    "setup": bench_setup_containers,
+    "update": bench_update,
+    "file_log": bench_file_log,
+    "download": bench_download,
+}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results to a baseline.
+
+    Returns:
+        list: (metric, baseline value, value, relative change, regressed) for every metric in both.
+    """
+    rows = []
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]["value"]
+        change = (value["value"] - base) / base if base else 0.0
+        lower_is_better = METRICS[name][1] == "lower"
+        regressed = change > tolerance if lower_is_better else change < -tolerance
+        rows.append((name, base, value["value"], change, regressed))
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only these benchmarks.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the results (JSON).")
+    parser.add_argument("--baseline", help="Earlier results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative change that counts as a regression (default: %(default)s).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, the median is kept.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds each fake docker command takes.")
+    parser.add_argument("--slow-latency", type=float, default=1.0,
+                        help="Seconds each fake docker command takes in the slow daemon benchmark.")
+    parser.add_argument("--output-lines", type=int, default=10, help="Progress lines per layer printed by 'pull'.")
+    parser.add_argument("--refreshes", type=int, default=5, help="update_button_states calls per GUI run.")
+    parser.add_argument("--download-mb", type=int, default=32, help="Size of the file served by the download benchmark.")
+    parser.add_argument("--log-lines", type=int, default=10000, help="Lines logged by the throughput benchmarks.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    results, skipped = {}, {}
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...", file=sys.stderr)
+        measurements = BENCHMARKS[name](args)
+        if "skipped" in measurements:
+            skipped[name] = measurements["skipped"]
+            continue
+        for metric, value in measurements.items():
+            unit, better = METRICS[metric]
+            results[metric] = {"value": value, "unit": unit, "better": better}
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "latency": args.latency,
+            "output_lines": args.output_lines,
+            "repeat": args.repeat,
+            "log_lines": args.log_lines,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+
+    for metric, value in results.items():
+        print(f"{metric:<32} {value['value']:>14.4f} {value['unit']}")
+    for name, reason in skipped.items():
+        print(f"{name:<32} skipped: {reason}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    rows = compare(results, baseline, args.tolerance)
+    print(f"\nCompared with {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for metric, base, value, change, regressed in rows:
+        print(f"{metric:<32} {base:>12.4f} -> {value:>12.4f}  {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
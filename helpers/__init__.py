@@ -1,6 +1,17 @@
 # helpers/__init__.py
-from .option_panel import OptionPanel
-from .logger import Logger
-from .docker_manager import DockerManager
+import importlib
+
+# Classes are imported on first use so that headless code paths never load tkinter
+_LAZY_IMPORTS = {
+    "DockerManager": ".docker_manager",
+    "OptionPanel": ".option_panel",
+    "Logger": ".logger",
+}
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Optional: define an __all__ to specify what gets imported with "from helpers import *"
-__all__ = ["DockerManager", "OptionPanel", "Logger"]
\ No newline at end of file
+__all__ = ["DockerManager", "OptionPanel", "Logger"]
@@ -0,0 +1,545 @@
+# helpers/cli.py
+
+import time
+
+# Taken before any other import so the startup measurement includes them
+_IMPORT_STARTED_AT = time.perf_counter()
+
+import argparse
+import json
+import os
+import shlex
+import sys
+
+from .docker_api import DockerAPIClient
+from .docker_events import MANAGED_CONTAINERS
+from .docker_manager import DockerManager
+from .file_log import FileLogWriter, LOG_DIR, LOG_FORMAT_ENV, new_log_file_path, prune_logs
+from .fleet import FLEET_PARALLELISM, HOST_TIMEOUT, format_results_table, load_inventory, provision_fleet, results_to_json
+from .flavors import PIPELINES_SPEC, WATCHTOWER_SPEC, find_flavor, flavor_slug, load_flavors
+from .host_probe import HostProbe, describe_capacity, recommend_flavor, tune_spec, tuned_settings
+from .image_cache import IMAGE_CACHE_ENV, ImageCache
+from .downloader import DOWNLOAD_CACHE_DIR, DOWNLOAD_CACHE_ENV
+from .pull_progress import format_pull_progress
+from .resource_monitor import ResourceMonitor, export_csv, export_json
+from .step_journal import DEFAULT_JOURNAL_PATH, JOURNAL_ENV, StepJournal
+from .tracing import TRACE_DIR_ENV, Tracer
+from .volume_snapshot import MANAGED_VOLUMES, SNAPSHOT_DIR, SNAPSHOT_DIR_ENV, SnapshotError, VolumeSnapshots
+
+# Time allowed from process start until the CLI is ready to run a command
+STARTUP_BUDGET_SECONDS = 0.25
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_OVER_BUDGET = 3
+
+# Seconds between two tables printed by the monitor command
+MONITOR_PRINT_INTERVAL = 5
+
+
+class ConsoleLogger:
+    """Log callback for the CLI: prints UI messages to stdout and writes everything to the log file."""
+
+    def __init__(self, file_writer, quiet=False):
+        self.file_writer = file_writer
+        self.quiet = quiet
+
+    def log(self, message, output_mode="both", **fields):
+        if output_mode in {"text", "both"} and not self.quiet:
+            # Fleet runs interleave several hosts, so say which one a message is about
+            print(f"[{fields['host']}] {message}" if "host" in fields else message, flush=True)
+        if output_mode in {"file", "both"}:
+            self.file_writer.write(message, **fields)
+
+    def log_pull_progress(self, progress):
+        """Print a progress line each time a layer of an image finishes downloading."""
+        if progress.status == "Pull complete":
+            self.log(format_pull_progress(progress), output_mode="text")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="OpenWebUIInstaller",
+        description="Install Docker and set up Open WebUI containers without the GUI."
+    )
+    parser.add_argument("--log-dir", default=LOG_DIR, help="Directory for log files (default: %(default)s).")
+    parser.add_argument(
+        "--log-format", choices=("text", "json"), default="json" if os.environ.get(LOG_FORMAT_ENV) == "json" else "text",
+        help="Log file format (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--flavors-file", help="JSON file with extra or tuned flavors (default: $INSTALLER_FLAVORS_FILE or ./flavors.json)."
+    )
+    parser.add_argument(
+        "--trace", metavar="DIR", default=os.environ.get(TRACE_DIR_ENV),
+        help=f"Write a Chrome trace and Prometheus metrics of every step and command to DIR (default: ${TRACE_DIR_ENV})."
+    )
+    parser.add_argument(
+        "--image-cache", metavar="DIR", default=os.environ.get(IMAGE_CACHE_ENV),
+        help=f"Load images from DIR instead of pulling them, and save pulled images there (default: ${IMAGE_CACHE_ENV})."
+    )
+    parser.add_argument(
+        "--download-cache", metavar="DIR", default=os.environ.get(DOWNLOAD_CACHE_ENV, DOWNLOAD_CACHE_DIR),
+        help="Directory where downloaded Docker installers are kept and resumed (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--journal", metavar="FILE", default=os.environ.get(JOURNAL_ENV, DEFAULT_JOURNAL_PATH),
+        help="File recording completed install steps, which reruns verify and skip (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--snapshot-dir", metavar="DIR", default=os.environ.get(SNAPSHOT_DIR_ENV, SNAPSHOT_DIR),
+        help="Directory of volume snapshots (default: %(default)s)."
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print command results.")
+    parser.add_argument("--timings", action="store_true", help="Print the CLI startup time to stderr.")
+    parser.add_argument(
+        "--check-startup-budget", action="store_true",
+        help=f"Exit with code {EXIT_OVER_BUDGET} if startup took longer than {STARTUP_BUDGET_SECONDS * 1000:.0f} ms."
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    install_docker = commands.add_parser("install-docker", help="Install Docker for this platform.")
+    install_docker.add_argument("--force", action="store_true", help="Forget the journal and run every step again.")
+    setup = commands.add_parser("setup", help="Set up the Open WebUI, pipelines and watchtower containers.")
+    setup.add_argument(
+        "--flavor", required=True, help="Flavor name or slug, see the 'flavors' command, or 'auto' to pick one for this host."
+    )
+    setup.add_argument("--tune", action="store_true", help="Size memory, shm and Ollama settings to this host.")
+    setup.add_argument("--no-wait", action="store_true", help="Do not wait for the containers to serve requests.")
+    setup.add_argument("--snapshot", action="store_true", help="Snapshot the existing volumes before changing anything.")
+    setup.add_argument(
+        "--no-watchtower", action="store_true", help="Do not start watchtower; update with 'update --flavor' instead."
+    )
+    status = commands.add_parser("status", help="Show whether Docker and the managed containers are running.")
+    status.add_argument("--json", action="store_true", help="Print the status as JSON.")
+    update = commands.add_parser(
+        "update", help="Start watchtower to keep the containers up to date, or with --flavor update them now."
+    )
+    update.add_argument(
+        "--flavor",
+        help="Pull changed images and replace the flavor's and the pipelines containers with a health-gated cutover; "
+             "this removes watchtower."
+    )
+    update.add_argument("--tune", action="store_true", help="Size the containers to this host, as 'setup --tune' does.")
+    update.add_argument("--snapshot", action="store_true", help="Snapshot the existing volumes before updating.")
+    flavors = commands.add_parser("flavors", help="List the available flavors.")
+    flavors.add_argument("--argv", action="store_true", help="Also print each flavor's 'docker run' command.")
+    probe = commands.add_parser("probe", help="Show this host's hardware, the recommended flavor and its tuned settings.")
+    probe.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    fleet = commands.add_parser("fleet", help="Set up containers on every host of an inventory file in parallel.")
+    fleet.add_argument("inventory", help="JSON file listing hosts with a name, flavor and docker_host or context.")
+    fleet.add_argument(
+        "--parallel", type=int, default=FLEET_PARALLELISM, help="Hosts provisioned at once (default: %(default)s)."
+    )
+    fleet.add_argument(
+        "--timeout", type=float, default=HOST_TIMEOUT, help="Seconds allowed per host (default: %(default)s)."
+    )
+    fleet.add_argument("--json", action="store_true", help="Print the results as JSON instead of a table.")
+    cache = commands.add_parser("cache", help="Manage the image cache given by --image-cache.")
+    cache.add_argument("action", choices=("list", "add", "verify", "prune"), help="What to do with the cache.")
+    cache.add_argument("images", nargs="*", help="Images to add.")
+    cache.add_argument("--flavor", help="Add the images of this flavor, pipelines and watchtower.")
+    cache.add_argument("--max-gb", type=float, help="Size to prune the cache to, in GB (default: the cache limit).")
+    monitor = commands.add_parser(
+        "monitor", help="Show CPU, memory, network and block I/O of the managed containers until interrupted."
+    )
+    monitor.add_argument("--duration", type=float, help="Stop after this many seconds (default: run until Ctrl+C).")
+    monitor.add_argument(
+        "--every", type=float, default=MONITOR_PRINT_INTERVAL, help="Seconds between two printed tables (default: %(default)s)."
+    )
+    monitor.add_argument("--csv", metavar="FILE", help="Write the recorded history to a CSV file at the end.")
+    monitor.add_argument("--json", metavar="FILE", dest="json_file", help="Write the recorded history to a JSON file at the end.")
+    snapshot = commands.add_parser("snapshot", help="Archive the data volumes, list their snapshots or restore one.")
+    snapshot.add_argument("action", choices=("create", "list", "restore"), help="What to do.")
+    snapshot.add_argument(
+        "volumes", nargs="*", help=f"Volumes to act on (default: those of {', '.join(MANAGED_VOLUMES)} that exist)."
+    )
+    snapshot.add_argument("--id", help="Snapshot id to create or restore (default: a new timestamp, or the latest).")
+    snapshot.add_argument("--full", action="store_true", help="Archive every file instead of the changes since the last snapshot.")
+    snapshot.add_argument("--stop", action="store_true", help="Stop the containers using a volume while it is archived.")
+    return parser
+
+
+def create_image_cache(args):
+    return ImageCache(args.image_cache) if args.image_cache else None
+
+
+def create_docker_manager(args, logger):
+    return DockerManager(
+        log_callback=logger.log, api_client=DockerAPIClient.from_env(), tracer=args.tracer,
+        image_cache=create_image_cache(args), download_cache_dir=args.download_cache, journal=StepJournal(args.journal),
+        snapshot_dir=args.snapshot_dir
+    )
+
+
+def snapshot_volumes(args, docker_manager, volumes=MANAGED_VOLUMES, snapshot_id=None, incremental=True,
+                     stop_containers=False):
+    """Snapshot the given volumes that exist under one id. Returns True if every snapshot was written."""
+    snapshots = VolumeSnapshots(docker_manager, directory=args.snapshot_dir)
+    snapshot_id = snapshot_id or snapshots.new_id()
+    ok = True
+    for volume in volumes:
+        if not snapshots.volume_exists(volume):
+            docker_manager.log(f"Volume '{volume}' does not exist, not taking a snapshot.", output_mode="both")
+            continue
+        try:
+            snapshots.create(volume, snapshot_id, incremental=incremental, stop_containers=stop_containers)
+        except SnapshotError as e:
+            docker_manager.log(str(e), output_mode="both")
+            ok = False
+    return ok
+
+
+def run_install_docker(args, logger):
+    docker_manager = create_docker_manager(args, logger)
+    if args.force:
+        docker_manager.forget_journal()
+    installed = docker_manager.install_docker(progress_callback=lambda line: logger.log(line, output_mode="text"))
+    return EXIT_OK if installed and docker_manager.is_docker_installed() else EXIT_FAILURE
+
+
+def probe_host():
+    """Probe this host, printing the error and returning None if the capacity overrides are malformed."""
+    try:
+        return HostProbe().probe()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return None
+
+
+def select_flavor(args, logger):
+    """
+    Resolve --flavor (a name, slug or 'auto') and apply --tune.
+
+    Returns:
+        tuple: (flavor name, ContainerSpec), or (None, exit code) if the flavor cannot be used.
+    """
+    capacity = None
+    if args.flavor.lower() == "auto" or args.tune:
+        capacity = probe_host()
+        if capacity is None:
+            return None, EXIT_USAGE
+        logger.log(f"Host: {describe_capacity(capacity)}", output_mode="both")
+
+    if args.flavor.lower() == "auto":
+        flavor, reason = recommend_flavor(capacity, args.flavors)
+        if flavor is None:
+            print(f"The recommended flavor is not available ({reason}).", file=sys.stderr)
+            return None, EXIT_USAGE
+        logger.log(f"Picked flavor '{flavor}': {reason}.", output_mode="both")
+    else:
+        flavor = find_flavor(args.flavor, args.flavors)
+    if flavor is None:
+        print(f"Unknown flavor '{args.flavor}'. Run the 'flavors' command to list them.", file=sys.stderr)
+        return None, EXIT_USAGE
+
+    flavor_spec = args.flavors[flavor]
+    if args.tune:
+        flavor_spec = tune_spec(flavor_spec, capacity)
+        settings = tuned_settings(args.flavors[flavor], capacity)
+        logger.log(f"Tuned settings: {', '.join(f'{key}={value}' for key, value in settings.items()) or 'none'}", output_mode="both")
+    return flavor, flavor_spec
+
+
+def run_setup(args, logger):
+    flavor, flavor_spec = select_flavor(args, logger)
+    if flavor is None:
+        return flavor_spec
+
+    docker_manager = create_docker_manager(args, logger)
+    if not docker_manager.is_docker_installed():
+        print("Docker is not installed. Run the 'install-docker' command first.", file=sys.stderr)
+        return EXIT_FAILURE
+
+    if args.snapshot and not snapshot_volumes(args, docker_manager):
+        return EXIT_FAILURE
+    logger.log(f"Setting up flavor '{flavor}'.", output_mode="both")
+    started = docker_manager.setup_containers(
+        flavor_spec, progress_callback=logger.log_pull_progress, wait_ready=not args.no_wait,
+        watchtower=not args.no_watchtower
+    )
+    return EXIT_OK if started else EXIT_FAILURE
+
+
+def run_status(args, logger):
+    docker_manager = create_docker_manager(args, logger)
+    docker_installed = docker_manager.is_docker_installed()
+    containers = docker_manager.container_state.containers() if docker_installed else {}
+    status = {
+        "docker_installed": docker_installed,
+        "containers": {
+            name: containers[name].state if name in containers else None for name in MANAGED_CONTAINERS
+        },
+    }
+
+    if args.json:
+        print(json.dumps(status, indent=2))
+    else:
+        print(f"Docker installed: {'yes' if docker_installed else 'no'}")
+        for name, state in status["containers"].items():
+            print(f"{name:<12} {state or 'not present'}")
+    return EXIT_OK if docker_installed else EXIT_FAILURE
+
+
+def run_update(args, logger):
+    flavor_spec = None
+    if args.flavor:
+        flavor, flavor_spec = select_flavor(args, logger)
+        if flavor is None:
+            return flavor_spec
+
+    docker_manager = create_docker_manager(args, logger)
+    if not docker_manager.is_docker_installed():
+        print("Docker is not installed. Run the 'install-docker' command first.", file=sys.stderr)
+        return EXIT_FAILURE
+    if args.snapshot and not snapshot_volumes(args, docker_manager):
+        return EXIT_FAILURE
+    if flavor_spec is None:
+        return EXIT_OK if docker_manager.update_containers() else EXIT_FAILURE
+    updated = docker_manager.blue_green_update([flavor_spec, PIPELINES_SPEC], progress_callback=logger.log_pull_progress)
+    return EXIT_OK if updated else EXIT_FAILURE
+
+
+def run_flavors(args, logger):
+    for flavor, spec in args.flavors.items():
+        print(f"{flavor_slug(flavor):<26} {args.flavor_descriptions.get(flavor, '')}")
+        if args.argv:
+            print(f"{'':<26} {shlex.join(spec.to_argv())}")
+    return EXIT_OK
+
+
+def run_probe(args, logger):
+    capacity = probe_host()
+    if capacity is None:
+        return EXIT_USAGE
+    flavor, reason = recommend_flavor(capacity, args.flavors)
+    settings = tuned_settings(args.flavors[flavor], capacity) if flavor else {}
+    if args.json:
+        print(json.dumps({"host": capacity._asdict(), "flavor": flavor, "reason": reason, "settings": settings}, indent=2))
+        return EXIT_OK
+    print(f"{'Host:':<26}{describe_capacity(capacity)}")
+    print(f"{'Flavor:':<26}{flavor_slug(flavor) if flavor else 'none'} ({reason})")
+    for key, value in settings.items():
+        print(f"{key + ':':<26}{value}")
+    return EXIT_OK
+
+
+def run_fleet(args, logger):
+    try:
+        hosts = load_inventory(args.inventory, args.flavors)
+    except (OSError, ValueError) as e:
+        print(f"Could not load inventory: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    def report(result):
+        outcome = "done" if result.ok else f"failed: {result.error}"
+        logger.log(f"Host {outcome} in {result.duration:.1f}s.", output_mode="both", host=result.host.name)
+
+    results = provision_fleet(
+        hosts, logger.log, parallelism=args.parallel, timeout=args.timeout, result_callback=report, tracer=args.tracer,
+        image_cache=create_image_cache(args)
+    )
+    if args.json:
+        print(json.dumps(results_to_json(results), indent=2))
+    else:
+        print(format_results_table(results))
+    return EXIT_OK if all(result.ok for result in results) else EXIT_FAILURE
+
+
+def run_cache(args, logger):
+    if not args.image_cache:
+        print(f"No image cache given. Pass --image-cache DIR or set {IMAGE_CACHE_ENV}.", file=sys.stderr)
+        return EXIT_USAGE
+    docker_manager = create_docker_manager(args, logger)
+    image_cache = docker_manager.image_cache
+
+    if args.action == "list":
+        for digest, images, size, last_used in image_cache.entries():
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(last_used))
+            print(f"{digest[:19]}  {size / 1000 ** 2:>9.1f} MB  {used}  {', '.join(images)}")
+        print(f"Total: {image_cache.total_size() / 1000 ** 3:.2f} GB")
+        return EXIT_OK
+
+    if args.action == "verify":
+        results = image_cache.verify()
+        for digest, ok in results:
+            print(f"{digest[:19]}  {'ok' if ok else 'damaged, removed'}")
+        return EXIT_OK if all(ok for _, ok in results) else EXIT_FAILURE
+
+    if args.action == "prune":
+        max_bytes = int(args.max_gb * 1000 ** 3) if args.max_gb is not None else None
+        evicted = image_cache.evict(max_bytes)
+        print(f"Removed {len(evicted)} images, {image_cache.total_size() / 1000 ** 3:.2f} GB left.")
+        return EXIT_OK
+
+    images = list(args.images)
+    if args.flavor:
+        flavor = find_flavor(args.flavor, args.flavors)
+        if flavor is None:
+            print(f"Unknown flavor '{args.flavor}'. Run the 'flavors' command to list them.", file=sys.stderr)
+            return EXIT_USAGE
+        images += [args.flavors[flavor].image, PIPELINES_SPEC.image, WATCHTOWER_SPEC.image]
+    if not images:
+        print("Name the images to add, or pass --flavor.", file=sys.stderr)
+        return EXIT_USAGE
+
+    # Images missing locally are pulled, which saves them to the cache as well
+    missing = [image for image in images if docker_manager.image_id(image) is None]
+    pulled = docker_manager.pull_images(missing, progress_callback=logger.log_pull_progress)
+    cached = [pulled[image] if image in pulled else docker_manager.cache_image(image) for image in images]
+    return EXIT_OK if all(cached) else EXIT_FAILURE
+
+
+def format_resource_table(monitor, seconds):
+    """Return a table of each monitored container's latest sample and its summary over the last given seconds."""
+    lines = [f"{'CONTAINER':<12} {'CPU':>7} {'CPU AVG':>8} {'MEMORY':>19} {'MEM PEAK':>9} {'NET RX/TX':>19} {'BLOCK R/W':>19}"]
+    warnings = []
+    for name in monitor.history.containers():
+        latest = monitor.history.latest(name)
+        summary = monitor.summary(name, seconds)
+        if latest is None or summary is None:
+            continue
+        memory = f"{latest.memory_bytes / 1024 ** 3:.2f} / {latest.memory_limit / 1024 ** 3:.1f} GiB"
+        net = f"{latest.net_rx_bytes / 1000 ** 2:.1f} / {latest.net_tx_bytes / 1000 ** 2:.1f} MB"
+        block = f"{latest.block_read_bytes / 1000 ** 2:.1f} / {latest.block_write_bytes / 1000 ** 2:.1f} MB"
+        lines.append(
+            f"{name:<12} {latest.cpu_percent:>6.1f}% {summary['cpu_mean']:>7.1f}% {memory:>19} "
+            f"{summary['memory_peak'] / 1024 ** 3:>5.2f} GiB {net:>19} {block:>19}"
+        )
+        warnings += [f"{name}: {warning}" for warning in summary["warnings"]]
+    if len(lines) == 1:
+        lines.append("No managed container is running.")
+    return "\n".join(lines + warnings)
+
+
+def run_monitor(args, logger):
+    docker_manager = create_docker_manager(args, logger)
+    if not docker_manager.is_docker_installed():
+        print("Docker is not installed. Run the 'install-docker' command first.", file=sys.stderr)
+        return EXIT_FAILURE
+
+    monitor = ResourceMonitor(docker_manager)
+    monitor.start()
+    started_at = time.monotonic()
+    try:
+        while args.duration is None or time.monotonic() - started_at < args.duration:
+            remaining = args.every if args.duration is None else min(args.every, args.duration - (time.monotonic() - started_at))
+            time.sleep(max(0, remaining))
+            print(format_resource_table(monitor, time.monotonic() - started_at), flush=True)
+            print(flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop()
+
+    try:
+        if args.csv:
+            export_csv(monitor.history, args.csv)
+            logger.log(f"Resource history written to {args.csv}", output_mode="both")
+        if args.json_file:
+            export_json(monitor.history, args.json_file)
+            logger.log(f"Resource history written to {args.json_file}", output_mode="both")
+    except OSError as e:
+        print(f"Could not write the resource history: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_OK
+
+
+def run_snapshot(args, logger):
+    docker_manager = create_docker_manager(args, logger)
+    snapshots = VolumeSnapshots(docker_manager, directory=args.snapshot_dir)
+
+    if args.action == "create":
+        if not docker_manager.is_docker_installed():
+            print("Docker is not installed. Run the 'install-docker' command first.", file=sys.stderr)
+            return EXIT_FAILURE
+        ok = snapshot_volumes(
+            args, docker_manager, args.volumes or MANAGED_VOLUMES, snapshot_id=args.id, incremental=not args.full,
+            stop_containers=args.stop
+        )
+        return EXIT_OK if ok else EXIT_FAILURE
+
+    volumes = args.volumes or [volume for volume in MANAGED_VOLUMES if snapshots.list(volume)]
+    if args.action == "list":
+        for volume in volumes:
+            for snapshot in snapshots.list(volume):
+                kind = "full" if snapshot.base is None else f"on {snapshot.base}"
+                print(f"{volume:<12} {snapshot.id:<17} {snapshot.created}  {snapshot.archive_size / 1000 ** 2:>9.1f} MB  {kind}")
+        return EXIT_OK
+
+    if not volumes:
+        print(f"There are no snapshots in {args.snapshot_dir}.", file=sys.stderr)
+        return EXIT_USAGE
+    ok = True
+    for volume in volumes:
+        try:
+            snapshots.restore(volume, args.id)
+        except SnapshotError as e:
+            print(e, file=sys.stderr)
+            ok = False
+    return EXIT_OK if ok else EXIT_FAILURE
+
+
+COMMANDS = {
+    "install-docker": run_install_docker,
+    "setup": run_setup,
+    "status": run_status,
+    "update": run_update,
+    "flavors": run_flavors,
+    "probe": run_probe,
+    "fleet": run_fleet,
+    "cache": run_cache,
+    "monitor": run_monitor,
+    "snapshot": run_snapshot,
+}
+
+
+def main(argv=None, started_at=None):
+    """
+    Run the headless installer.
+
+    Args:
+        argv (list): Command line arguments, defaults to sys.argv[1:].
+        started_at (float): time.perf_counter() value taken when the process started, used
+            to measure startup time. Defaults to the moment this module started importing.
+
+    Returns:
+        int: The process exit code.
+    """
+    args = build_parser().parse_args(argv)
+
+    startup_seconds = time.perf_counter() - (started_at if started_at is not None else _IMPORT_STARTED_AT)
+    over_budget = startup_seconds > STARTUP_BUDGET_SECONDS
+    if args.timings or (args.check_startup_budget and over_budget):
+        print(
+            f"CLI ready in {startup_seconds * 1000:.1f} ms "
+            f"(budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms, tkinter loaded: {'tkinter' in sys.modules})",
+            file=sys.stderr
+        )
+    if args.check_startup_budget and over_budget:
+        return EXIT_OVER_BUDGET
+
+    try:
+        args.flavors, args.flavor_descriptions = load_flavors(args.flavors_file)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return EXIT_USAGE
+
+    prune_logs(args.log_dir)
+    json_lines = args.log_format == "json"
+    file_writer = FileLogWriter(new_log_file_path(args.log_dir, json_lines=json_lines), json_lines=json_lines)
+    # Keep machine-readable output free of progress messages
+    logger = ConsoleLogger(file_writer, quiet=args.quiet or getattr(args, "json", False))
+    args.tracer = Tracer(enabled=bool(args.trace))
+    try:
+        return COMMANDS[args.command](args, logger)
+    finally:
+        if args.trace:
+            trace_path, metrics_path = args.tracer.export(args.trace)
+            print(f"Trace written to {trace_path}, metrics to {metrics_path}", file=sys.stderr)
+        file_writer.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
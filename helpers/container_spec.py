@@ -0,0 +1,164 @@
+# helpers/container_spec.py
+
+import re
+from dataclasses import dataclass, field, fields, replace
+
+_PORT_PATTERN = re.compile(r"^(?:(?:[\d.]+:)?\d+:|[\d.]+::)?\d+(?:/(?:tcp|udp))?$")
+_SIZE_PATTERN = re.compile(r"^\d+(?:\.\d+)?[bkmg]?$", re.IGNORECASE)
+_ULIMIT_PATTERN = re.compile(r"^-?\d+(?::-?\d+)?$")
+# Names Docker accepts for named volumes; anything else before the colon is a host path
+_VOLUME_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9_.-]*$")
+
+# Environment variables set by the Ollama concurrency knobs
+OLLAMA_ENV = {
+    "ollama_num_parallel": "OLLAMA_NUM_PARALLEL",
+    "ollama_max_loaded_models": "OLLAMA_MAX_LOADED_MODELS",
+}
+
+
+@dataclass
+class ContainerSpec:
+    """Declarative description of a container, compiled into a 'docker run' argument list."""
+
+    name: str
+    image: str
+    ports: list = field(default_factory=list)          # "host_port:container_port", or "container_port" for any free host port
+    volumes: list = field(default_factory=list)        # "volume_or_path:container_path"
+    env: dict = field(default_factory=dict)
+    labels: dict = field(default_factory=dict)
+    extra_hosts: list = field(default_factory=list)    # "name:address"
+    gpus: str = None                                   # e.g. "all"
+    restart: str = None                                # e.g. "always"
+    command: list = field(default_factory=list)        # arguments after the image
+    depends_on: list = field(default_factory=list)     # names of containers started before this one
+
+    # Performance knobs
+    cpus: float = None                                 # --cpus
+    memory: str = None                                 # --memory, e.g. "16g"
+    shm_size: str = None                               # --shm-size, e.g. "2g"
+    ulimits: dict = field(default_factory=dict)        # e.g. {"nofile": "65536:65536"}
+    ollama_num_parallel: int = None                    # OLLAMA_NUM_PARALLEL
+    ollama_max_loaded_models: int = None               # OLLAMA_MAX_LOADED_MODELS
+
+    def to_argv(self):
+        """Return the 'docker run' argument list for this container."""
+        argv = ["docker", "run", "-d"]
+        for port in self.ports:
+            argv += ["-p", port]
+        if self.gpus:
+            argv.append(f"--gpus={self.gpus}")
+        for extra_host in self.extra_hosts:
+            argv.append(f"--add-host={extra_host}")
+        for volume in self.volumes:
+            argv += ["-v", volume]
+        for key, value in self.environment().items():
+            argv += ["-e", f"{key}={value}"]
+        argv += ["--name", self.name]
+        if self.restart:
+            argv += ["--restart", self.restart]
+        for key, value in self.labels.items():
+            argv += ["--label", f"{key}={value}"]
+        if self.cpus is not None:
+            argv.append(f"--cpus={self.cpus:g}")
+        if self.memory:
+            argv.append(f"--memory={self.memory}")
+        if self.shm_size:
+            argv.append(f"--shm-size={self.shm_size}")
+        for name, limit in self.ulimits.items():
+            argv.append(f"--ulimit={name}={limit}")
+        return argv + [self.image] + list(self.command)
+
+    def environment(self):
+        """Return the container's environment, including the variables set by the Ollama knobs."""
+        env = dict(self.env)
+        for attribute, variable in OLLAMA_ENV.items():
+            value = getattr(self, attribute)
+            if value is not None:
+                env[variable] = str(value)
+        return env
+
+    def published_ports(self):
+        """Return the fixed host ports this container publishes; ports Docker picks are left out."""
+        ports = []
+        for port in self.ports:
+            parts = port.split("/")[0].split(":")
+            if len(parts) > 1 and parts[-2]:
+                ports.append(int(parts[-2]))
+        return ports
+
+    def container_ports(self):
+        """Return the container side of every published port, e.g. '8080' or '53/udp'."""
+        return [port.rsplit(":", 1)[-1] for port in self.ports]
+
+    def named_volumes(self):
+        """Return the names of the Docker volumes this container mounts; bind-mounted host paths are left out."""
+        sources = [volume.split(":", 1)[0] for volume in self.volumes]
+        return [source for source in sources if _VOLUME_NAME_PATTERN.match(source)]
+
+    def with_overrides(self, **overrides):
+        """
+        Return a copy with some settings changed. env, labels and ulimits are merged into the
+        existing values, every other setting is replaced.
+        """
+        merged = {}
+        for key, value in overrides.items():
+            if key in ("env", "labels", "ulimits"):
+                value = {**getattr(self, key), **value}
+            merged[key] = value
+        spec = replace(self, **merged)
+        spec.validate()
+        return spec
+
+    def validate(self):
+        """
+        Check the settings before they reach Docker.
+
+        Raises:
+            ValueError: If a setting is malformed.
+        """
+        if not self.name or not self.image:
+            raise ValueError("A container needs a name and an image.")
+        for port in self.ports:
+            if not _PORT_PATTERN.match(port):
+                raise ValueError(f"Invalid port mapping '{port}' for '{self.name}', expected 'host:container'.")
+        for volume in self.volumes:
+            if ":" not in volume:
+                raise ValueError(f"Invalid volume '{volume}' for '{self.name}', expected 'source:target'.")
+        for size_name in ("memory", "shm_size"):
+            size = getattr(self, size_name)
+            if size is not None and not _SIZE_PATTERN.match(str(size)):
+                raise ValueError(f"Invalid {size_name} '{size}' for '{self.name}', expected a size such as '8g'.")
+        if self.cpus is not None and self.cpus <= 0:
+            raise ValueError(f"Invalid cpus '{self.cpus}' for '{self.name}', expected a positive number.")
+        for name, limit in self.ulimits.items():
+            if not _ULIMIT_PATTERN.match(str(limit)):
+                raise ValueError(f"Invalid ulimit '{name}={limit}' for '{self.name}', expected 'soft[:hard]'.")
+        for attribute in OLLAMA_ENV:
+            value = getattr(self, attribute)
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(f"Invalid {attribute} '{value}' for '{self.name}', expected a positive integer.")
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a spec from a dict such as one loaded from JSON.
+
+        Raises:
+            ValueError: If the dict has unknown keys or malformed settings.
+        """
+        known = {spec_field.name for spec_field in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown container settings: {', '.join(sorted(unknown))}.")
+        spec = cls(**data)
+        spec.validate()
+        return spec
+
+    def to_dict(self):
+        """Return the settings that differ from the defaults, suitable for JSON."""
+        data = {}
+        for spec_field in fields(self):
+            value = getattr(self, spec_field.name)
+            if value not in (None, [], {}):
+                data[spec_field.name] = value
+        return data
@@ -0,0 +1,106 @@
+# helpers/container_state.py
+
+import threading
+import time
+from collections import namedtuple
+
+# Seconds a container snapshot stays valid before it is fetched again
+STATE_TTL = 5
+
+ContainerInfo = namedtuple("ContainerInfo", ["id", "name", "image", "state", "labels"])
+
+
+def parse_labels(text):
+    """Parse the 'key=value,key=value' label string printed by 'docker ps'."""
+    labels = {}
+    for item in (text or "").split(","):
+        if item:
+            key, _, value = item.partition("=")
+            labels[key] = value
+    return labels
+
+
+def container_from_cli(entry):
+    """Build a ContainerInfo from one line of 'docker ps --format {{json .}}' output."""
+    return ContainerInfo(
+        id=entry.get("ID", ""),
+        name=entry.get("Names", "").split(",")[0],
+        image=entry.get("Image", ""),
+        state=entry.get("State", ""),
+        labels=parse_labels(entry.get("Labels"))
+    )
+
+
+def container_from_api(entry):
+    """Build a ContainerInfo from one entry of the Engine API '/containers/json' response."""
+    names = entry.get("Names") or [""]
+    return ContainerInfo(
+        id=entry.get("Id", ""),
+        name=names[0].lstrip("/"),
+        image=entry.get("Image", ""),
+        state=entry.get("State", ""),
+        labels=entry.get("Labels") or {}
+    )
+
+
+class ContainerStateCache:
+    """Snapshot of every container on the host, fetched in one query and indexed by exact name."""
+
+    def __init__(self, fetch, ttl=STATE_TTL):
+        """
+        Args:
+            fetch (callable): Returns a list of ContainerInfo for all containers, or None if
+                the daemon could not be queried.
+            ttl (float): Seconds before the snapshot is considered stale.
+        """
+        self._fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._containers = {}
+        self._fetched_at = None
+        self._live = False
+
+    def invalidate(self):
+        """Drop the snapshot so the next lookup queries the daemon again."""
+        with self._lock:
+            self._fetched_at = None
+
+    def set_live(self, live):
+        """
+        Mark the snapshot as kept current by a daemon event stream.
+
+        While live, the snapshot does not expire, and updates arrive through apply().
+        Leaving live mode drops the snapshot, since events may have been missed.
+        """
+        with self._lock:
+            self._live = live
+            if not live:
+                self._fetched_at = None
+
+    def apply(self, container):
+        """Store the new state of a single container without refetching; a None state removes it."""
+        with self._lock:
+            if container.state is None:
+                self._containers.pop(container.name, None)
+            else:
+                self._containers[container.name] = container
+
+    def containers(self):
+        """Return the current snapshot as a dict of container name to ContainerInfo."""
+        with self._lock:
+            now = time.monotonic()
+            expired = self._fetched_at is None or (not self._live and now - self._fetched_at >= self.ttl)
+            if expired:
+                # A failed fetch is cached as an empty snapshot so a stopped daemon is not hammered
+                containers = self._fetch() or []
+                self._containers = {container.name: container for container in containers}
+                self._fetched_at = now
+            return dict(self._containers)
+
+    def get(self, name):
+        """Return the ContainerInfo for an exact container name, or None if it does not exist."""
+        return self.containers().get(name)
+
+    def running(self):
+        """Return the containers that are currently running."""
+        return [container for container in self.containers().values() if container.state == "running"]
@@ -0,0 +1,205 @@
+# helpers/docker_api.py
+
+import http.client
+import json
+import os
+import queue
+import socket
+from urllib.parse import quote, urlencode, urlparse
+
+DEFAULT_SOCKET_PATH = "/var/run/docker.sock"
+
+# Seconds to wait for the daemon before giving up on a request
+API_TIMEOUT = 5
+
+# Number of idle keep-alive connections kept for reuse
+POOL_SIZE = 4
+
+
+class DockerAPIError(Exception):
+    """Raised when the Docker Engine API cannot be reached or returns an error."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection that talks to a unix domain socket instead of a TCP port."""
+
+    def __init__(self, socket_path, timeout=API_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerAPIClient:
+    """Minimal Docker Engine API client that keeps its HTTP connections open between calls."""
+
+    def __init__(self, socket_path=None, host=None, port=None, timeout=API_TIMEOUT, pool_size=POOL_SIZE):
+        """
+        Create a client for a daemon listening on a unix socket or a plain TCP port.
+
+        Args:
+            socket_path (str): Path of the daemon's unix socket.
+            host (str): Host name of a daemon listening on TCP, used when socket_path is not set.
+            port (int): TCP port of the daemon.
+            timeout (float): Socket timeout in seconds.
+            pool_size (int): Maximum number of idle connections kept for reuse.
+        """
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    @classmethod
+    def from_env(cls, docker_host=None):
+        """
+        Create a client for DOCKER_HOST, or the default socket when it is not set.
+
+        Returns:
+            DockerAPIClient | None: None when the daemon address can only be used through the CLI
+            (ssh:// and npipe:// hosts, TLS, or platforms without unix sockets).
+        """
+        docker_host = docker_host or os.environ.get("DOCKER_HOST")
+        if not docker_host:
+            if not hasattr(socket, "AF_UNIX") or not os.path.exists(DEFAULT_SOCKET_PATH):
+                return None
+            return cls(socket_path=DEFAULT_SOCKET_PATH)
+
+        parsed = urlparse(docker_host)
+        if parsed.scheme == "unix" and hasattr(socket, "AF_UNIX"):
+            return cls(socket_path=parsed.path)
+        if parsed.scheme in ("tcp", "http") and not os.environ.get("DOCKER_TLS_VERIFY"):
+            return cls(host=parsed.hostname, port=parsed.port or 2375)
+        return None
+
+    def _new_connection(self):
+        if self.socket_path:
+            return UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self):
+        """Take an idle connection from the pool, or open a new one."""
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, connection):
+        """Return a connection to the pool, closing it if the pool is full."""
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, method, path, params=None, body=None):
+        """
+        Send a request to the daemon and return the decoded response body.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API path such as '/containers/json'.
+            params (dict): Query string parameters.
+            body (dict): JSON request body.
+
+        Returns:
+            The decoded JSON body, the raw text for non-JSON responses, or None when empty.
+        """
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+
+        connection, reused = self._acquire()
+        try:
+            try:
+                response = self._send(connection, method, path, payload, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The daemon closed an idle keep-alive connection, retry once on a fresh one
+                connection.close()
+                if not reused:
+                    raise
+                connection = self._new_connection()
+                response = self._send(connection, method, path, payload, headers)
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            raise DockerAPIError(f"Docker Engine API request {method} {path} failed: {e}") from e
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+
+        if response.status >= 400:
+            raise DockerAPIError(
+                f"Docker Engine API returned {response.status} for {method} {path}: {data.decode(errors='replace').strip()}",
+                status=response.status
+            )
+        if not data:
+            return None
+        if response.getheader("Content-Type", "").startswith("application/json"):
+            return json.loads(data)
+        return data.decode(errors="replace")
+
+    @staticmethod
+    def _send(connection, method, path, payload, headers):
+        connection.request(method, path, body=payload, headers=headers)
+        return connection.getresponse()
+
+    def ping(self):
+        """Return True if the daemon answers '/_ping'."""
+        return self.request("GET", "/_ping") == "OK"
+
+    def version(self):
+        """Return the daemon's version information."""
+        return self.request("GET", "/version")
+
+    def list_containers(self, all=False, filters=None):
+        """
+        List containers, like 'docker ps'.
+
+        Args:
+            all (bool): Include stopped containers, like 'docker ps -a'.
+            filters (dict): Engine API filters such as {"name": ["open-webui"]}.
+
+        Returns:
+            list: Container summaries as returned by '/containers/json'.
+        """
+        params = {"all": "1" if all else "0"}
+        if filters:
+            params["filters"] = json.dumps(filters)
+        return self.request("GET", "/containers/json", params=params) or []
+
+    def inspect_container(self, name):
+        """Return the low-level information of a container, like 'docker inspect', or None if it does not exist."""
+        try:
+            return self.request("GET", f"/containers/{quote(name)}/json")
+        except DockerAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def inspect_image(self, name):
+        """Return the low-level information of a local image, like 'docker image inspect', or None if it is missing."""
+        try:
+            return self.request("GET", f"/images/{quote(name, safe='/:')}/json")
+        except DockerAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def close(self):
+        """Close all idle pooled connections."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
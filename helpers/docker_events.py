@@ -0,0 +1,172 @@
+# helpers/docker_events.py
+
+import json
+import platform
+import subprocess
+import threading
+import time
+
+from .container_state import ContainerInfo
+
+# Containers the installer manages and reports to subscribers
+MANAGED_CONTAINERS = ("open-webui", "pipelines", "watchtower")
+
+# Container events that change whether a container exists or runs
+WATCHED_EVENTS = ("start", "stop", "die", "destroy")
+
+# Container state after each watched event, None meaning the container is gone
+_EVENT_STATES = {"start": "running", "stop": "exited", "die": "exited", "destroy": None}
+
+# Event attributes that are not container labels
+_NON_LABEL_ATTRIBUTES = {"name", "image", "exitCode", "signal"}
+
+# Seconds to wait before reconnecting after the event stream ends, doubled on each failure
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 30
+
+
+class DockerEventWatcher:
+    """Background thread that follows 'docker events' and keeps container state current."""
+
+    def __init__(self, docker_manager, container_names=MANAGED_CONTAINERS,
+                 reconnect_delay=RECONNECT_DELAY, max_reconnect_delay=MAX_RECONNECT_DELAY):
+        """
+        Args:
+            docker_manager (DockerManager): Provides logging and the container snapshot to keep current.
+            container_names (tuple): Containers whose state changes are pushed to subscribers.
+            reconnect_delay (float): Initial delay before reconnecting to the daemon.
+            max_reconnect_delay (float): Upper bound for the reconnect delay.
+        """
+        self.docker_manager = docker_manager
+        self.container_names = tuple(container_names)
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._states = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._process = None
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Register callback(container_name, state) to be called from the watcher thread on every change."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def states(self):
+        """Return the last known state of each managed container ('running', 'exited', or None if absent)."""
+        with self._lock:
+            return {name: self._states.get(name) for name in self.container_names}
+
+    def start(self):
+        """Start watching in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="docker-events", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching and terminate the 'docker events' process."""
+        self._stop_event.set()
+        process = self._process
+        if process and process.poll() is None:
+            process.terminate()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _watch(self):
+        delay = self.reconnect_delay
+        while not self._stop_event.is_set():
+            connected_at = time.monotonic()
+            self._follow_events()
+            self.docker_manager.container_state.set_live(False)
+            if self._stop_event.is_set():
+                break
+
+            # Reset the backoff if the stream was healthy for a while before it ended
+            if time.monotonic() - connected_at > self.max_reconnect_delay:
+                delay = self.reconnect_delay
+            self.docker_manager.log(
+                f"Docker event stream ended, reconnecting in {delay:g} seconds.", output_mode="file"
+            )
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _follow_events(self):
+        """Run one 'docker events' session until it ends or the watcher is stopped."""
+        command = ["docker", "events", "--filter", "type=container", "--format", "{{json .}}"]
+        for event in WATCHED_EVENTS:
+            command += ["--filter", f"event={event}"]
+
+        popen_kwargs = {}
+        if platform.system() == "Windows":
+            popen_kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        try:
+            self._process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1,
+                env=self.docker_manager.command_env, **popen_kwargs
+            )
+        except OSError as e:
+            self.docker_manager.log(f"Could not start 'docker events': {e}", output_mode="file")
+            return
+
+        # Events are only seen from now on, so take a fresh snapshot and keep it current from the stream
+        self._resync()
+        try:
+            for line in self._process.stdout:
+                if self._stop_event.is_set():
+                    break
+                self._handle_line(line)
+        finally:
+            if self._process.poll() is None:
+                self._process.terminate()
+            self._process.wait()
+
+    def _resync(self):
+        state = self.docker_manager.container_state
+        state.invalidate()
+        state.set_live(True)
+        containers = state.containers()
+        for name in self.container_names:
+            container = containers.get(name)
+            self._set_state(name, container.state if container else None)
+
+    def _handle_line(self, line):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return
+        action = event.get("Action") or event.get("status")
+        if action not in _EVENT_STATES:
+            return
+
+        actor = event.get("Actor") or {}
+        attributes = dict(actor.get("Attributes") or {})
+        name = attributes.get("name")
+        if not name:
+            return
+
+        state = _EVENT_STATES[action]
+        labels = {key: value for key, value in attributes.items() if key not in _NON_LABEL_ATTRIBUTES}
+        self.docker_manager.container_state.apply(
+            ContainerInfo(id=actor.get("ID", ""), name=name, image=attributes.get("image", ""), state=state, labels=labels)
+        )
+        if name in self.container_names:
+            self._set_state(name, state)
+
+    def _set_state(self, name, state):
+        """Update the model and notify subscribers if the state of a managed container changed."""
+        with self._lock:
+            if name in self._states and self._states[name] == state:
+                return
+            self._states[name] = state
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(name, state)
@@ -4,108 +4,672 @@ import subprocess
 import platform
 import time
 import os
+import re
 import sys
+import json
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from .pull_progress import PullProgressTracker
+from .docker_api import DockerAPIError
+from .image_cache import ImageCacheError
+from .downloader import Downloader, DownloadError, DOWNLOAD_CACHE_DIR
+from .readiness import ReadinessProber, READINESS_PATHS, READINESS_TIMEOUT
+from .registry import RegistryClient, RegistryError
+from .flavors import PIPELINES_SPEC, WATCHTOWER_SPEC, without_watchtower
+from .step_journal import JournalError
+from .setup_plan import SetupPlan, format_plan, diff_container, with_spec_hash, SKIP, START, CREATE, RECREATE
+from .tracing import NULL_TRACER
+from .container_state import ContainerStateCache, container_from_api, container_from_cli, STATE_TTL
+from .volume_snapshot import VolumeSnapshots, SnapshotError, SNAPSHOT_DIR
 
-SECONDARY_CONTAINER_COMMAND = [
-    "docker", "run", "-d", "-p", "9099:9099", 
-    "--add-host=host.docker.internal:host-gateway", 
-    "-v", "pipelines:/app/pipelines", 
-    "--name", "pipelines", 
-    "--restart", "always", 
-    "--label", "com.centurylinklabs.watchtower.enable=true",
-    "ghcr.io/open-webui/pipelines:main"
-]
-
-WATCHTOWER_COMMAND = [
-    "docker", "run", "-d",
-    "--name", "watchtower",
-    "-v", "/var/run/docker.sock:/var/run/docker.sock",
-    "containrrr/watchtower",
-    "--label-enable"
-]
+# Docker Desktop installers and the environment variables that may pin their SHA-256
+DOCKER_DESKTOP_DOWNLOADS = {
+    "Windows": ("https://desktop.docker.com/win/stable/Docker%20Desktop%20Installer.exe", "DockerInstaller.exe",
+                "INSTALLER_DOCKER_WINDOWS_SHA256"),
+    "Darwin": ("https://desktop.docker.com/mac/stable/Docker.dmg", "Docker.dmg", "INSTALLER_DOCKER_MAC_SHA256"),
+}
+
+# Docker Desktop executables whose size and modification time identify the installed version
+DOCKER_DESKTOP_APPS = {
+    "Windows": r"C:\Program Files\Docker\Docker\Docker Desktop.exe",
+    "Darwin": "/Applications/Docker.app/Contents/MacOS/Docker Desktop",
+}
+
+# Name suffixes of the containers of a blue/green update: the new container proving itself on a
+# temporary port, the new container while it takes over the real port, and the old one until then
+CANARY_SUFFIX = "-canary"
+CUTOVER_SUFFIX = "-cutover"
+PREVIOUS_SUFFIX = "-previous"
+
+# Seconds the old container gets to shut down cleanly during a cutover
+STOP_TIMEOUT = 10
+
+# Maximum number of images pulled at the same time during the pre-pull stage
+PULL_CONCURRENCY = 3
+
+# Number of trailing output lines kept in memory per stream for each command
+MAX_CAPTURED_LINES = 2000
+
+# '-e KEY=VALUE' and '--env KEY=VALUE' in a command line; values such as API keys are not logged
+_ENV_OPTION = re.compile(r"(?P<option>(?:^|\s)(?:-e|--env)(?:\s+|=))(?P<key>[^=\s]+)=\S*")
+
+
+def redact_command(command):
+    """
+    Return a command with the values of its '-e KEY=VALUE' options replaced by '***', for logs and traces.
+
+    Args:
+        command (list | str): An argument list or a shell command line.
+
+    Returns:
+        list | str: The same kind of command, safe to write out.
+    """
+    if isinstance(command, str):
+        return _ENV_OPTION.sub(lambda match: f"{match.group('option')}{match.group('key')}=***", command)
+    redacted = list(command)
+    for index, arg in enumerate(redacted):
+        if arg in ("-e", "--env") and index + 1 < len(redacted) and "=" in redacted[index + 1]:
+            redacted[index + 1] = redacted[index + 1].split("=", 1)[0] + "=***"
+        elif arg.startswith("--env=") and "=" in arg[len("--env="):]:
+            redacted[index] = "--env=" + arg[len("--env="):].split("=", 1)[0] + "=***"
+    return redacted
 
 class DockerManager:
-    def __init__(self, log_callback):
+    def __init__(self, log_callback, pull_concurrency=PULL_CONCURRENCY, api_client=None, state_ttl=STATE_TTL,
+                 docker_host=None, docker_context=None, readiness_timeout=READINESS_TIMEOUT, tracer=None,
+                 image_cache=None, download_cache_dir=DOWNLOAD_CACHE_DIR, journal=None, registry_client=None,
+                 snapshot_dir=SNAPSHOT_DIR):
+        """
+        Args:
+            log_callback (callable): Receives log messages and their output mode.
+            pull_concurrency (int): Maximum number of images pulled at the same time.
+            api_client (DockerAPIClient): Optional Engine API client used for status checks
+                instead of spawning 'docker' processes. The CLI is used whenever it fails.
+            state_ttl (float): Seconds the Docker status and container snapshot are reused
+                before the daemon is queried again.
+            docker_host (str): Daemon to manage instead of the local one, e.g. 'ssh://admin@gpu-01'.
+            docker_context (str): Docker CLI context to use instead of the current one.
+            readiness_timeout (float): Seconds a started container may take to serve requests.
+            tracer (Tracer): Records timed spans of steps, status checks and commands.
+            image_cache (ImageCache): Images are loaded from this cache instead of pulled when
+                present, and saved to it after they are pulled.
+            download_cache_dir (str): Directory where downloaded Docker installers are kept for reuse.
+            journal (StepJournal): Records completed install steps, which later runs skip while
+                their fingerprint still matches.
+            registry_client (RegistryClient): Looks up the registry digests of images for updates.
+            snapshot_dir (str): Directory of volume snapshots; the volumes of a container are
+                snapshotted here before a cutover and restored if it is rolled back.
+        """
         self.log_callback = log_callback
+        self.pull_concurrency = pull_concurrency
+        self.api_client = api_client
+        self.state_ttl = state_ttl
+        self.docker_host = docker_host
+        self.docker_context = docker_context
+        # Environment for every command, pointing the docker CLI at the selected daemon
+        self.command_env = dict(os.environ)
+        if docker_host:
+            self.command_env["DOCKER_HOST"] = docker_host
+        if docker_context:
+            self.command_env["DOCKER_CONTEXT"] = docker_context
+        # Optional time.monotonic() value after which running commands are killed
+        self.deadline = None
+        self.readiness_timeout = readiness_timeout
+        self.tracer = tracer or NULL_TRACER
+        self.image_cache = image_cache
+        self.download_cache_dir = download_cache_dir
+        self.journal = journal
+        self.registry_client = registry_client or RegistryClient()
+        self.snapshot_dir = snapshot_dir
+        # Added to every span, so traces of several hosts can be told apart
+        self._trace_attributes = {"host": docker_host or docker_context} if docker_host or docker_context else {}
         self._docker_installed = None
-        self._containers_checked_at = 0
-        self._containers_running = False
+        self._docker_checked_at = 0
+        # Daemon address of docker_context, read from the CLI when first needed
+        self._context_endpoint = None
+        # All containers, fetched in one query and shared by every status check until it expires
+        self.container_state = ContainerStateCache(self._fetch_containers, ttl=state_ttl)
+
+        # Structured log fields of the step running on each thread, and the time span of each step
+        self._step_context = threading.local()
+        self._step_times = {}
+        self._step_times_lock = threading.Lock()
 
         # Track previous states to log only on status change
         self._previous_docker_installed = None
         self._previous_containers_running = None
 
-    def log(self, message, output_mode="both"):
-        """Log a message using the provided callback, with the option to specify output mode."""
-        self.log_callback(message, output_mode=output_mode)
+    def log(self, message, output_mode="both", **fields):
+        """
+        Log a message using the provided callback, with the option to specify output mode.
+
+        Structured fields (step, container, command, duration, returncode) are passed on to the
+        callback together with those of the current step.
+        """
+        fields = {**getattr(self._step_context, "fields", {}), **fields}
+        if fields:
+            self.log_callback(message, output_mode=output_mode, **fields)
+        else:
+            self.log_callback(message, output_mode=output_mode)
+
+    @contextmanager
+    def step(self, name, container=None, **attributes):
+        """
+        Tag every message logged on this thread inside the block with a step and container name,
+        and record the time spent in the step. Extra attributes are only added to the step's trace span.
+        """
+        started_at = time.monotonic()
+        previous = getattr(self._step_context, "fields", {})
+        fields = {"step": name}
+        if container:
+            fields["container"] = container
+        self._step_context.fields = fields
+        try:
+            if container:
+                attributes["container"] = container
+            # The step's own attributes win over the manager's, e.g. a 'host' given by the caller
+            with self.tracer.span(name, category="step", **{**self._trace_attributes, **attributes}):
+                yield
+        finally:
+            self._step_context.fields = previous
+            self._record_step_time(name, container, started_at)
+
+
+    def _record_step_time(self, name, container, started_at, ended_at=None):
+        """Extend the recorded time span of a step, so concurrent runs of it count as wall time."""
+        key = f"{name}:{container}" if container else name
+        ended_at = ended_at if ended_at is not None else time.monotonic()
+        with self._step_times_lock:
+            first_start, last_end = self._step_times.get(key, (started_at, started_at))
+            self._step_times[key] = (min(first_start, started_at), max(last_end, ended_at))
+
+    def step_durations(self):
+        """Return the wall time in seconds spent in each step, keyed by 'step' or 'step:container'."""
+        with self._step_times_lock:
+            return {key: last_end - first_start for key, (first_start, last_end) in self._step_times.items()}
 
+    def _run_command(self, command, check=True, shell=False, output_callback=None, max_lines=MAX_CAPTURED_LINES):
+        """
+        Run a subprocess command, logging its output line by line while it runs.
+
+        Args:
+            command (list | str): The command to run.
+            check (bool): Treat a non-zero return code as a failure.
+            shell (bool): Run the command through the shell.
+            output_callback (callable): Called with each output line as soon as it is read.
+            max_lines (int): Number of trailing lines kept per stream for the returned result.
+
+        Returns:
+            subprocess.CompletedProcess: The result, holding at most max_lines of stdout and stderr.
+        """
+        argv = command.split() if isinstance(command, str) else command
+        with self.tracer.span(" ".join(argv[:2]), category="command", **self._trace_attributes) as span:
+            result = self._execute_command(command, check, shell, output_callback, max_lines, span)
+            span.set(argv=redact_command(command), returncode=result.returncode)
+            return result
 
-    def _run_command(self, command, check=True, shell=False):
-        """Run a subprocess command and log real-time output, returning an empty output if it fails."""
+    def _execute_command(self, command, check, shell, output_callback, max_lines, span):
+        """Body of _run_command; span receives the number of output bytes read."""
+        started_at = time.perf_counter()
+        # Logs, errors and traces get the command without secret values; only Popen sees them
+        safe_command = redact_command(command)
+        command_text = safe_command if isinstance(safe_command, str) else " ".join(safe_command)
         try:
+            popen_kwargs = {}
             # Configure the subprocess based on the platform
             if platform.system() == "Windows":
-                command_process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    shell=shell,
-                    creationflags=subprocess.CREATE_NO_WINDOW  # Suppresses the console window
-                )
-            else:
-                command_process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    shell=shell
-                )
-
-            # Capture stdout and stderr
-            output, error = command_process.communicate()
-
-            # Log stdout and stderr to the log file
-            if output:
-                self.log(f"Command output:\n{output.strip()}", output_mode="file")
-            if error:
-                self.log(f"Command error:\n{error.strip()}", output_mode="file")
+                popen_kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW  # Suppresses the console window
+
+            command_process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                shell=shell,
+                env=self.command_env,
+                **popen_kwargs
+            )
+
+            # Read both streams on helper threads and hand the lines over in arrival order
+            lines = queue.Queue()
+            readers = [
+                threading.Thread(target=self._read_stream, args=(stream, name, lines), daemon=True)
+                for stream, name in ((command_process.stdout, "stdout"), (command_process.stderr, "stderr"))
+            ]
+            for reader in readers:
+                reader.start()
+
+            captured = {"stdout": deque(maxlen=max_lines), "stderr": deque(maxlen=max_lines)}
+            output_bytes = 0
+            count_bytes = self.tracer.enabled
+            open_streams = len(readers)
+            while open_streams:
+                name, line = self._next_line(lines, command_process, safe_command)
+                if line is None:
+                    open_streams -= 1
+                    continue
+
+                if count_bytes:
+                    output_bytes += len(line.encode(errors="replace"))
+                line = line.rstrip("\n")
+                captured[name].append(line)
+                if line.strip():
+                    prefix = "Command output" if name == "stdout" else "Command error"
+                    self.log(f"{prefix}: {line}", output_mode="file")
+                if output_callback:
+                    output_callback(line)
+
+            command_process.wait()
+            span.set(output_bytes=output_bytes)
+            output = "\n".join(captured["stdout"])
+            error = "\n".join(captured["stderr"])
+            duration = time.perf_counter() - started_at
+            self.log(
+                f"Command finished with return code {command_process.returncode} in {duration:.2f}s: {command_text}",
+                output_mode="file", command=command_text, returncode=command_process.returncode,
+                duration=round(duration, 3)
+            )
 
             # Check for command success
             if command_process.returncode != 0 and check:
                 self.log(f"Command failed with return code {command_process.returncode}.", output_mode="file")
-                raise subprocess.CalledProcessError(command_process.returncode, command)
+                raise subprocess.CalledProcessError(command_process.returncode, safe_command, output, error)
             
             # Return the completed process with output and error
             return subprocess.CompletedProcess(command, command_process.returncode, output, error)
         
+        except subprocess.TimeoutExpired as e:
+            self.log(f"Command timed out: {e}", output_mode="both")
+            return subprocess.CompletedProcess(command, 1, "", "")
+
         except subprocess.CalledProcessError as e:
             # Log specific command failure details if check=True
             self.log(f"Command failed with error: {e}", output_mode="file")
-            return subprocess.CompletedProcess(command, e.returncode, "", e.output or "")
+            return subprocess.CompletedProcess(command, e.returncode, "", e.stderr or "")
         
         except Exception as e:
             # Log unexpected errors that occur outside of the subprocess call
             self.log(f"Unexpected error running command: {e}", output_mode="file")
             return subprocess.CompletedProcess(command, 1, "", "")
+
+    def _next_line(self, lines, command_process, command):
+        """Wait for the next output line, killing the process once the deadline has passed."""
+        if self.deadline is None:
+            return lines.get()
+        try:
+            return lines.get(timeout=max(0, self.deadline - time.monotonic()))
+        except queue.Empty:
+            command_process.kill()
+            command_process.wait()
+            raise subprocess.TimeoutExpired(command, 0)
+
+    @staticmethod
+    def _read_stream(stream, name, lines):
+        """Forward every line of a process stream to a queue, followed by a None end marker."""
+        try:
+            for line in stream:
+                lines.put((name, line))
+        finally:
+            stream.close()
+            lines.put((name, None))
+
+    @staticmethod
+    def _pull_output_callback(image, progress_callback):
+        """Build an output callback that reports the layer progress of an image pull."""
+        if progress_callback is None:
+            return None
+        tracker = PullProgressTracker(image)
+
+        def on_output(line):
+            event = tracker.feed(line)
+            if event:
+                progress_callback(event)
+        return on_output
     
     def update_containers(self):
+        """Start watchtower to keep the labelled containers up to date, returning True on success."""
         self.log("Updating Docker containers...", output_mode="both")
-        try:
-            self.run_container(WATCHTOWER_COMMAND)
+        started = self.apply_plan([WATCHTOWER_SPEC]) is not None
+        if started:
             self.log("Containers have update commands executed successfully.", output_mode="both")
-        except subprocess.CalledProcessError as e:
-            self.log(f"Error updating containers: {e}", output_mode="both")
+        return started
 
-    def is_docker_installed(self):
-        """Check if Docker is installed by running 'docker --version'."""
+    def blue_green_update(self, specs, progress_callback=None):
+        """
+        Update containers without restarting them in place.
+
+        Only images whose registry digest differs from the local copy are pulled. Each container
+        whose image or settings changed is replaced with cutover_container(), so a new version that
+        fails to start never takes the old one down. The containers lose their watchtower label, and
+        a watchtower container is removed, since it would restart them in place behind the cutover.
+
+        Args:
+            specs (list): ContainerSpecs of the containers to update, e.g. the flavor's and the pipelines'.
+            progress_callback (callable): Called with a PullProgress event for each layer update.
+
+        Returns:
+            bool: True if every container is up to date and ready.
+        """
+        specs = [without_watchtower(spec) for spec in specs]
+        if self.inspect_container(WATCHTOWER_SPEC.name) is not None:
+            self.log("Removing watchtower, updates now replace the containers with a cutover.", output_mode="both")
+            self.remove_container(WATCHTOWER_SPEC.name)
+
+        self.log("Checking for updated images...", output_mode="both")
+        if self.pull_changed_images([spec.image for spec in specs], progress_callback) is None:
+            return False
+
+        updated = True
+        for spec in specs:
+            action, reason = diff_container(spec, self.inspect_container(spec.name), self.image_id(spec.image))
+            self.log(f"Container '{spec.name}': {reason}.", output_mode="both")
+            if action == SKIP:
+                continue
+            if action == START:
+                started = self.start_container(spec.name)
+            elif action == CREATE:
+                started = self.apply_plan([spec], progress_callback=progress_callback) is not None
+            else:
+                started = self.cutover_container(spec, progress_callback)
+            updated = updated and started
+        return updated
+
+    def cutover_container(self, spec, progress_callback=None):
+        """
+        Replace a running container by a new one with a health-gated cutover.
+
+        The new container first runs next to the old one on a temporary port until it serves
+        requests. Only then is the new container created on the real ports, the old one stopped
+        and the new one started. The ports are closed for about a second, but clients only get
+        answers again once the new container has booted, so the downtime also includes its
+        start-up time. The old container is kept, stopped, until the new one serves requests on
+        the real ports, and is started again if the new one does not start or never gets ready.
+
+        The canary starts on the real volumes and may migrate their data, so the named volumes of
+        the container are snapshotted first and restored whenever the update is rolled back. Data
+        written by the old container between the snapshot and a rollback is lost.
+
+        Args:
+            spec (ContainerSpec): Desired container; a container of the same name must exist.
+            progress_callback (callable): Called with a PullProgress event for each layer update.
+
+        Returns:
+            bool: True if the new container took over and is ready.
+        """
+        # Watchtower must not restart the temporary containers, or the new one after the cutover
+        labelled = with_spec_hash(without_watchtower(spec))
+        canary_name = spec.name + CANARY_SUFFIX
+        cutover_name = spec.name + CUTOVER_SUFFIX
+        previous_name = spec.name + PREVIOUS_SUFFIX
+        with self.step("cutover", container=spec.name):
+            # Left behind by an interrupted update
+            for leftover in (canary_name, cutover_name):
+                if self.inspect_container(leftover) is not None:
+                    self.remove_container(leftover)
+
+            snapshot_id = self._snapshot_volumes(spec)
+            if snapshot_id is None:
+                return False
+
+            # The canary mounts the same volumes, so it starts on the real data (and runs any
+            # migrations) before the old container is touched
+            canary = labelled.with_overrides(name=canary_name, ports=spec.container_ports(), restart=None)
+            started_at = time.monotonic()
+            if not self.run_container(canary, progress_callback) or not self._wait_for_canary(spec, canary_name, started_at):
+                self.remove_container(canary_name)
+                self._restore_volumes(spec, snapshot_id)
+                self.log(f"Kept the running '{spec.name}' container.", output_mode="both")
+                return False
+
+            if not self.create_container(labelled.with_overrides(name=cutover_name)):
+                self.remove_container(canary_name)
+                self._restore_volumes(spec, snapshot_id)
+                return False
+            cutover_started = time.monotonic()
+            self.rename_container(spec.name, previous_name)
+            self.stop_container(previous_name)
+            self.remove_container(canary_name)
+            if not self.start_container(cutover_name):
+                self.log(f"The new '{spec.name}' did not start, restoring the previous container.", output_mode="both")
+                self._restore_previous(spec, cutover_name, snapshot_id)
+                return False
+            started_at = time.monotonic()
+            downtime = started_at - cutover_started
+            self.log(f"Ports of '{spec.name}' switched over in {downtime:.2f}s.", output_mode="both",
+                     duration=round(downtime, 3))
+            self.rename_container(cutover_name, spec.name)
+
+            # The canary was healthy, but the container serving the ports is a new one; keep the
+            # previous container until this one is ready too
+            if not self.wait_until_ready([(spec, started_at)]):
+                self.log(f"The new '{spec.name}' did not get ready, restoring the previous container.", output_mode="both")
+                self._restore_previous(spec, spec.name, snapshot_id)
+                return False
+            self.remove_container(previous_name)
+        return True
+
+    def _restore_previous(self, spec, new_name, snapshot_id):
+        """Remove the new container of a cutover, restore the volumes and put the previous one back on its ports."""
+        self.stop_container(new_name)
+        self.remove_container(new_name)
+        self.rename_container(spec.name + PREVIOUS_SUFFIX, spec.name)
+        self._restore_volumes(spec, snapshot_id)
+        self.start_container(spec.name)
+
+    def _snapshot_volumes(self, spec):
+        """Snapshot the existing named volumes of a container. Returns the snapshot id, or None if one failed."""
+        snapshots = VolumeSnapshots(self, directory=self.snapshot_dir)
+        # Finer than VolumeSnapshots.new_id(), as a rollback may follow a cutover within a second
+        snapshot_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        for volume in spec.named_volumes():
+            if not snapshots.volume_exists(volume):
+                continue
+            try:
+                snapshots.create(volume, snapshot_id)
+            except SnapshotError as e:
+                self.log(f"{e} Not updating '{spec.name}' without a snapshot to roll back to.", output_mode="both")
+                return None
+        return snapshot_id
+
+    def _restore_volumes(self, spec, snapshot_id):
+        """Put the named volumes of a container back to a snapshot taken by _snapshot_volumes()."""
+        snapshots = VolumeSnapshots(self, directory=self.snapshot_dir)
+        for volume in spec.named_volumes():
+            if snapshots.get(volume, snapshot_id) is None:
+                continue
+            try:
+                snapshots.restore(volume, snapshot_id)
+            except SnapshotError as e:
+                self.log(f"{e} The data of '{spec.name}' may have been changed by the new version.", output_mode="both")
+
+    def _wait_for_canary(self, spec, canary_name, started_at):
+        """Wait until the canary serves requests on the host port Docker gave it. Returns True if it does."""
+        container_ports = spec.container_ports()
+        if not container_ports:
+            return True
+        port = self.host_port(canary_name, container_ports[0])
+        if port is None:
+            self.log(f"Could not find the temporary port of '{canary_name}'.", output_mode="both")
+            return False
+        timeout = self.readiness_timeout
+        if self.deadline is not None:
+            timeout = max(0, min(timeout, self.deadline - started_at))
+        prober = ReadinessProber(self, timeout=timeout)
+        target = prober.target_for(canary_name, port, started_at, path=READINESS_PATHS.get(spec.name))
+        if target is None:
+            self.log(f"Cannot tell which machine context '{self.docker_context}' runs on, so the new "
+                     f"'{spec.name}' is not checked before the cutover.", output_mode="both")
+            return True
+        self.log(f"Waiting for the new '{spec.name}' on temporary port {port}...", output_mode="both")
+        with self.tracer.span("ready", category="step", container=canary_name, **self._trace_attributes):
+            result = prober.probe(target)
+        if not result.ready:
+            self.log(result.diagnosis, output_mode="both")
+            return False
+        self.log(f"The new '{spec.name}' is ready after {result.seconds:.1f}s.", output_mode="both")
+        return True
+
+    def setup_containers(self, flavor_spec, progress_callback=None, wait_ready=True, watchtower=True):
+        """
+        Bring the Open WebUI container of a flavor, the pipelines and the watchtower containers to
+        their desired state. Containers that are already up to date are left running, so running
+        the setup again is safe. Only images of containers that have to be created are pulled;
+        newer releases of the images in use are picked up by blue_green_update() or watchtower.
+
+        Args:
+            flavor_spec (ContainerSpec): The open-webui container of the selected flavor.
+            progress_callback (callable): Called with a PullProgress event for each layer update.
+            wait_ready (bool): Wait until the containers serve HTTP requests before returning.
+            watchtower (bool): Start watchtower to update the containers in place. Without it the
+                containers carry no watchtower label, as blue_green_update() creates them.
+
+        Returns:
+            bool: True if every container is up (and ready, if wait_ready is set).
+        """
+        self.log("Setting up containers...", output_mode="both")
+        if watchtower:
+            specs = [flavor_spec, PIPELINES_SPEC, WATCHTOWER_SPEC]
+        else:
+            specs = [without_watchtower(flavor_spec), without_watchtower(PIPELINES_SPEC)]
+        plan = SetupPlan(self, specs)
+        steps = plan.build()
+        # Download the images of the containers to create at the same time, before the first one is run
+        self.pull_images(
+            [step.spec.image for step in steps if step.action in (CREATE, RECREATE)], progress_callback=progress_callback
+        )
+
+        started = self._execute_plan(plan, steps, progress_callback)
+        if started is None:
+            return False
+        if wait_ready:
+            return self.wait_until_ready(started)
+        return True
+
+    def apply_plan(self, specs, progress_callback=None):
+        """
+        Compare containers to their specs and create, recreate or start only those that differ.
+        Containers that do not depend on each other are handled at the same time.
+
+        Args:
+            specs (list): ContainerSpecs to set up.
+            progress_callback (callable): Called with a PullProgress event for each layer update.
+
+        Returns:
+            list | None: (ContainerSpec, time.monotonic() at which it was up) pairs, or None if
+            any container could not be set up.
+        """
+        plan = SetupPlan(self, specs)
+        return self._execute_plan(plan, plan.build(), progress_callback)
+
+    def _execute_plan(self, plan, steps, progress_callback):
+        """Log and carry out the steps of a built SetupPlan, returning what apply_plan() returns."""
+        self.log(f"Setup plan: {format_plan(steps)}", output_mode="both")
+        results = plan.execute(steps, progress_callback=progress_callback)
+        if not all(result.ok for result in results.values()):
+            return None
+        return [(step.spec, results[step.spec.name].started_at) for step in steps]
+
+    def wait_until_ready(self, started):
+        """
+        Wait until the started containers serve requests on their published ports.
+
+        Args:
+            started (list): (ContainerSpec, time.monotonic() at start) pairs of the containers to probe.
+                Containers without a published port are skipped.
+
+        Returns:
+            bool: True if every probed container became ready.
+        """
+        timeout = self.readiness_timeout
+        if self.deadline is not None:
+            # Probe timeouts count from each container's start; the last one started must stop at
+            # the host deadline, and every earlier one stops before it
+            latest = max(started_at for _, started_at in started) if started else time.monotonic()
+            timeout = max(0, min(timeout, self.deadline - latest))
+        prober = ReadinessProber(self, timeout=timeout)
+        targets = []
+        for spec, started_at in started:
+            ports = spec.published_ports()
+            if ports:
+                target = prober.target_for(spec.name, ports[0], started_at)
+                if target is None:
+                    self.log(f"Cannot tell which machine context '{self.docker_context}' runs on, "
+                             "so the containers are not probed over HTTP.", output_mode="both")
+                    return True
+                targets.append(target)
+        if not targets:
+            return True
+
+        self.log("Waiting for the containers to accept requests...", output_mode="both")
+        with self.tracer.span("ready", category="step", **self._trace_attributes):
+            results = prober.probe_all(targets)
+        all_ready = True
+        for target, result in zip(targets, results):
+            # Time to ready counts from the container's start, not from when probing began
+            self._record_step_time("ready", result.container, target.started_at, target.started_at + result.seconds)
+            fields = {"step": "ready", "container": result.container, "duration": round(result.seconds, 3)}
+            if result.ready:
+                self.log(f"Container '{result.container}' is ready after {result.seconds:.1f}s.", output_mode="both", **fields)
+            else:
+                all_ready = False
+                self.log(result.diagnosis, output_mode="both", **fields)
+        return all_ready
+
+    def _query_api(self, query):
+        """
+        Run a query against the Engine API client, if one is configured.
+
+        Returns:
+            tuple: (True, result) on success, (False, None) when the CLI should be used instead.
+        """
+        if self.api_client is None:
+            return False, None
         try:
-            # Run 'docker --version' to verify Docker installation
-            result = self._run_command(['docker', '--version'])
-            # Set current status based on the return code (0 = success)
-            current_status = result.returncode == 0
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            current_status = False
+            return True, query(self.api_client)
+        except DockerAPIError as e:
+            self.log(f"Docker Engine API unavailable, using the docker CLI: {e}", output_mode="file")
+            return False, None
+
+    def _fetch_containers(self):
+        """Fetch every container on the host in a single query, or None if the daemon cannot be reached."""
+        with self.tracer.span("list containers", category="status", **self._trace_attributes):
+            answered, containers = self._query_api(lambda api: api.list_containers(all=True))
+            if answered:
+                return [container_from_api(entry) for entry in containers]
+
+            result = self._run_command(['docker', 'ps', '-a', '--no-trunc', '--format', '{{json .}}'], check=False)
+            if result.returncode != 0:
+                return None
+            containers = []
+            for line in result.stdout.splitlines():
+                try:
+                    containers.append(container_from_cli(json.loads(line)))
+                except ValueError:
+                    self.log(f"Ignoring unexpected 'docker ps' output: {line}", output_mode="file")
+            return containers
+
+    def is_docker_installed(self):
+        """Check if Docker is installed by pinging the daemon or running 'docker --version'."""
+        # Reuse a recent answer, status refreshes ask this several times in a row
+        if self._docker_installed is not None and time.monotonic() - self._docker_checked_at < self.state_ttl:
+            return self._docker_installed
+
+        with self.tracer.span("docker installed", category="status", **self._trace_attributes):
+            answered, current_status = self._query_api(lambda api: api.ping())
+            if not answered or not current_status:
+                try:
+                    # Run 'docker --version' to verify Docker installation
+                    result = self._run_command(['docker', '--version'])
+                    # Set current status based on the return code (0 = success)
+                    current_status = result.returncode == 0
+                except (subprocess.CalledProcessError, FileNotFoundError):
+                    current_status = False
 
         # Log only if the status has changed from the last check
         if current_status != self._previous_docker_installed:
@@ -117,10 +681,127 @@ class DockerManager:
 
         # Cache the current Docker installation status
         self._docker_installed = current_status
+        self._docker_checked_at = time.monotonic()
         return current_status
 
 
 
+    def inspect_container(self, container_name):
+        """
+        Return the low-level information of a container, like 'docker inspect'.
+
+        Returns:
+            dict | None: The details, or None if the container does not exist.
+        """
+        with self.tracer.span("inspect container", category="status", container=container_name, **self._trace_attributes):
+            answered, details = self._query_api(lambda api: api.inspect_container(container_name))
+            if answered:
+                return details
+
+            result = self._run_command(
+                ['docker', 'inspect', '--type', 'container', '--format', '{{json .}}', container_name], check=False
+            )
+            if result.returncode != 0 or not result.stdout.strip():
+                return None
+            try:
+                return json.loads(result.stdout)
+            except ValueError:
+                return None
+
+    def inspect_container_state(self, container_name):
+        """
+        Return the State section of 'docker inspect' for a container (Status, Health, ExitCode, ...).
+
+        Returns:
+            dict | None: The state, or None if the container does not exist.
+        """
+        details = self.inspect_container(container_name)
+        return details.get("State") if details else None
+
+    def image_id(self, image):
+        """Return the ID of a local image, or None if it has not been pulled."""
+        answered, details = self._query_api(lambda api: api.inspect_image(image))
+        if answered:
+            return details.get("Id") if details else None
+
+        result = self._run_command(['docker', 'image', 'inspect', '--format', '{{.Id}}', image], check=False)
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip() or None
+
+    def image_repo_digests(self, image):
+        """Return the registry digests a local image was pulled by ('repo@sha256:...'), empty if it has none."""
+        answered, details = self._query_api(lambda api: api.inspect_image(image))
+        if answered:
+            return (details or {}).get("RepoDigests") or []
+
+        result = self._run_command(['docker', 'image', 'inspect', '--format', '{{json .RepoDigests}}', image], check=False)
+        if result.returncode != 0:
+            return []
+        try:
+            return json.loads(result.stdout) or []
+        except ValueError:
+            return []
+
+    def image_needs_pull(self, image):
+        """
+        Compare the digest of a local image with the one its tag has in the registry.
+
+        Returns:
+            tuple: (True if the image should be pulled, reason). When the registry cannot be
+            asked the image is pulled, leaving the decision to 'docker pull'.
+        """
+        with self.tracer.span("check image", category="status", image=image, **self._trace_attributes):
+            local = {digest.split("@", 1)[1] for digest in self.image_repo_digests(image) if "@" in digest}
+            if not local:
+                return True, "not pulled from a registry yet"
+            try:
+                remote = self.registry_client.remote_digest(image)
+            except RegistryError as e:
+                return True, f"registry check failed ({e})"
+            if remote in local:
+                return False, f"up to date ({remote[:19]})"
+            return True, f"the registry has {remote[:19]}"
+
+    def pull_changed_images(self, images, progress_callback=None):
+        """
+        Pull the images whose registry digest differs from the local copy, checking all of them at once.
+
+        Returns:
+            list | None: The images that were pulled, or None if one of them failed.
+        """
+        images = list(dict.fromkeys(image for image in images if image))
+        if not images:
+            return []
+        with ThreadPoolExecutor(max_workers=len(images)) as executor:
+            checks = list(executor.map(self.image_needs_pull, images))
+
+        changed = []
+        for image, (needs_pull, reason) in zip(images, checks):
+            self.log(f"Image {image}: {reason}.", output_mode="both")
+            if needs_pull:
+                changed.append(image)
+        # A cached archive may be older than the registry's image, so updates always pull
+        results = self.pull_images(changed, progress_callback=progress_callback, use_cache=False)
+        if not all(results.values()):
+            return None
+        return changed
+
+    def host_port(self, container_name, container_port):
+        """Return the host port a container's port is published on, or None if it is not published."""
+        details = self.inspect_container(container_name) or {}
+        key = container_port if "/" in container_port else f"{container_port}/tcp"
+        bindings = ((details.get("NetworkSettings") or {}).get("Ports") or {}).get(key) or []
+        for binding in bindings:
+            if binding.get("HostPort"):
+                return int(binding["HostPort"])
+        return None
+
+    def container_logs_tail(self, container_name, lines=20):
+        """Return the last lines a container wrote to stdout and stderr."""
+        result = self._run_command(['docker', 'logs', '--tail', str(lines), container_name], check=False)
+        return "\n".join(part for part in (result.stdout, result.stderr) if part)
+
     def is_container_present(self, container_name):
         """
         Check if a specific container exists by name.
@@ -136,43 +817,24 @@ class DockerManager:
             self.log(f"Docker is not installed. Cannot check for container '{container_name}'.", output_mode="file")
             return False
 
-        try:
-            # Run a command to check if the container exists
-            result = self._run_command(
-                ['docker', 'ps', '-a', '--filter', f'name={container_name}', '--format', '{{.Names}}']
-            )
-
-            # Check if the output contains the container name
-            container_exists = container_name in result.stdout.strip()
-            if container_exists:
-                self.log(f"Container '{container_name}' is present.", output_mode="file")
-            else:
-                self.log(f"Container '{container_name}' is not present.", output_mode="file")
-            return container_exists
-
-        except subprocess.CalledProcessError as e:
-            self.log(f"Error checking container '{container_name}': {e}", output_mode="both")
-            return False
+        # Look the exact name up in the shared container snapshot
+        container_exists = self.container_state.get(container_name) is not None
+        if container_exists:
+            self.log(f"Container '{container_name}' is present.", output_mode="file")
+        else:
+            self.log(f"Container '{container_name}' is not present.", output_mode="file")
+        return container_exists
         
 
     def are_containers_set_up(self):
-        current_time = time.time()
-        
-        # Limit status check frequency
-        if current_time - self._containers_checked_at < 5:
-            return self._containers_running
-
+        """Check if any container is running, using the shared container snapshot."""
         # Ensure Docker is installed before checking containers
         if not self.is_docker_installed():
             self.log("Docker is not installed. Cannot check container status.", output_mode="both")
             return False
 
         # Check if any containers are running
-        try:
-            result = self._run_command(['docker', 'ps', '-q'])
-            current_containers_running = bool(result.stdout.strip())
-        except subprocess.CalledProcessError:
-            current_containers_running = False
+        current_containers_running = bool(self.container_state.running())
 
         # Log only if container running status has changed
         if current_containers_running != self._previous_containers_running:
@@ -182,71 +844,393 @@ class DockerManager:
                 self.log("No containers are currently set up.", output_mode="both")
             self._previous_containers_running = current_containers_running
 
-        # Update the cached values
-        self._containers_running = current_containers_running
-        self._containers_checked_at = current_time
         return current_containers_running
 
-    def install_docker(self):
+    def install_docker(self, progress_callback=None):
+        """
+        Install Docker for the current platform.
+
+        With a journal, steps completed by an earlier run are verified and skipped, so a rerun or a
+        resume after a crash continues from the first incomplete step.
+
+        Args:
+            progress_callback (callable): Called with each output line of the installation commands.
+
+        Returns:
+            bool: True if every step succeeded or was already done.
+        """
         os_type = platform.system()
-        self.log(f"Starting Docker installation for {os_type}...", output_mode="both")
+        with self.step("install"):
+            self.log(f"Starting Docker installation for {os_type}...", output_mode="both")
+            try:
+                if os_type == "Windows":
+                    installed = self._install_docker_windows(progress_callback)
+                elif os_type == "Darwin":
+                    installed = self._install_docker_mac(progress_callback)
+                elif os_type == "Linux":
+                    installed = self._install_docker_linux(progress_callback)
+                else:
+                    self.log(f"Unsupported OS: {os_type}", output_mode="both")
+                    return False
+                if installed:
+                    self.log("Docker installed successfully.", output_mode="both")
+                else:
+                    self.log(f"Docker installation failed on {os_type}.", output_mode="both")
+                self.reset_docker_status()
+                time.sleep(5)
+                return installed
+            except (subprocess.CalledProcessError, DownloadError) as e:
+                self.log(f"Error installing Docker: {e}", output_mode="both")
+                self.reset_docker_status()
+                return False
+
+    def run_journaled_step(self, name, fingerprint, action):
+        """
+        Run an install step unless the journal shows it completed and its fingerprint still matches.
+
+        Args:
+            name (str): Key of the step in the journal, e.g. 'linux:docker.io'.
+            fingerprint (callable): Returns a string describing what the step leaves behind, such as
+                a package version, or None while that is missing.
+            action (callable): Performs the step and returns True on success.
+
+        Returns:
+            bool: True if the step was skipped or succeeded.
+        """
+        if self.journal is None:
+            return action()
+        recorded = self.journal.get(name)
+        if recorded is not None:
+            current = fingerprint()
+            if current == recorded:
+                self.log(f"Skipping {name}, already done ({current}).", output_mode="both")
+                return True
+            self.log(f"{name} no longer matches the journal ({current or 'missing'}), running it again.", output_mode="both")
+            self._update_journal(lambda journal: journal.forget(name))
+        if not action():
+            return False
+        current = fingerprint()
+        if current is None:
+            self.log(f"{name} finished but could not be verified; it will run again next time.", output_mode="file")
+        else:
+            self._update_journal(lambda journal: journal.record(name, current))
+        return True
+
+    def forget_journal(self):
+        """Forget every journaled install step, so the next install runs them all again."""
+        self._update_journal(lambda journal: journal.forget())
+
+    def _update_journal(self, update):
+        """Apply an update to the journal; if the file cannot be written, warn and go on without the journal."""
+        if self.journal is None:
+            return
         try:
-            if os_type == "Windows":
-                self._install_docker_windows()
-            elif os_type == "Darwin":
-                self._install_docker_mac()
-            elif os_type == "Linux":
-                self._install_docker_linux()
-            else:
-                self.log(f"Unsupported OS: {os_type}", output_mode="both")
-                return
-            self.log("Docker installed successfully.", output_mode="both")
-            self.reset_docker_status()
-            time.sleep(5)
-        except subprocess.CalledProcessError as e:
-            self.log(f"Error installing Docker: {e}", output_mode="both")
-            self.reset_docker_status()
+            update(self.journal)
+        except JournalError as e:
+            self.log(f"{e} Continuing without the journal; every install step will run again next time.", output_mode="both")
+            self.journal = None
+
+    def _run_commands(self, commands, progress_callback=None):
+        """Run commands one after the other, stopping at the first failure. Returns True if all succeeded."""
+        return all(self._run_command(command, output_callback=progress_callback).returncode == 0 for command in commands)
+
+    def _query_command(self, command):
+        """Return the stripped stdout of a successful command, or None."""
+        result = self._run_command(command, check=False)
+        return (result.stdout.strip() or None) if result.returncode == 0 else None
+
+    def _docker_package_version(self):
+        """Fingerprint of the docker.io package: its version while it is installed."""
+        status = self._query_command(["dpkg-query", "-W", "-f=${Status} ${Version}", "docker.io"])
+        if not status or not status.startswith("install ok installed "):
+            return None
+        return status.rsplit(" ", 1)[-1]
+
+    def _docker_service_state(self, query, expected):
+        """Fingerprint of the docker service: 'systemctl <query>' output when it is as expected."""
+        state = self._query_command(["systemctl", query, "docker"])
+        return state if state == expected else None
+
+    @staticmethod
+    def _docker_desktop_fingerprint(os_type):
+        """Fingerprint of Docker Desktop: size and modification time of its executable."""
+        try:
+            stat = os.stat(DOCKER_DESKTOP_APPS[os_type])
+        except OSError:
+            return None
+        return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+    def daemon_version(self):
+        """
+        Return the version of the Docker daemon, asking the daemon itself rather than the local CLI.
+
+        Returns:
+            str | None: The server version, or None if the daemon cannot be reached.
+        """
+        with self.tracer.span("daemon version", category="status", **self._trace_attributes):
+            answered, version = self._query_api(lambda api: api.version())
+            if answered and version:
+                return version.get("Version")
+            return self._query_command(['docker', 'version', '--format', '{{.Server.Version}}'])
+
+    def daemon_endpoint(self):
+        """
+        Return the address of the daemon being managed, e.g. 'ssh://admin@gpu-01' or 'unix:///var/run/docker.sock'.
+
+        Returns:
+            str | None: docker_host, the endpoint of docker_context, '' for the local default
+            daemon, or None if the context's endpoint cannot be read.
+        """
+        if self.docker_host or not self.docker_context:
+            return self.docker_host or ""
+        if self._context_endpoint is None:
+            result = self._run_command(
+                ['docker', 'context', 'inspect', '--format', '{{.Endpoints.docker.Host}}', self.docker_context],
+                check=False
+            )
+            if result.returncode != 0 or not result.stdout.strip():
+                return None
+            self._context_endpoint = result.stdout.strip()
+        return self._context_endpoint
 
     def reset_docker_status(self):
-        self._docker_installed = None 
+        """Forget the cached Docker status and container snapshot after a change to the host."""
+        self._docker_installed = None
+        self.container_state.invalidate()
+
+    def download_installer(self, os_type, progress_callback=None):
+        """
+        Download the Docker Desktop installer for an OS into the download cache.
+
+        An interrupted download resumes where it stopped, and a copy from an earlier run is reused
+        while the server still reports the same ETag.
+
+        Args:
+            os_type (str): 'Windows' or 'Darwin'.
+            progress_callback (callable): Called with a progress line every few megabytes.
+
+        Returns:
+            str: Path of the verified installer.
+
+        Raises:
+            DownloadError: If the download fails or does not match the pinned SHA-256.
+        """
+        url, file_name, checksum_env = DOCKER_DESKTOP_DOWNLOADS[os_type]
+
+        def on_progress(downloaded, total):
+            if total:
+                line = f"Downloaded {downloaded / 1000 ** 2:.1f} of {total / 1000 ** 2:.1f} MB ({downloaded / total:.0%})"
+            else:
+                line = f"Downloaded {downloaded / 1000 ** 2:.1f} MB"
+            self.log(line, output_mode="file")
+            if progress_callback:
+                progress_callback(line)
+
+        with self.step("download"):
+            self.log(f"Downloading {file_name} from {urlparse(url).netloc}...", output_mode="both")
+            downloader = Downloader(self.download_cache_dir, progress_callback=on_progress)
+            path = downloader.download(url, sha256=os.environ.get(checksum_env), file_name=file_name)
+            self.log(f"{file_name} is ready at {path}.", output_mode="both")
+            return path
 
-    def _install_docker_windows(self):
+    def _install_docker_windows(self, progress_callback=None):
         self.log("Installing Docker Desktop for Windows...", output_mode="both")
-        self.log(f"Downloading Docker from desktop.docker.com", output_mode="both")
-        installer_path = "DockerInstaller.exe"
-        docker_url = "https://desktop.docker.com/win/stable/Docker%20Desktop%20Installer.exe"
-        self._run_command(["curl", "-L", "-o", installer_path, docker_url])
-        self.log(f"Executing DockerInstaller.exe", output_mode="both")
-        self._run_command([installer_path, "install"])
-
-    def _install_docker_mac(self):
+
+        def install():
+            installer_path = self.download_installer("Windows", progress_callback)
+            self.log(f"Executing DockerInstaller.exe", output_mode="both")
+            return self._run_commands([[installer_path, "install"]], progress_callback)
+
+        return self.run_journaled_step("windows:docker-desktop", lambda: self._docker_desktop_fingerprint("Windows"), install)
+
+    def _install_docker_mac(self, progress_callback=None):
         self.log("Installing Docker Desktop for macOS...", output_mode="both")
-        dmg_path = "Docker.dmg"
-        docker_url = "https://desktop.docker.com/mac/stable/Docker.dmg"
-        self._run_command(["curl", "-L", "-o", dmg_path, docker_url])
-        self._run_command(["hdiutil", "attach", dmg_path])
-        self._run_command(["cp", "-r", "/Volumes/Docker/Docker.app", "/Applications"])
-        self._run_command(["hdiutil", "detach", "/Volumes/Docker"])
-
-    def _install_docker_linux(self):
+
+        def install():
+            dmg_path = self.download_installer("Darwin", progress_callback)
+            return self._run_commands([
+                ["hdiutil", "attach", dmg_path],
+                ["cp", "-r", "/Volumes/Docker/Docker.app", "/Applications"],
+                ["hdiutil", "detach", "/Volumes/Docker"],
+            ], progress_callback)
+
+        return self.run_journaled_step("darwin:docker-desktop", lambda: self._docker_desktop_fingerprint("Darwin"), install)
+
+    def _install_docker_linux(self, progress_callback=None):
         self.log("Installing Docker for Linux...", output_mode="both")
-        try:
-            self._run_command(["sudo", "apt-get", "update", "-qq"])
-            self._run_command(["sudo", "apt-get", "install", "-y", "docker.io"])
-            self._run_command(["sudo", "systemctl", "start", "docker"])
-            self._run_command(["sudo", "systemctl", "enable", "docker"])
-        except subprocess.CalledProcessError:
-            self.log("Docker installation failed on Linux.", output_mode="both")
-
-    def run_container(self, command):
-        self.log("Running specified Docker container...", output_mode="both")
-        self.log("This could take a few minutes to download the image.", output_mode="both")
-        try:
-            result = self._run_command(command, shell=True)
+        # (journal key, fingerprint, commands); each step is verified and skipped on a rerun
+        steps = [
+            ("linux:docker.io", self._docker_package_version, [
+                ["sudo", "apt-get", "update", "-qq"],
+                ["sudo", "apt-get", "install", "-y", "docker.io"],
+            ]),
+            ("linux:docker-started", lambda: self._docker_service_state("is-active", "active"), [
+                ["sudo", "systemctl", "start", "docker"],
+            ]),
+            ("linux:docker-enabled", lambda: self._docker_service_state("is-enabled", "enabled"), [
+                ["sudo", "systemctl", "enable", "docker"],
+            ]),
+        ]
+        for name, fingerprint, commands in steps:
+            run = lambda commands=commands: self._run_commands(commands, progress_callback)
+            if not self.run_journaled_step(name, fingerprint, run):
+                return False
+        return True
+
+    def pull_image(self, image, progress_callback=None, use_cache=True):
+        """Pull a single image, returning True if it is available locally afterwards."""
+        if use_cache and self.image_cache is not None and self.load_cached_image(image):
+            return True
+
+        with self.step("pull", image=image):
+            self.log(f"Pulling image {image}...", output_mode="both")
+            result = self._run_command(
+                ['docker', 'pull', image], output_callback=self._pull_output_callback(image, progress_callback)
+            )
+            if result.returncode != 0:
+                self.log(f"Failed to pull image {image}.", output_mode="both")
+                return False
+            self.log(f"Image {image} is ready.", output_mode="both")
+
+        if self.image_cache is not None:
+            self.cache_image(image)
+        return True
+
+    def load_cached_image(self, image):
+        """Load an image from the image cache, returning True if it is available locally afterwards."""
+        # Already loaded, e.g. by an earlier setup: skip re-importing the archive
+        cached_digest = self.image_cache.lookup(image)
+        if cached_digest is None:
+            return False
+        if self.image_id(image) == cached_digest:
+            self.log(f"Image {image} is already loaded from the image cache.", output_mode="file")
+            return True
+        with self.step("load", image=image):
+            started_at = time.monotonic()
+            try:
+                digest = self.image_cache.load(image, env=self.command_env)
+            except ImageCacheError as e:
+                self.log(f"{e} Pulling it instead.", output_mode="both")
+                return False
+            if digest is None:
+                return False
+            # The image ID is the digest of the image's config, which Docker checked against the layers
+            if self.image_id(image) != digest:
+                self.log(f"Cached image {image} did not load as {digest}, pulling it instead.", output_mode="both")
+                return False
+            self.log(f"Loaded image {image} from the image cache in {time.monotonic() - started_at:.1f}s.",
+                     output_mode="both")
+            return True
+
+    def cache_image(self, image):
+        """Save a local image to the image cache, returning True if it is cached afterwards."""
+        with self.step("save", image=image):
+            digest = self.image_id(image)
+            if digest is None:
+                return False
+            try:
+                if self.image_cache.store(image, digest, env=self.command_env):
+                    self.log(f"Saved image {image} to the image cache.", output_mode="both")
+                return True
+            except ImageCacheError as e:
+                self.log(str(e), output_mode="both")
+                return False
+
+    def pull_images(self, images, progress_callback=None, use_cache=True):
+        """
+        Pull several images at the same time before any container is started.
+
+        Args:
+            images (list): Image names to pull. Duplicates and empty entries are ignored.
+            progress_callback (callable): Called with a PullProgress event for each layer update.
+            use_cache (bool): Load images found in the image cache instead of pulling them.
+
+        Returns:
+            dict: Maps each image to True if it was pulled successfully, False otherwise.
+        """
+        images = list(dict.fromkeys(image for image in images if image))
+        if not images:
+            return {}
+
+        workers = max(1, min(self.pull_concurrency, len(images)))
+        self.log(f"Pulling {len(images)} images ({workers} at a time)...", output_mode="both")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pulled = executor.map(lambda image: self.pull_image(image, progress_callback, use_cache), images)
+            results = dict(zip(images, pulled))
+
+        # A failed pull is not fatal here, 'docker run' will try to pull the image again
+        return results
+
+    def start_container(self, container_name):
+        """Start an existing stopped container, returning True on success."""
+        with self.step("start", container=container_name):
+            result = self._run_command(['docker', 'start', container_name])
+            self.container_state.invalidate()
             if result.returncode == 0:
-                self.log("Container started successfully.", output_mode="both")
-            else:
+                self.log(f"Container '{container_name}' started.", output_mode="both")
+                return True
+            self.log(f"Failed to start container '{container_name}'.", output_mode="both")
+            return False
+
+    def stop_container(self, container_name):
+        """Stop a running container, giving it STOP_TIMEOUT seconds to shut down. Returns True on success."""
+        with self.step("stop", container=container_name):
+            result = self._run_command(['docker', 'stop', '--time', str(STOP_TIMEOUT), container_name])
+            self.container_state.invalidate()
+            return result.returncode == 0
+
+    def rename_container(self, container_name, new_name):
+        """Rename a container, returning True on success."""
+        result = self._run_command(['docker', 'rename', container_name, new_name])
+        self.container_state.invalidate()
+        return result.returncode == 0
+
+    def create_container(self, spec):
+        """Create a container without starting it, returning True on success."""
+        with self.step("create", container=spec.name):
+            # Same arguments as the "docker run -d" command line, without its first three words
+            result = self._run_command(['docker', 'create'] + spec.to_argv()[3:])
+            self.container_state.invalidate()
+            if result.returncode == 0:
+                return True
+            self.log(f"Failed to create container '{spec.name}'.", output_mode="both")
+            return False
+
+    def remove_container(self, container_name):
+        """Stop and remove a container, keeping its volumes. Returns True on success."""
+        with self.step("remove", container=container_name):
+            result = self._run_command(['docker', 'rm', '-f', container_name])
+            self.container_state.invalidate()
+            if result.returncode == 0:
+                self.log(f"Container '{container_name}' removed.", output_mode="both")
+                return True
+            self.log(f"Failed to remove container '{container_name}'.", output_mode="both")
+            return False
+
+    def run_container(self, spec, progress_callback=None):
+        """
+        Run a container, reporting the progress of any image download it triggers.
+
+        Args:
+            spec (ContainerSpec): The container to run.
+            progress_callback (callable): Called with a PullProgress event for each layer update.
+
+        Returns:
+            bool: True if the container was started.
+        """
+        with self.step("run", container=spec.name):
+            self.log("Running specified Docker container...", output_mode="both")
+            self.log("This could take a few minutes to download the image.", output_mode="both")
+            try:
+                output_callback = self._pull_output_callback(spec.image, progress_callback)
+                result = self._run_command(spec.to_argv(), output_callback=output_callback)
+                # The container list changed (or a half-created container was left behind)
+                self.container_state.invalidate()
+                if result.returncode == 0:
+                    self.log("Container started successfully.", output_mode="both")
+                    return True
                 self.log("Failed to start container.", output_mode="both")
                 self.log("Please make sure you started docker and signed in.", output_mode="both")
-        except subprocess.CalledProcessError as e:
-            self.log(f"Error starting container: {e}", output_mode="both")
+            except subprocess.CalledProcessError as e:
+                self.log(f"Error starting container: {e}", output_mode="both")
+            return False
@@ -0,0 +1,332 @@
+# helpers/downloader.py
+
+import hashlib
+import http.client
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+
+# Directory of downloaded installers, reused as long as the server reports the same ETag
+DOWNLOAD_CACHE_ENV = "INSTALLER_DOWNLOAD_CACHE"
+DOWNLOAD_CACHE_DIR = "./downloads"
+
+# Bytes read from the network at a time
+CHUNK_SIZE = 1024 * 1024
+
+# Ranged requests made at the same time for one large file
+PARALLEL_CHUNKS = 4
+
+# Files smaller than this are downloaded in a single request
+MIN_PARALLEL_SIZE = 64 * 1024 * 1024
+
+# Seconds to wait for the server before a request fails
+DOWNLOAD_TIMEOUT = 30
+
+# Attempts per request (or per chunk) before the download fails; each resumes where the last stopped
+MAX_ATTEMPTS = 3
+
+# Bytes downloaded between two progress reports
+PROGRESS_STEP = 8 * 1024 * 1024
+
+META_FILE = "meta.json"
+
+
+class DownloadError(Exception):
+    """Raised when a file cannot be downloaded or fails its checksum."""
+
+
+def _hash_file(path, sha256=None, end=None):
+    """Feed a file (or its first end bytes) into a SHA-256 hash and return the hash."""
+    sha256 = sha256 or hashlib.sha256()
+    remaining = end
+    with open(path, "rb") as stream:
+        while remaining is None or remaining > 0:
+            chunk = stream.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            sha256.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return sha256
+
+
+class Downloader:
+    """
+    Downloads files over HTTP(S) into a persistent cache directory.
+
+    Each URL and ETag gets a directory of its own holding the file and a meta.json. An interrupted
+    download keeps its '.part' file and, when its checksum is pinned, continues with a Range request.
+    Large files are fetched in parallel ranges, and every file is checked against its SHA-256
+    before it is handed out.
+    """
+
+    def __init__(self, cache_dir=DOWNLOAD_CACHE_DIR, parallel_chunks=PARALLEL_CHUNKS, progress_callback=None,
+                 timeout=DOWNLOAD_TIMEOUT, min_parallel_size=MIN_PARALLEL_SIZE):
+        """
+        Args:
+            cache_dir (str): Directory of the download cache.
+            parallel_chunks (int): Ranged requests made at the same time for large files; 1 disables them.
+            progress_callback (callable): Called with (bytes downloaded, total bytes or None) as data arrives.
+            timeout (float): Socket timeout of every request in seconds.
+            min_parallel_size (int): Smallest file size fetched in parallel ranges.
+        """
+        self.cache_dir = cache_dir
+        self.parallel_chunks = parallel_chunks
+        self.progress_callback = progress_callback
+        self.timeout = timeout
+        self.min_parallel_size = min_parallel_size
+        self._progress_lock = threading.Lock()
+        self._downloaded = 0
+        self._reported = 0
+        self._total = None
+
+    def download(self, url, sha256=None, file_name=None):
+        """
+        Return the path of a cached copy of url, downloading or resuming it as needed.
+
+        When the server cannot be reached, the most recent complete download of the URL is used.
+        A download left unfinished by an earlier run is only resumed when sha256 is given, as
+        nothing else could tell a resumed file from a damaged one; otherwise it starts over.
+
+        Args:
+            url (str): The file to download.
+            sha256 (str): Expected SHA-256 in hex. Without it the file is still hashed, and a cached
+                copy is checked against the hash recorded when it was downloaded.
+            file_name (str): Name of the file in the cache, defaults to the last part of the URL.
+
+        Returns:
+            str: Path of the verified file.
+
+        Raises:
+            DownloadError: If the download fails or the file does not match its checksum.
+        """
+        file_name = file_name or os.path.basename(unquote(urlparse(url).path)) or "download"
+        try:
+            size, etag, accepts_ranges = self._probe(url)
+        except DownloadError:
+            # Offline or the server is down: an installer downloaded earlier still serves
+            path = self._latest_complete(url, file_name, sha256)
+            if path is None:
+                raise
+            return path
+        key = hashlib.sha256(f"{url}\0{etag or ''}".encode()).hexdigest()[:16]
+        entry_dir = os.path.join(self.cache_dir, key)
+        path = os.path.join(entry_dir, file_name)
+        meta_path = os.path.join(entry_dir, META_FILE)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        meta = self._read_meta(meta_path)
+        if meta.get("complete") and os.path.exists(path) and (size is None or meta.get("size") == size):
+            if self._verify(path, meta, sha256):
+                return path
+            # A damaged or unexpected cached copy is downloaded again
+            os.remove(path)
+            meta = {}
+
+        meta.update({"url": url, "etag": etag, "size": size, "complete": False})
+        part_path = path + ".part"
+        if sha256 is None and os.path.exists(part_path):
+            os.remove(part_path)
+            meta.pop("chunks", None)
+        if accepts_ranges and size and size >= self.min_parallel_size and self.parallel_chunks > 1:
+            digest = self._download_ranges(url, etag, size, part_path, meta, meta_path)
+        else:
+            digest = self._download_stream(url, etag, size, accepts_ranges, part_path)
+
+        if sha256 and digest != sha256.lower():
+            os.remove(part_path)
+            self._write_meta(meta_path, {})
+            raise DownloadError(f"Checksum mismatch for {url}: expected {sha256.lower()}, got {digest}.")
+        os.replace(part_path, path)
+        meta.update({"size": os.path.getsize(path), "sha256": digest, "complete": True})
+        meta.pop("chunks", None)
+        self._write_meta(meta_path, meta)
+        return path
+
+    def _verify(self, path, meta, sha256):
+        """Return True if a complete cached file matches its recorded hash and the expected one."""
+        actual = _hash_file(path).hexdigest()
+        if actual != meta.get("sha256") or (sha256 is not None and actual != sha256.lower()):
+            return False
+        self._report(meta["size"], meta["size"], force=True)
+        return True
+
+    def _latest_complete(self, url, file_name, sha256):
+        """Return the most recently completed, still intact cached copy of url, or None."""
+        try:
+            entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)]
+        except OSError:
+            return None
+        candidates = []
+        for entry_dir in entries:
+            meta_path = os.path.join(entry_dir, META_FILE)
+            meta = self._read_meta(meta_path)
+            path = os.path.join(entry_dir, file_name)
+            if meta.get("url") == url and meta.get("complete") and os.path.exists(path):
+                candidates.append((os.path.getmtime(meta_path), path, meta))
+        for _, path, meta in sorted(candidates, key=lambda candidate: candidate[0], reverse=True):
+            if self._verify(path, meta, sha256):
+                return path
+        return None
+
+    def _probe(self, url):
+        """Return (size, ETag, accepts ranges) from a HEAD request, or (None, None, False) if HEAD is refused."""
+        request = urllib.request.Request(url, method="HEAD")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                length = response.headers.get("Content-Length")
+                return (
+                    int(length) if length and length.isdigit() else None,
+                    response.headers.get("ETag"),
+                    response.headers.get("Accept-Ranges", "").lower() == "bytes",
+                )
+        except urllib.error.HTTPError as e:
+            if e.code in (403, 405, 501):
+                return None, None, False
+            raise DownloadError(f"Could not download {url}: HTTP {e.code}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise DownloadError(f"Could not download {url}: {getattr(e, 'reason', e)}") from e
+
+    def _open(self, url, etag, start=0, end=None):
+        """Open a GET request, ranged from start (to end, inclusive) when either is set."""
+        headers = {}
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+            if etag:
+                # The server sends the whole file instead of a range if it changed in between
+                headers["If-Range"] = etag
+        return urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout)
+
+    def _download_stream(self, url, etag, size, accepts_ranges, part_path):
+        """Download in one request, resuming an existing .part file, and return the SHA-256 in hex."""
+        offset = os.path.getsize(part_path) if accepts_ranges and os.path.exists(part_path) else 0
+        if size is not None and offset > size:
+            offset = 0
+        self._start_progress(size, offset)
+
+        for attempt in range(MAX_ATTEMPTS):
+            if size is not None and offset == size:
+                # Finished earlier but not yet moved into place
+                return _hash_file(part_path).hexdigest()
+            try:
+                with self._open(url, etag, start=offset) as response:
+                    if response.status != 206:
+                        # A whole file: the server ignored the range, or the file changed since the HEAD
+                        # request and If-Range no longer matched. Start over with its current size.
+                        length = response.headers.get("Content-Length")
+                        size = int(length) if length and length.isdigit() else None
+                        etag = response.headers.get("ETag") or etag
+                        offset = 0
+                        self._start_progress(size, 0)
+                    sha256 = _hash_file(part_path, end=offset) if offset else hashlib.sha256()
+                    with open(part_path, "ab" if offset else "wb") as part:
+                        for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                            part.write(chunk)
+                            sha256.update(chunk)
+                            offset += len(chunk)
+                            self._add_progress(len(chunk))
+                if size is not None and offset < size:
+                    raise DownloadError(f"Connection closed after {offset} of {size} bytes")
+                return sha256.hexdigest()
+            except (urllib.error.URLError, http.client.HTTPException, OSError, DownloadError) as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise DownloadError(f"Could not download {url}: {getattr(e, 'reason', e)}") from e
+                offset = os.path.getsize(part_path) if accepts_ranges and os.path.exists(part_path) else 0
+
+    def _download_ranges(self, url, etag, size, part_path, meta, meta_path):
+        """Download a large file in parallel ranges, resuming unfinished ones, and return the SHA-256 in hex."""
+        chunk_size = -(-size // self.parallel_chunks)
+        ranges = [(start, min(start + chunk_size, size) - 1) for start in range(0, size, chunk_size)]
+        # Bytes of each range known to be on disk, kept in meta.json so an interrupted download
+        # resumes every range. A range's count only grows once its bytes have been synced, so a
+        # crash never leaves the record ahead of the file.
+        flushed = meta.get("chunks") if os.path.exists(part_path) else None
+        if not isinstance(flushed, list) or len(flushed) != len(ranges):
+            flushed = [0] * len(ranges)
+            with open(part_path, "wb") as part:
+                part.truncate(size)
+        meta["chunks"] = flushed
+        # Bytes of each range written by this run, where a retry continues
+        done = list(flushed)
+        meta_lock = threading.Lock()
+        self._start_progress(size, sum(done))
+
+        def fetch(index):
+            start, end = ranges[index]
+            for attempt in range(MAX_ATTEMPTS):
+                position = start + done[index]
+                if position > end:
+                    return
+                try:
+                    with self._open(url, etag, start=position, end=end) as response, open(part_path, "r+b") as part:
+                        if response.status != 206:
+                            if etag and response.headers.get("ETag") not in (None, etag):
+                                raise DownloadError("the file changed on the server during the download")
+                            raise DownloadError("the server ignored the range request")
+                        part.seek(position)
+                        saved = position
+                        for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                            part.write(chunk[:end + 1 - position])
+                            position += len(chunk)
+                            self._add_progress(len(chunk))
+                            done[index] = position - start
+                            # Save progress now and then; after a crash at most that much is fetched again
+                            if position - saved >= PROGRESS_STEP or position > end:
+                                part.flush()
+                                os.fsync(part.fileno())
+                                saved = position
+                                with meta_lock:
+                                    flushed[index] = min(position, end + 1) - start
+                                    self._write_meta(meta_path, meta)
+                    if position <= end:
+                        raise DownloadError(f"range {start}-{end} ended at {position}")
+                    return
+                except (urllib.error.URLError, http.client.HTTPException, OSError, DownloadError) as e:
+                    if attempt == MAX_ATTEMPTS - 1:
+                        raise DownloadError(f"Could not download {url}: {getattr(e, 'reason', e)}") from e
+
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            list(executor.map(fetch, range(len(ranges))))
+        # Ranges arrive out of order, so the file is hashed once it is complete
+        return _hash_file(part_path).hexdigest()
+
+    def _start_progress(self, total, downloaded):
+        with self._progress_lock:
+            self._total = total
+            self._downloaded = downloaded
+            self._reported = downloaded
+
+    def _add_progress(self, count):
+        with self._progress_lock:
+            self._downloaded += count
+            downloaded, total = self._downloaded, self._total
+        self._report(downloaded, total)
+
+    def _report(self, downloaded, total, force=False):
+        """Call the progress callback at most once per PROGRESS_STEP bytes, and at the end."""
+        if self.progress_callback is None:
+            return
+        with self._progress_lock:
+            if not force and downloaded - self._reported < PROGRESS_STEP and downloaded != total:
+                return
+            self._reported = downloaded
+        self.progress_callback(downloaded, total)
+
+    @staticmethod
+    def _read_meta(meta_path):
+        try:
+            with open(meta_path, encoding="utf-8") as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_meta(meta_path, meta):
+        temporary_path = meta_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(temporary_path, meta_path)
@@ -0,0 +1,126 @@
+# helpers/file_log.py
+
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_DIR = "./logs"
+
+# Set to "json" to write JSON lines instead of plain text
+LOG_FORMAT_ENV = "INSTALLER_LOG_FORMAT"
+
+# Size at which a log file is rotated, and how many rotated files are kept per run
+MAX_LOG_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 3
+
+# Log files from earlier runs are deleted once they are older than this or beyond this count
+RETENTION_DAYS = 30
+MAX_LOG_FILES = 50
+
+# Structured fields copied into JSON log lines when a message carries them
+STRUCTURED_FIELDS = ("host", "step", "container", "command", "duration", "returncode")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        return json.dumps(entry, default=str)
+
+
+def new_log_file_path(log_dir=LOG_DIR, json_lines=False):
+    """Return a timestamped log file path inside log_dir, creating the directory if needed."""
+    os.makedirs(log_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    extension = "jsonl" if json_lines else "log"
+    return os.path.join(log_dir, f"installer_{timestamp}.{extension}")
+
+
+def prune_logs(log_dir=LOG_DIR, retention_days=RETENTION_DAYS, max_files=MAX_LOG_FILES):
+    """
+    Delete installer log files older than retention_days, then the oldest beyond max_files.
+
+    Returns:
+        list: Paths of the deleted files.
+    """
+    paths = glob.glob(os.path.join(log_dir, "installer_*.log*")) + glob.glob(os.path.join(log_dir, "installer_*.jsonl*"))
+    paths.sort(key=os.path.getmtime, reverse=True)
+    cutoff = time.time() - retention_days * 86400
+
+    deleted = []
+    for index, path in enumerate(paths):
+        if index >= max_files or os.path.getmtime(path) < cutoff:
+            try:
+                os.remove(path)
+                deleted.append(path)
+            except OSError:
+                pass
+    return deleted
+
+
+class FileLogWriter:
+    """Writes log records to a size-rotated file from a background thread."""
+
+    def __init__(self, log_file_path, json_lines=False, max_bytes=MAX_LOG_BYTES, backup_count=BACKUP_COUNT):
+        """
+        Args:
+            log_file_path (str): Path of the log file.
+            json_lines (bool): Write JSON lines with structured fields instead of plain text.
+            max_bytes (int): Size at which the file is rotated.
+            backup_count (int): Number of rotated files kept.
+        """
+        self.log_file_path = log_file_path
+        self._handler = RotatingFileHandler(
+            log_file_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        if json_lines:
+            self._handler.setFormatter(JsonLinesFormatter())
+        else:
+            self._handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+
+        # Callers only enqueue records, the listener thread does the disk I/O
+        self._queue = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, self._handler)
+        self._logger = logging.getLogger(f"installer.file.{id(self)}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.addHandler(QueueHandler(self._queue))
+        self._listener.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    def write(self, message, level=logging.INFO, **fields):
+        """
+        Queue a message for the log file.
+
+        Args:
+            message (str): The message.
+            level (int): The logging level.
+            **fields: Structured fields such as step, container, command, duration and returncode.
+        """
+        self._logger.log(level, message, extra=fields or None)
+
+    def close(self):
+        """Flush queued records and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.stop()
+        self._handler.close()
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
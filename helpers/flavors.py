@@ -0,0 +1,153 @@
+# helpers/flavors.py
+
+import json
+import os
+import re
+from dataclasses import replace
+
+from .container_spec import ContainerSpec
+
+# User file with extra flavors and tuning of the built-in ones
+FLAVORS_FILE_ENV = "INSTALLER_FLAVORS_FILE"
+DEFAULT_FLAVORS_FILE = "./flavors.json"
+
+OPEN_WEBUI_VOLUME = "open-webui:/app/backend/data"
+OLLAMA_VOLUME = "ollama:/root/.ollama"
+HOST_GATEWAY = "host.docker.internal:host-gateway"
+WATCHTOWER_LABELS = {"com.centurylinklabs.watchtower.enable": "true"}
+
+
+def _open_webui(image_tag, **settings):
+    """Spec of the open-webui container shared by all flavors."""
+    return ContainerSpec(
+        name="open-webui",
+        image=f"ghcr.io/open-webui/open-webui:{image_tag}",
+        ports=["3000:8080"],
+        restart="always",
+        labels=dict(WATCHTOWER_LABELS),
+        **settings
+    )
+
+
+# Container spec for each Open WebUI flavor, kept free of GUI imports so the CLI can use it
+FLAVOR_OPTIONS = {
+    "Default (Ollama Local)": _open_webui("main", extra_hosts=[HOST_GATEWAY], volumes=[OPEN_WEBUI_VOLUME]),
+    "Ollama Remote": _open_webui("main", env={"OLLAMA_BASE_URL": "https://example.com"}, volumes=[OPEN_WEBUI_VOLUME]),
+    "Nvidia GPU Support": _open_webui("cuda", gpus="all", extra_hosts=[HOST_GATEWAY], volumes=[OPEN_WEBUI_VOLUME]),
+    "OpenAI API Only": _open_webui("main", env={"OPENAI_API_KEY": "your_secret_key"}, volumes=[OPEN_WEBUI_VOLUME]),
+    "Bundled Ollama with GPU": _open_webui("ollama", gpus="all", volumes=[OLLAMA_VOLUME, OPEN_WEBUI_VOLUME]),
+    "Bundled Ollama CPU Only": _open_webui("ollama", volumes=[OLLAMA_VOLUME, OPEN_WEBUI_VOLUME])
+}
+
+# Descriptions for each option
+FLAVOR_DESCRIPTIONS = {
+    "Default (Ollama Local)": "Use this option if Ollama is installed locally on your machine.",
+    "Ollama Remote": "Connect to Ollama on a different server by setting OLLAMA_BASE_URL.",
+    "Nvidia GPU Support": "Enable GPU support for accelerated performance on Nvidia hardware.",
+    "OpenAI API Only": "Run Open WebUI with only OpenAI API support, providing your API key.",
+    "Bundled Ollama with GPU": "Install a bundled setup with Ollama, optimized for GPU usage.",
+    "Bundled Ollama CPU Only": "Install a bundled setup with Ollama, running on CPU only."
+}
+
+# Containers started next to every flavor
+PIPELINES_SPEC = ContainerSpec(
+    name="pipelines",
+    image="ghcr.io/open-webui/pipelines:main",
+    ports=["9099:9099"],
+    extra_hosts=[HOST_GATEWAY],
+    volumes=["pipelines:/app/pipelines"],
+    restart="always",
+    labels=dict(WATCHTOWER_LABELS)
+)
+
+WATCHTOWER_SPEC = ContainerSpec(
+    name="watchtower",
+    image="containrrr/watchtower",
+    volumes=["/var/run/docker.sock:/var/run/docker.sock"],
+    command=["--label-enable"],
+    depends_on=["open-webui", "pipelines"]
+)
+
+
+def without_watchtower(spec):
+    """Return a copy of a spec without the label that lets watchtower replace the container in place."""
+    return replace(spec, labels={key: value for key, value in spec.labels.items() if key not in WATCHTOWER_LABELS})
+
+
+def flavor_slug(flavor):
+    """Return a command-line friendly name for a flavor, e.g. 'bundled-ollama-cpu-only'."""
+    return re.sub(r"[^a-z0-9]+", "-", flavor.lower()).strip("-")
+
+
+def find_flavor(name, flavors=None):
+    """
+    Look a flavor up by its display name or slug, ignoring case.
+
+    Args:
+        name (str): Display name or slug.
+        flavors (dict): Flavor table to search, defaults to the built-in flavors.
+
+    Returns:
+        str | None: The display name of the flavor, or None if there is no match.
+    """
+    for flavor in flavors if flavors is not None else FLAVOR_OPTIONS:
+        if name.lower() in (flavor.lower(), flavor_slug(flavor)):
+            return flavor
+    return None
+
+
+def load_flavors(path=None):
+    """
+    Return the built-in flavors merged with those of a user flavors file.
+
+    The file is a JSON object with a "flavors" object mapping display names to settings.
+    An entry with a "base" takes that flavor's spec and applies its settings on top, which
+    is how built-in flavors are tuned; an entry without one is a complete container spec.
+    Each entry may carry a "description". For example:
+
+        {"flavors": {"Bundled Ollama with GPU": {"base": "Bundled Ollama with GPU",
+                                                 "shm_size": "2g", "ollama_num_parallel": 4}}}
+
+    Args:
+        path (str): The flavors file. Defaults to $INSTALLER_FLAVORS_FILE, then ./flavors.json.
+            A missing default file is ignored.
+
+    Returns:
+        tuple: (flavors, descriptions) dicts keyed by display name.
+
+    Raises:
+        ValueError: If the file is malformed or an entry is invalid.
+    """
+    flavors = dict(FLAVOR_OPTIONS)
+    descriptions = dict(FLAVOR_DESCRIPTIONS)
+
+    explicit = path or os.environ.get(FLAVORS_FILE_ENV)
+    path = explicit or DEFAULT_FLAVORS_FILE
+    if not os.path.exists(path):
+        if explicit:
+            raise ValueError(f"Flavors file '{path}' does not exist.")
+        return flavors, descriptions
+
+    try:
+        with open(path, encoding="utf-8") as flavors_file:
+            entries = json.load(flavors_file).get("flavors", {})
+    except (OSError, ValueError, AttributeError) as e:
+        raise ValueError(f"Could not read flavors file '{path}': {e}") from e
+
+    for flavor, settings in entries.items():
+        settings = dict(settings)
+        description = settings.pop("description", None)
+        base_name = settings.pop("base", None)
+        try:
+            if base_name:
+                base = find_flavor(base_name, flavors)
+                if base is None:
+                    raise ValueError(f"unknown base flavor '{base_name}'")
+                flavors[flavor] = flavors[base].with_overrides(**settings)
+                description = description or descriptions.get(base, "")
+            else:
+                flavors[flavor] = ContainerSpec.from_dict(settings)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid flavor '{flavor}' in '{path}': {e}") from e
+        descriptions[flavor] = description or descriptions.get(flavor, "")
+    return flavors, descriptions
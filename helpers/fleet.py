@@ -0,0 +1,182 @@
+# helpers/fleet.py
+
+import json
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .docker_api import DockerAPIClient
+from .docker_manager import DockerManager
+from .flavors import FLAVOR_OPTIONS, find_flavor
+
+# Number of hosts provisioned at the same time
+FLEET_PARALLELISM = 8
+
+# Seconds allowed for the whole setup of one host
+HOST_TIMEOUT = 1800
+
+# One machine of the inventory. Either docker_host (e.g. 'ssh://admin@gpu-01', 'tcp://10.0.0.5:2375')
+# or context (a 'docker context' name) selects the daemon; with neither the local daemon is used.
+# spec is the flavor's container spec with the host's tuning applied.
+FleetHost = namedtuple("FleetHost", ["name", "flavor", "docker_host", "context", "spec"])
+
+# Outcome of provisioning one host. steps maps step names to wall time in seconds.
+HostResult = namedtuple("HostResult", ["host", "ok", "error", "duration", "steps"])
+
+
+def load_inventory(path, flavors=None):
+    """
+    Load a host inventory from a JSON file.
+
+    The file holds a list of hosts, or an object with a "hosts" list. Each host has a "name",
+    a "flavor" (display name or slug) and optionally "docker_host" or "context", and a "tuning"
+    object with container settings for that host (e.g. {"memory": "24g", "ollama_num_parallel": 4}).
+
+    Args:
+        path (str): The inventory file.
+        flavors (dict): Flavor table to resolve flavor names in, defaults to the built-in flavors.
+
+    Returns:
+        list: FleetHost entries, with flavors resolved to their display names.
+
+    Raises:
+        ValueError: If the inventory is malformed or names an unknown flavor.
+    """
+    with open(path, encoding="utf-8") as inventory_file:
+        data = json.load(inventory_file)
+    entries = data.get("hosts", []) if isinstance(data, dict) else data
+
+    flavors = flavors if flavors is not None else FLAVOR_OPTIONS
+    hosts = []
+    for index, entry in enumerate(entries):
+        name = entry.get("name") or entry.get("docker_host") or entry.get("context")
+        if not name:
+            raise ValueError(f"Inventory entry {index + 1} needs a name, docker_host or context.")
+        flavor = find_flavor(entry.get("flavor", ""), flavors)
+        if flavor is None:
+            raise ValueError(f"Inventory entry '{name}' has an unknown flavor '{entry.get('flavor')}'.")
+        try:
+            spec = flavors[flavor].with_overrides(**entry.get("tuning", {}))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Inventory entry '{name}' has invalid tuning: {e}") from e
+        hosts.append(FleetHost(name, flavor, entry.get("docker_host"), entry.get("context"), spec))
+
+    if len({host.name for host in hosts}) != len(hosts):
+        raise ValueError("Inventory host names must be unique.")
+    return hosts
+
+
+def provision_host(host, log_callback, timeout=HOST_TIMEOUT, tracer=None, image_cache=None):
+    """
+    Run the container setup flow against one host.
+
+    Args:
+        host (FleetHost): The host to provision.
+        log_callback (callable): Receives log messages; every message carries a host field.
+        timeout (float): Seconds after which the remaining commands for this host are killed.
+        tracer (Tracer): Records the host's steps and commands, tagged with the host.
+        image_cache (ImageCache): Images are loaded onto the host from this cache instead of pulled.
+
+    Returns:
+        HostResult: The outcome and per-step timings.
+    """
+    def host_log(message, output_mode="both", **fields):
+        log_callback(message, output_mode=output_mode, host=host.name, **fields)
+
+    api_client = DockerAPIClient.from_env(host.docker_host) if host.docker_host else None
+    docker_manager = DockerManager(
+        log_callback=host_log, api_client=api_client, docker_host=host.docker_host, docker_context=host.context,
+        tracer=tracer, image_cache=image_cache
+    )
+    started_at = time.monotonic()
+    docker_manager.deadline = started_at + timeout
+
+    error = None
+    try:
+        # 'docker --version' only proves a local CLI; the server version needs the remote daemon
+        with docker_manager.step("connect"):
+            server_version = docker_manager.daemon_version()
+        if not server_version:
+            error = "Docker is not reachable"
+        elif not docker_manager.setup_containers(host.spec):
+            error = "Container setup failed"
+        if error and time.monotonic() >= docker_manager.deadline:
+            error = f"Timed out after {timeout:g} seconds"
+    except Exception as e:
+        error = f"Unexpected error: {e}"
+    finally:
+        if api_client:
+            api_client.close()
+
+    return HostResult(host, error is None, error, time.monotonic() - started_at, docker_manager.step_durations())
+
+
+def provision_fleet(hosts, log_callback, parallelism=FLEET_PARALLELISM, timeout=HOST_TIMEOUT, result_callback=None,
+                    tracer=None, image_cache=None):
+    """
+    Provision several hosts concurrently.
+
+    Args:
+        hosts (list): FleetHost entries.
+        log_callback (callable): Receives log messages with a host field. Called from worker threads.
+        parallelism (int): Maximum number of hosts provisioned at the same time.
+        timeout (float): Per-host timeout in seconds.
+        result_callback (callable): Called with each HostResult as soon as its host finishes.
+        tracer (Tracer): Shared by every host to record its steps and commands.
+        image_cache (ImageCache): Shared by every host; an image pulled by one host is loaded onto the others.
+
+    Returns:
+        list: HostResult entries in inventory order.
+    """
+    if not hosts:
+        return []
+
+    lock = threading.Lock()
+
+    def run(host):
+        result = provision_host(host, log_callback, timeout=timeout, tracer=tracer, image_cache=image_cache)
+        if result_callback:
+            with lock:
+                result_callback(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(hosts)))) as executor:
+        return list(executor.map(run, hosts))
+
+
+def format_results_table(results):
+    """Return a plain text table with one row per host and one timing column per step."""
+    steps = []
+    for result in results:
+        for step in result.steps:
+            if step not in steps:
+                steps.append(step)
+
+    header = ["host", "flavor", "result", "total"] + steps
+    rows = [header]
+    for result in results:
+        row = [result.host.name, result.host.flavor, "ok" if result.ok else f"FAILED: {result.error}",
+               f"{result.duration:.1f}s"]
+        row += [f"{result.steps[step]:.1f}s" if step in result.steps else "-" for step in steps]
+        rows.append(row)
+
+    widths = [max(len(row[column]) for row in rows) for column in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+def results_to_json(results):
+    """Return the results as JSON-serialisable dicts."""
+    return [
+        {
+            "host": result.host.name,
+            "flavor": result.host.flavor,
+            "docker_host": result.host.docker_host,
+            "context": result.host.context,
+            "ok": result.ok,
+            "error": result.error,
+            "duration": round(result.duration, 3),
+            "steps": {step: round(seconds, 3) for step, seconds in result.steps.items()},
+        }
+        for result in results
+    ]
@@ -0,0 +1,244 @@
+# helpers/host_probe.py
+
+import json
+import os
+import shutil
+import subprocess
+from collections import namedtuple
+
+# JSON file whose values replace probed ones, e.g. {"gpus": [], "memory_bytes": 8589934592}, to
+# try out recommendations for other hardware
+HOST_CAPACITY_ENV = "INSTALLER_HOST_CAPACITY"
+
+# Seconds each probing command may take
+PROBE_TIMEOUT = 10
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+
+# Smallest host that gets a flavor bundling Ollama; less runs models remotely
+MIN_LOCAL_MODEL_MEMORY = 8 * GIB
+MIN_LOCAL_MODEL_DISK = 20 * GIB
+
+# Memory kept free for the host and Docker itself: this much, or a quarter if that is more
+HOST_RESERVED_MEMORY = 2 * GIB
+
+# Bounds of the generated shm size, which is a sixteenth of the host memory otherwise
+MIN_SHM_SIZE = 256 * MIB
+MAX_SHM_SIZE = 2 * GIB
+
+# Bounds of the Ollama concurrency settings generated for any host
+MAX_OLLAMA_NUM_PARALLEL = 4
+MAX_OLLAMA_LOADED_MODELS = 3
+
+# Flavors recommended for each kind of host
+GPU_FLAVOR = "Bundled Ollama with GPU"
+CPU_FLAVOR = "Bundled Ollama CPU Only"
+REMOTE_FLAVOR = "OpenAI API Only"
+
+# Hardware of a Docker host. gpus holds a (name, memory in bytes) pair per Nvidia GPU; gpu_runtime
+# tells whether Docker can hand GPUs to containers. Values that could not be probed are None.
+HostCapacity = namedtuple(
+    "HostCapacity", ["cpus", "memory_bytes", "disk_free_bytes", "docker_root", "gpus", "gpu_runtime"]
+)
+
+
+def _run(argv):
+    """Return the stdout of a command, or None if it is missing, fails or times out."""
+    try:
+        result = subprocess.run(argv, capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+class HostProbe:
+    """
+    Reads the CPU count, memory, free disk on the Docker data root and Nvidia GPUs of this machine.
+
+    Every source can be replaced, so probing can be exercised without the hardware: pass a run
+    callable that answers 'docker info' and 'nvidia-smi', a proc_root holding a fake meminfo, or
+    set INSTALLER_HOST_CAPACITY to a JSON file of values.
+    """
+
+    def __init__(self, run=_run, proc_root="/proc", which=shutil.which, disk_usage=shutil.disk_usage,
+                 cpu_count=os.cpu_count, overrides_path=None):
+        """
+        Args:
+            run (callable): Takes an argv list and returns its stdout, or None on failure.
+            proc_root (str): Directory holding meminfo.
+            which (callable): Finds an executable on the PATH, like shutil.which.
+            disk_usage (callable): Returns a (total, used, free) tuple for a path, like shutil.disk_usage.
+            cpu_count (callable): Returns the number of CPUs, like os.cpu_count.
+            overrides_path (str): JSON file of values replacing probed ones, defaults to $INSTALLER_HOST_CAPACITY.
+        """
+        self.run = run
+        self.proc_root = proc_root
+        self.which = which
+        self.disk_usage = disk_usage
+        self.cpu_count = cpu_count
+        self.overrides_path = overrides_path or os.environ.get(HOST_CAPACITY_ENV)
+
+    def probe(self):
+        """
+        Probe the host.
+
+        Returns:
+            HostCapacity: The hardware found, with None for anything that could not be read.
+
+        Raises:
+            ValueError: If the overrides file is malformed.
+        """
+        info = self._docker_info()
+        # The daemon's view wins, it is what containers get when Docker runs in a VM
+        cpus = info.get("NCPU") or self.cpu_count()
+        memory_bytes = info.get("MemTotal") or self._meminfo_total()
+        docker_root = info.get("DockerRootDir")
+        gpu_runtime = "nvidia" in (info.get("Runtimes") or {})
+        capacity = HostCapacity(
+            cpus=cpus,
+            memory_bytes=memory_bytes,
+            disk_free_bytes=self._disk_free(docker_root),
+            docker_root=docker_root,
+            gpus=self._nvidia_gpus(),
+            gpu_runtime=gpu_runtime,
+        )
+        return self._apply_overrides(capacity)
+
+    def _docker_info(self):
+        output = self.run(["docker", "info", "--format", "{{json .}}"])
+        try:
+            info = json.loads(output) if output else {}
+        except ValueError:
+            return {}
+        return info if isinstance(info, dict) else {}
+
+    def _meminfo_total(self):
+        try:
+            with open(os.path.join(self.proc_root, "meminfo"), encoding="utf-8") as meminfo:
+                for line in meminfo:
+                    if line.startswith("MemTotal:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    def _disk_free(self, docker_root):
+        """Free bytes on the Docker data root, or on the working directory while the root is unknown."""
+        for path in (docker_root, "."):
+            if path and os.path.exists(path):
+                try:
+                    return self.disk_usage(path)[2]
+                except OSError:
+                    continue
+        return None
+
+    def _nvidia_gpus(self):
+        if not self.which("nvidia-smi"):
+            return []
+        output = self.run(["nvidia-smi", "--query-gpu=name,memory.total", "--format=csv,noheader,nounits"])
+        gpus = []
+        for line in (output or "").splitlines():
+            name, _, memory_mib = line.rpartition(",")
+            try:
+                gpus.append((name.strip(), int(float(memory_mib)) * MIB))
+            except ValueError:
+                continue
+        return gpus
+
+    def _apply_overrides(self, capacity):
+        if not self.overrides_path:
+            return capacity
+        try:
+            with open(self.overrides_path, encoding="utf-8") as overrides_file:
+                overrides = json.load(overrides_file)
+            if "gpus" in overrides:
+                overrides["gpus"] = [(name, int(memory)) for name, memory in overrides["gpus"]]
+            return capacity._replace(**overrides)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            raise ValueError(f"Could not read host capacity file '{self.overrides_path}': {e}") from e
+
+
+def describe_capacity(capacity):
+    """Return a one-line summary of a host, e.g. '16 CPUs, 62.8 GB memory, 410.2 GB free, GPU: RTX 4090 (24 GB)'."""
+    def gigabytes(value):
+        return "unknown" if value is None else f"{value / 1000 ** 3:.1f} GB"
+
+    if capacity.gpus:
+        gpus = ", ".join(f"{name} ({memory / 1000 ** 3:.0f} GB)" for name, memory in capacity.gpus)
+        if not capacity.gpu_runtime:
+            gpus += ", not available to Docker"
+    else:
+        gpus = "none"
+    return (f"{capacity.cpus or 'unknown'} CPUs, {gigabytes(capacity.memory_bytes)} memory, "
+            f"{gigabytes(capacity.disk_free_bytes)} free for Docker, GPU: {gpus}")
+
+
+def recommend_flavor(capacity, flavors):
+    """
+    Pick the flavor that suits a host.
+
+    Args:
+        capacity (HostCapacity): The probed host.
+        flavors (dict): Flavor table to choose from.
+
+    Returns:
+        tuple: (flavor name or None if the table lacks it, reason).
+    """
+    if capacity.gpus and capacity.gpu_runtime:
+        flavor, reason = GPU_FLAVOR, "an Nvidia GPU is available to Docker"
+    elif capacity.memory_bytes is None:
+        flavor, reason = REMOTE_FLAVOR, "the memory size could not be read, so local models may not fit"
+    elif capacity.memory_bytes < MIN_LOCAL_MODEL_MEMORY:
+        flavor, reason = REMOTE_FLAVOR, f"less than {MIN_LOCAL_MODEL_MEMORY // GIB} GB memory is too little for local models"
+    elif capacity.disk_free_bytes is not None and capacity.disk_free_bytes < MIN_LOCAL_MODEL_DISK:
+        flavor, reason = REMOTE_FLAVOR, f"less than {MIN_LOCAL_MODEL_DISK // GIB} GB free disk is too little for local models"
+    else:
+        flavor, reason = CPU_FLAVOR, "enough memory and disk for local models on the CPU"
+        if capacity.gpus:
+            reason += " (an Nvidia GPU was found, but Docker has no nvidia runtime)"
+    return (flavor if flavor in flavors else None), reason
+
+
+def tuned_settings(spec, capacity):
+    """
+    Generate resource settings for a container spec, scaled to a host.
+
+    Only settings the spec leaves unset are generated, so values from a flavors file win. The
+    Ollama settings are generated for images that bundle Ollama only.
+
+    Args:
+        spec (ContainerSpec): The flavor's spec.
+        capacity (HostCapacity): The probed host.
+
+    Returns:
+        dict: Settings to pass to spec.with_overrides().
+    """
+    settings = {}
+    memory = capacity.memory_bytes
+    if memory:
+        if spec.memory is None:
+            limit = memory - max(HOST_RESERVED_MEMORY, memory // 4)
+            settings["memory"] = f"{max(1, limit // GIB)}g"
+        if spec.shm_size is None:
+            settings["shm_size"] = f"{min(MAX_SHM_SIZE, max(MIN_SHM_SIZE, memory // 16)) // MIB}m"
+
+    if spec.image.endswith(":ollama"):
+        if spec.gpus and capacity.gpus:
+            # Models live in GPU memory: a request slot per 8 GB, a loaded model per 12 GB of the largest GPU
+            # nvidia-smi reports slightly less than the nominal size, so round up to whole GB
+            gpu_memory = -(-max(memory for _, memory in capacity.gpus) // GIB)
+            num_parallel, loaded_models = gpu_memory // 8, gpu_memory // 12
+        else:
+            # A request slot per 4 CPUs, and a second loaded model with 32 GB or more of memory
+            num_parallel, loaded_models = (capacity.cpus or 1) // 4, 1 + (memory or 0) // (32 * GIB)
+        if spec.ollama_num_parallel is None:
+            settings["ollama_num_parallel"] = min(MAX_OLLAMA_NUM_PARALLEL, max(1, num_parallel))
+        if spec.ollama_max_loaded_models is None:
+            settings["ollama_max_loaded_models"] = min(MAX_OLLAMA_LOADED_MODELS, max(1, loaded_models))
+    return settings
+
+
+def tune_spec(spec, capacity):
+    """Return a copy of spec with the settings of tuned_settings() applied."""
+    return spec.with_overrides(**tuned_settings(spec, capacity))
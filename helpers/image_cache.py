@@ -0,0 +1,309 @@
+# helpers/image_cache.py
+
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+# Directory of the image cache; images are pulled from the registry when it is not set
+IMAGE_CACHE_ENV = "INSTALLER_IMAGE_CACHE"
+
+# Size the cache is trimmed to after every new image, least recently used images first
+IMAGE_CACHE_MAX_BYTES = 50 * 1000 ** 3
+
+# gzip level for cached archives; image layers are mostly compressed already, so level 1 keeps
+# saving fast while still shrinking the uncompressed tar that 'docker save' writes
+COMPRESSION_LEVEL = 1
+
+# Bytes copied at a time between docker and the cache files
+CHUNK_SIZE = 1024 * 1024
+
+INDEX_FILE = "index.json"
+
+
+class ImageCacheError(Exception):
+    """Raised when an image cannot be saved to or loaded from the cache."""
+
+
+class _HashingWriter:
+    """File wrapper that hashes and counts everything written through it."""
+
+    def __init__(self, file):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+
+class ImageCache:
+    """
+    Content-addressed store of 'docker save' archives.
+
+    Archives are named after the image ID (the digest of the image's config), so tags that point
+    to the same image share one file. index.json maps image references to digests and records the
+    size, checksum and last use of every archive. The directory may live on a USB drive or a network
+    share; a read-only cache can still be loaded from.
+    """
+
+    def __init__(self, directory, max_bytes=IMAGE_CACHE_MAX_BYTES, compress=True):
+        """
+        Args:
+            directory (str): Cache directory, created on first write.
+            max_bytes (int): Total archive size kept; older images are evicted beyond it.
+            compress (bool): gzip archives while saving them.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._lock = threading.Lock()
+        # One lock per digest, so concurrent saves of the same image write it only once
+        self._digest_locks = {}
+        self._index = self._read_index()
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            index = {}
+        return {"images": index.get("images", {}), "blobs": index.get("blobs", {})}
+
+    def _write_index(self):
+        """Persist the index atomically. Called with the lock held; a read-only cache is left unchanged."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary_path = tempfile.mkstemp(prefix=".index-", dir=self.directory)
+            with os.fdopen(descriptor, "w", encoding="utf-8") as index_file:
+                json.dump(self._index, index_file, indent=2)
+            os.replace(temporary_path, os.path.join(self.directory, INDEX_FILE))
+        except OSError:
+            pass
+
+    def _blob_path(self, blob):
+        return os.path.join(self.directory, blob["file"])
+
+    def lookup(self, image):
+        """Return the digest cached for an image reference, or None."""
+        with self._lock:
+            digest = self._index["images"].get(image)
+            blob = self._index["blobs"].get(digest)
+        if blob is None or not os.path.exists(self._blob_path(blob)):
+            return None
+        return digest
+
+    def entries(self):
+        """Return (digest, image references, size, last used) for every cached archive, most recent first."""
+        with self._lock:
+            references = {}
+            for image, digest in self._index["images"].items():
+                references.setdefault(digest, []).append(image)
+            entries = [
+                (digest, sorted(references.get(digest, [])), blob["size"], blob["last_used"])
+                for digest, blob in self._index["blobs"].items()
+            ]
+        return sorted(entries, key=lambda entry: entry[3], reverse=True)
+
+    def total_size(self):
+        """Return the combined size of all cached archives in bytes."""
+        with self._lock:
+            return sum(blob["size"] for blob in self._index["blobs"].values())
+
+    def store(self, image, digest, env=None):
+        """
+        Stream 'docker save' of an image into the cache, unless an archive of that digest exists already.
+
+        Args:
+            image (str): Image reference, e.g. 'ghcr.io/open-webui/pipelines:main'.
+            digest (str): The image's ID, as reported by 'docker image inspect'.
+            env (dict): Environment of the docker command.
+
+        Returns:
+            bool: True if a new archive was written, False if only the reference was added.
+
+        Raises:
+            ImageCacheError: If 'docker save' fails or the archive cannot be written.
+        """
+        with self._lock:
+            digest_lock = self._digest_locks.setdefault(digest, threading.Lock())
+        with digest_lock:
+            with self._lock:
+                blob = self._index["blobs"].get(digest)
+            # Evicted between the check and the touch, the archive is written again
+            if blob is not None and os.path.exists(self._blob_path(blob)) and self._touch(image, digest):
+                return False
+            self._save(image, digest, env)
+        self.evict(keep=digest)
+        return True
+
+    def _save(self, image, digest, env):
+        """Write the archive of an image and add it to the index."""
+        file_name = os.path.join("blobs", "sha256", digest.split(":")[-1] + (".tar.gz" if self.compress else ".tar"))
+        path = os.path.join(self.directory, file_name)
+        # Written under a unique name and renamed once complete, so readers never see half an archive
+        partial_path = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.TemporaryFile() as error_output, open(partial_path, "wb") as archive:
+                process = subprocess.Popen(["docker", "save", image], stdout=subprocess.PIPE, stderr=error_output, env=env)
+                writer = _HashingWriter(archive)
+                output = gzip.GzipFile(fileobj=writer, mode="wb", compresslevel=COMPRESSION_LEVEL, mtime=0) \
+                    if self.compress else writer
+                for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), b""):
+                    output.write(chunk)
+                if self.compress:
+                    output.close()
+                process.stdout.close()
+                if process.wait() != 0:
+                    error_output.seek(0)
+                    error_text = error_output.read().decode(errors="replace").strip()
+                    raise ImageCacheError(f"'docker save {image}' failed: {error_text}")
+            os.replace(partial_path, path)
+        except OSError as e:
+            raise ImageCacheError(f"Could not write {image} to the image cache: {e}") from e
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        with self._lock:
+            self._index["blobs"][digest] = {
+                "file": file_name, "size": writer.size, "sha256": writer.sha256.hexdigest(), "last_used": time.time()
+            }
+            self._index["images"][image] = digest
+            self._write_index()
+
+    def load(self, image, env=None):
+        """
+        Stream a cached archive into 'docker load', checking it against its recorded checksum.
+
+        Returns:
+            str | None: The digest of the loaded image, or None if the image is not cached.
+
+        Raises:
+            ImageCacheError: If the archive is damaged or 'docker load' fails. A damaged archive is removed.
+        """
+        digest = self.lookup(image)
+        if digest is None:
+            return None
+        with self._lock:
+            blob = self._index["blobs"].get(digest)
+        # Evicted or removed since the lookup
+        if blob is None:
+            return None
+        blob = dict(blob)
+        try:
+            archive = open(self._blob_path(blob), "rb")
+        except FileNotFoundError:
+            return None
+
+        checksum = hashlib.sha256()
+        try:
+            with tempfile.TemporaryFile() as error_output, archive:
+                # 'docker load' reads gzip compressed archives as they are
+                process = subprocess.Popen(
+                    ["docker", "load", "--quiet"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=error_output, env=env
+                )
+                try:
+                    for chunk in iter(lambda: archive.read(CHUNK_SIZE), b""):
+                        checksum.update(chunk)
+                        process.stdin.write(chunk)
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+                returncode = process.wait()
+                error_output.seek(0)
+                error_text = error_output.read().decode(errors="replace").strip()
+        except OSError as e:
+            raise ImageCacheError(f"Could not read {image} from the image cache: {e}") from e
+
+        if checksum.hexdigest() != blob["sha256"]:
+            self.remove(digest)
+            raise ImageCacheError(f"Cached archive of {image} is damaged (checksum mismatch) and was removed.")
+        if returncode != 0:
+            raise ImageCacheError(f"'docker load' of the cached {image} failed: {error_text}")
+        # The image is loaded even if its archive was evicted meanwhile
+        self._touch(image, digest)
+        return digest
+
+    def verify(self):
+        """
+        Recompute the checksum of every archive, removing the damaged ones.
+
+        Returns:
+            list: (digest, ok) for every archive.
+        """
+        with self._lock:
+            blobs = dict(self._index["blobs"])
+        results = []
+        for digest, blob in blobs.items():
+            checksum = hashlib.sha256()
+            try:
+                with open(self._blob_path(blob), "rb") as archive:
+                    for chunk in iter(lambda: archive.read(CHUNK_SIZE), b""):
+                        checksum.update(chunk)
+                ok = checksum.hexdigest() == blob["sha256"]
+            except OSError:
+                ok = False
+            if not ok:
+                self.remove(digest)
+            results.append((digest, ok))
+        return results
+
+    def evict(self, max_bytes=None, keep=None):
+        """
+        Remove least recently used archives until the cache fits in max_bytes.
+
+        Args:
+            max_bytes (int): Size limit, defaults to the cache's own.
+            keep (str): Digest that is never evicted, such as the one just stored.
+
+        Returns:
+            list: Digests of the removed archives.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            by_age = sorted(self._index["blobs"].items(), key=lambda item: item[1]["last_used"])
+            total = sum(blob["size"] for _, blob in by_age)
+        evicted = []
+        for digest, blob in by_age:
+            if total <= max_bytes:
+                break
+            if digest == keep:
+                continue
+            self.remove(digest)
+            total -= blob["size"]
+            evicted.append(digest)
+        return evicted
+
+    def remove(self, digest):
+        """Delete an archive and every image reference to it."""
+        with self._lock:
+            blob = self._index["blobs"].pop(digest, None)
+            self._index["images"] = {image: other for image, other in self._index["images"].items() if other != digest}
+            self._write_index()
+        if blob is not None:
+            try:
+                os.remove(self._blob_path(blob))
+            except OSError:
+                pass
+
+    def _touch(self, image, digest):
+        """Record a use of an archive under an image reference. Returns False if the archive was evicted."""
+        with self._lock:
+            blob = self._index["blobs"].get(digest)
+            if blob is None:
+                return False
+            self._index["images"][image] = digest
+            blob["last_used"] = time.time()
+            self._write_index()
+        return True
@@ -0,0 +1,74 @@
+# helpers/last_known_state.py
+
+import json
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+# File holding the result of the latest status check, shown while the next one runs
+LAST_KNOWN_STATE_ENV = "INSTALLER_LAST_KNOWN_STATE"
+DEFAULT_LAST_KNOWN_STATE_PATH = "./state/last_known_state.json"
+
+LAST_KNOWN_STATE_VERSION = 1
+
+# What the buttons of the installer depend on; checked_at is an ISO timestamp of the check
+InstallerStatus = namedtuple("InstallerStatus", ["docker_installed", "containers_set_up", "checked_at"])
+
+
+def check_installer_status(docker_manager):
+    """
+    Ask Docker whether it is installed and the containers are set up. This spawns docker
+    commands, so call it off the Tk thread.
+
+    Returns:
+        InstallerStatus: The current status.
+    """
+    docker_installed = docker_manager.is_docker_installed()
+    return InstallerStatus(
+        docker_installed=docker_installed,
+        containers_set_up=docker_installed and docker_manager.are_containers_set_up(),
+        checked_at=datetime.now().isoformat(timespec="seconds"),
+    )
+
+
+class LastKnownState:
+    """
+    On-disk copy of the latest InstallerStatus, so the window can show it before Docker answers.
+
+    A missing, unreadable or outdated file reads as no state; it is only ever a hint that the next
+    check replaces.
+    """
+
+    def __init__(self, path=DEFAULT_LAST_KNOWN_STATE_PATH):
+        """
+        Args:
+            path (str): The state file, created with its directory on the first save.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Return the saved InstallerStatus, or None if there is none."""
+        try:
+            with open(self.path, encoding="utf-8") as state_file:
+                data = json.load(state_file)
+            if data.get("version") != LAST_KNOWN_STATE_VERSION:
+                return None
+            return InstallerStatus(**data["status"])
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return None
+
+    def save(self, status):
+        """Replace the saved status atomically. Errors are ignored, the file is only a cache."""
+        directory = os.path.dirname(self.path) or "."
+        with self._lock:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                descriptor, temporary_path = tempfile.mkstemp(prefix=".state-", dir=directory)
+                with os.fdopen(descriptor, "w", encoding="utf-8") as state_file:
+                    json.dump({"version": LAST_KNOWN_STATE_VERSION, "status": status._asdict()}, state_file)
+                os.replace(temporary_path, self.path)
+            except OSError:
+                pass
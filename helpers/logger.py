@@ -1,62 +1,107 @@
 # logger.py
 import tkinter as tk
 from tkinter.scrolledtext import ScrolledText
-import logging
+import queue
+from .file_log import FileLogWriter
+
+# Milliseconds between two flushes of queued messages into the text area
+DRAIN_INTERVAL_MS = 100
+
+# Maximum number of messages written to the text area per flush
+MAX_BATCH_SIZE = 500
+
+# Number of most recent lines kept visible in the text area
+MAX_VISIBLE_LINES = 1000
 
 class Logger:
-    def __init__(self, parent, log_file_path="app.log"):
+    def __init__(self, parent, log_file_path="app.log", max_visible_lines=MAX_VISIBLE_LINES, json_lines=False):
         """
         Initialize the Logger with options for logging to a text area, file, or both.
 
+        Messages for the text area may come from any thread. They are queued and written
+        in batches by the Tk main loop, which keeps only the most recent lines. File output
+        is written by a background thread to a size-rotated file.
+
         Args:
             parent: The Tkinter parent widget.
             log_file_path (str): Path to the log file for file-based logging.
+            max_visible_lines (int): Number of lines kept in the text area.
+            json_lines (bool): Write the log file as JSON lines with structured fields.
         """
         self.text_area = ScrolledText(parent, height=10, state="disabled")
         self.text_area.pack(fill="both", expand=True)
-        
+        self.max_visible_lines = max_visible_lines
+        self._visible_lines = 0
+        self._pending = queue.SimpleQueue()
+
         # Set up file logging
         self.log_file_path = log_file_path
-        logging.basicConfig(
-            filename=self.log_file_path,
-            filemode="a",  # Append mode
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            level=logging.INFO,
-        )
-
-    def log(self, message, output_mode="both"):
+        self.file_writer = FileLogWriter(log_file_path, json_lines=json_lines)
+
+        # Initial messages shown before anything else is logged
+        for message in ("Starting Application Checks", "Running initial Docker check."):
+            self._log_to_text_area(message)
+            self._log_to_file(message)
+
+        self.text_area.after(DRAIN_INTERVAL_MS, self._drain)
+
+    def log(self, message, output_mode="both", **fields):
         """
         Log a message to the specified output mode (text area, file, or both).
 
+        Safe to call from any thread.
+
         Args:
             message (str): The message to be logged.
             output_mode (str): "text", "file", or "both" to specify logging output. Defaults to "both".
+            **fields: Structured fields (step, container, command, duration, returncode) for the log file.
         """
-        # Check if initial messages need to be added to the text area
-        if self._is_text_area_empty():
-            self._log_to_text_area("Starting Application Checks")
-            self._log_to_file("Starting Application Checks")
-            self._log_to_text_area("Running initial Docker check.")
-            self._log_to_file("Running initial Docker check.")
-        
         # Log the actual message to the specified output mode
         if output_mode in {"text", "both"}:
             self._log_to_text_area(message)
-        
+
         if output_mode in {"file", "both"}:
-            self._log_to_file(message)
-    
+            self._log_to_file(message, **fields)
+
     def _log_to_text_area(self, message):
-        """Helper to log to the text area."""
+        """Helper to queue a message for the text area."""
+        self._pending.put(message)
+
+    def _drain(self):
+        """Write queued messages to the text area in one batch, then schedule the next flush."""
+        messages = []
+        while len(messages) < MAX_BATCH_SIZE:
+            try:
+                messages.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            if messages:
+                self._write_batch(messages)
+            # Flush again right away if the batch limit left messages behind
+            self.text_area.after(1 if len(messages) == MAX_BATCH_SIZE else DRAIN_INTERVAL_MS, self._drain)
+        except tk.TclError:
+            # The window was closed
+            pass
+
+    def _write_batch(self, messages):
+        """Insert several messages with a single widget update, dropping the oldest lines over the cap."""
+        text = "\n".join(messages) + "\n"
         self.text_area.config(state="normal")
-        self.text_area.insert(tk.END, f"{message}\n")
+        self.text_area.insert(tk.END, text)
+        self._visible_lines += text.count("\n")
+        excess = self._visible_lines - self.max_visible_lines
+        if excess > 0:
+            self.text_area.delete("1.0", f"{excess + 1}.0")
+            self._visible_lines -= excess
         self.text_area.see(tk.END)
         self.text_area.config(state="disabled")
 
-    def _log_to_file(self, message):
-        """Helper to log to a file."""
-        logging.info(message)
+    def _log_to_file(self, message, **fields):
+        """Helper to queue a message for the log file."""
+        self.file_writer.write(message, **fields)
 
-    def _is_text_area_empty(self):
-        """Check if the text area is empty."""
-        return not self.text_area.get("1.0", tk.END).strip()
+    def close(self):
+        """Flush and close the log file."""
+        self.file_writer.close()
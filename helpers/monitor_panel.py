@@ -0,0 +1,121 @@
+# helpers/monitor_panel.py
+
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from .resource_monitor import ResourceMonitor, export_csv, export_json
+
+# Milliseconds between two refreshes of the table and the chart
+REFRESH_INTERVAL_MS = 1000
+
+# Seconds of history summarized in the table and drawn in the chart
+SUMMARY_SECONDS = 300
+
+CHART_WIDTH = 640
+CHART_HEIGHT = 120
+
+# Line colour of each container in the CPU chart, by position in the table
+CHART_COLOURS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728")
+
+TABLE_COLUMNS = (
+    ("container", "Container", 90), ("cpu", "CPU", 60), ("cpu_mean", "CPU 5m avg", 80), ("memory", "Memory", 120),
+    ("memory_peak", "Mem 5m peak", 85), ("net", "Net rx / tx", 110), ("block", "Block r / w", 110),
+)
+
+
+class MonitorWindow(tk.Toplevel):
+    """Window showing live resource use of the managed containers, with a CPU chart and export."""
+
+    def __init__(self, parent, docker_manager, log_callback):
+        """
+        Args:
+            parent: The installer window.
+            docker_manager (DockerManager): Runs 'docker stats' and inspects containers for their limits.
+            log_callback (callable): Logger for export results.
+        """
+        super().__init__(parent)
+        self.title("Container Resources")
+        self.log_callback = log_callback
+
+        self.table = ttk.Treeview(self, columns=[column for column, _, _ in TABLE_COLUMNS], show="headings", height=4)
+        for column, heading, width in TABLE_COLUMNS:
+            self.table.heading(column, text=heading)
+            self.table.column(column, width=width, anchor=tk.W if column == "container" else tk.E)
+        self.table.pack(fill="x", padx=10, pady=5)
+
+        ttk.Label(self, text=f"CPU over the last {SUMMARY_SECONDS // 60} minutes").pack(padx=10, anchor=tk.W)
+        self.chart = tk.Canvas(self, width=CHART_WIDTH, height=CHART_HEIGHT, background="white")
+        self.chart.pack(padx=10, pady=5)
+
+        # Resource limits that hold a container back
+        self.warning_label = ttk.Label(self, text="", foreground="#b00020", wraplength=CHART_WIDTH)
+        self.warning_label.pack(padx=10, pady=5, anchor=tk.W)
+        ttk.Button(self, text="Export...", command=self.export).pack(padx=10, pady=5, anchor=tk.E)
+
+        # Samples arrive on the monitor thread; the window reads the history from the Tk main loop
+        self.monitor = ResourceMonitor(docker_manager)
+        self.monitor.start()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self._refresh_job = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def refresh(self):
+        """Redraw the table, warnings and chart from the recorded history."""
+        history = self.monitor.history
+        containers = history.containers()
+        self.table.delete(*self.table.get_children())
+        warnings = []
+        for name in containers:
+            latest = history.latest(name)
+            summary = self.monitor.summary(name, SUMMARY_SECONDS)
+            if latest is None or summary is None:
+                continue
+            self.table.insert("", tk.END, values=(
+                name, f"{latest.cpu_percent:.1f}%", f"{summary['cpu_mean']:.1f}%",
+                f"{latest.memory_bytes / 1024 ** 3:.2f} / {latest.memory_limit / 1024 ** 3:.1f} GiB",
+                f"{summary['memory_peak'] / 1024 ** 3:.2f} GiB",
+                f"{latest.net_rx_bytes / 1000 ** 2:.1f} / {latest.net_tx_bytes / 1000 ** 2:.1f} MB",
+                f"{latest.block_read_bytes / 1000 ** 2:.1f} / {latest.block_write_bytes / 1000 ** 2:.1f} MB",
+            ))
+            warnings += [f"{name}: {warning}" for warning in summary["warnings"]]
+        self.warning_label.config(text="\n".join(warnings))
+        self._draw_chart(containers)
+        self._refresh_job = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def _draw_chart(self, containers):
+        self.chart.delete("all")
+        series = {name: self.monitor.history.recent(name, SUMMARY_SECONDS) for name in containers}
+        peak = max([sample.cpu_percent for samples in series.values() for sample in samples] + [100])
+        for index, (name, samples) in enumerate(series.items()):
+            colour = CHART_COLOURS[index % len(CHART_COLOURS)]
+            self.chart.create_text(8, 10 + 14 * index, text=name, fill=colour, anchor=tk.W)
+            if len(samples) < 2:
+                continue
+            end = samples[-1].time
+            points = []
+            for sample in samples:
+                points.append(CHART_WIDTH - (end - sample.time) * CHART_WIDTH / SUMMARY_SECONDS)
+                points.append(CHART_HEIGHT - 2 - sample.cpu_percent * (CHART_HEIGHT - 4) / peak)
+            self.chart.create_line(*points, fill=colour)
+        self.chart.create_text(CHART_WIDTH - 4, 10, text=f"{peak:.0f}%", anchor=tk.E)
+
+    def export(self):
+        """Save the whole history as CSV or JSON, depending on the chosen file name."""
+        path = filedialog.asksaveasfilename(
+            parent=self, defaultextension=".csv", filetypes=[("CSV", "*.csv"), ("JSON", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            if path.lower().endswith(".json"):
+                export_json(self.monitor.history, path)
+            else:
+                export_csv(self.monitor.history, path)
+        except OSError as e:
+            messagebox.showerror("Export Failed", f"Could not write {path}: {e}", parent=self)
+            return
+        self.log_callback(f"Resource history written to {path}", output_mode="both")
+
+    def close(self):
+        """Stop the monitor and close the window."""
+        self.after_cancel(self._refresh_job)
+        self.monitor.stop()
+        self.destroy()
@@ -1,41 +1,65 @@
 # helpers/option_panel.py
 
+import threading
 import tkinter as tk
 from tkinter import ttk
+from .flavors import FLAVOR_OPTIONS, FLAVOR_DESCRIPTIONS, load_flavors
+from .host_probe import HostProbe, describe_capacity, recommend_flavor, tuned_settings
 
 class OptionPanel(ttk.LabelFrame):
-    def __init__(self, parent, log_callback):
+    def __init__(self, parent, log_callback, host_probe=None):
         super().__init__(parent, text="Options")
         self.log_callback = log_callback
+        # Hardware of this machine, filled in by a background probe
+        self.capacity = None
 
         # Dropdown for flavor selection
         self.flavor_var = tk.StringVar()
-        self.flavor_options = {
-            "Default (Ollama Local)": "docker run -d -p 3000:8080 --add-host=host.docker.internal:host-gateway -v open-webui:/app/backend/data --name open-webui --restart always --label com.centurylinklabs.watchtower.enable=true ghcr.io/open-webui/open-webui:main",
-            "Ollama Remote": "docker run -d -p 3000:8080 -e OLLAMA_BASE_URL=https://example.com -v open-webui:/app/backend/data --name open-webui --restart always --label com.centurylinklabs.watchtower.enable=true ghcr.io/open-webui/open-webui:main",
-            "Nvidia GPU Support": "docker run -d -p 3000:8080 --gpus all --add-host=host.docker.internal:host-gateway -v open-webui:/app/backend/data --name open-webui --restart always --label com.centurylinklabs.watchtower.enable=true ghcr.io/open-webui/open-webui:cuda",
-            "OpenAI API Only": "docker run -d -p 3000:8080 -e OPENAI_API_KEY=your_secret_key -v open-webui:/app/backend/data --name open-webui --restart always --label com.centurylinklabs.watchtower.enable=true ghcr.io/open-webui/open-webui:main",
-            "Bundled Ollama with GPU": "docker run -d -p 3000:8080 --gpus=all -v ollama:/root/.ollama -v open-webui:/app/backend/data --name open-webui --restart always --label com.centurylinklabs.watchtower.enable=true ghcr.io/open-webui/open-webui:ollama",
-            "Bundled Ollama CPU Only": "docker run -d -p 3000:8080 -v ollama:/root/.ollama -v open-webui:/app/backend/data --name open-webui --restart always --label com.centurylinklabs.watchtower.enable=true ghcr.io/open-webui/open-webui:ollama"
-        }
-
-        # Descriptions for each option
-        self.flavor_descriptions = {
-            "Default (Ollama Local)": "Use this option if Ollama is installed locally on your machine.",
-            "Ollama Remote": "Connect to Ollama on a different server by setting OLLAMA_BASE_URL.",
-            "Nvidia GPU Support": "Enable GPU support for accelerated performance on Nvidia hardware.",
-            "OpenAI API Only": "Run Open WebUI with only OpenAI API support, providing your API key.",
-            "Bundled Ollama with GPU": "Install a bundled setup with Ollama, optimized for GPU usage.",
-            "Bundled Ollama CPU Only": "Install a bundled setup with Ollama, running on CPU only."
-        }
+        # Built-in flavors, plus those defined or tuned in the user flavors file
+        try:
+            self.flavor_options, self.flavor_descriptions = load_flavors()
+        except ValueError as e:
+            self.log_callback(f"{e} Using the built-in flavors.")
+            self.flavor_options, self.flavor_descriptions = dict(FLAVOR_OPTIONS), dict(FLAVOR_DESCRIPTIONS)
 
         self.flavor_menu = ttk.Combobox(self, textvariable=self.flavor_var, values=list(self.flavor_options.keys()), state="readonly", width=35)
         self.flavor_menu.set("Select Flavor")
         self.flavor_menu.pack(padx=10, pady=5)
 
+        # The recommended flavor is only suggested; picking one stays with the user
+        self.recommendation_label = ttk.Label(self, text="")
+        self.recommendation_label.pack(padx=10)
+
         # Bind the dropdown to display a description when an option is selected
         self.flavor_menu.bind("<<ComboboxSelected>>", self.display_description)
 
+        # Size memory, shm and Ollama settings of the selected flavor to this machine. Off by default
+        # like 'setup --tune', so the settings do not depend on whether the probe has finished yet
+        self.tune_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self, text="Tune for this machine", variable=self.tune_var).pack(padx=10, pady=5)
+
+        # Probing runs 'docker info' and 'nvidia-smi', so it must not hold up the window
+        self.probe_thread = threading.Thread(target=self._probe_host, args=(host_probe or HostProbe(),), daemon=True)
+        self.probe_thread.start()
+
+    def _probe_host(self, host_probe):
+        """Probe the hardware on a background thread, then recommend a flavor from the Tk main loop."""
+        try:
+            capacity = host_probe.probe()
+        except ValueError as e:
+            self.log_callback(str(e), output_mode="file")
+            return
+        self.after(0, self._recommend_flavor, capacity)
+
+    def _recommend_flavor(self, capacity):
+        """Log the hardware and show the recommended flavor next to the dropdown, leaving the selection alone."""
+        self.capacity = capacity
+        self.log_callback(f"This machine: {describe_capacity(capacity)}")
+        flavor, reason = recommend_flavor(capacity, self.flavor_options)
+        if flavor is None:
+            return
+        self.log_callback(f"Recommended flavor: {flavor} ({reason}).")
+        self.recommendation_label.config(text=f"Recommended for this machine: {flavor}")
 
     def display_description(self, event):
         """Display description of the selected option."""
@@ -46,7 +70,20 @@ class OptionPanel(ttk.LabelFrame):
         # Optionally log the description as well
         self.log_callback(description)
 
-    def get_selected_flavor_command(self):
-        """Return the Docker command based on the selected flavor."""
+    def get_selected_flavor_spec(self):
+        """
+        Return the container spec of the selected flavor, or None if no flavor is selected.
+
+        With tuning on and the probe finished, the spec carries settings sized to this machine.
+        """
         flavor = self.flavor_var.get()
-        return self.flavor_options.get(flavor, "")
+        spec = self.flavor_options.get(flavor)
+        if spec is None or not self.tune_var.get():
+            return spec
+        if self.capacity is None:
+            self.log_callback("The hardware probe has not finished, using the flavor's own settings.")
+            return spec
+        settings = tuned_settings(spec, self.capacity)
+        if settings:
+            self.log_callback(f"Tuned settings: {', '.join(f'{key}={value}' for key, value in settings.items())}")
+        return spec.with_overrides(**settings)
@@ -0,0 +1,102 @@
+# helpers/pull_progress.py
+
+import re
+import threading
+from collections import namedtuple
+
+# Structured progress event for one layer of an image being pulled.
+# current/total are the layer's bytes (None when Docker did not report them),
+# downloaded/size are the sums over all layers of the image seen so far.
+PullProgress = namedtuple(
+    "PullProgress",
+    ["image", "layer", "status", "current", "total", "downloaded", "size", "layers_done", "layers"]
+)
+
+# Statuses after which a layer needs no more downloading
+_DONE_STATUSES = {"Already exists", "Download complete", "Pull complete"}
+
+# Multipliers of the units Docker prints, by lower-case name: decimal for downloads and I/O,
+# binary for memory
+_SIZE_UNITS = {
+    "b": 1, "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3, "tb": 1000 ** 4,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4,
+}
+_SIZE = re.compile(r"(\d+(?:\.\d+)?)\s*([kmgt]i?b|b)?", re.IGNORECASE)
+
+# Matches "a2abf6c4d29d: Downloading [=====>     ]  12.3MB/45.6MB" as well as
+# the plain "a2abf6c4d29d: Pull complete" lines Docker prints when not on a TTY
+_LAYER_LINE = re.compile(
+    r"^(?P<layer>[0-9a-f]{12}): (?P<status>[A-Za-z ]+?)"
+    r"(?:\s+\[[=> ]*\])?"
+    r"(?:\s+(?P<current>[\d.]+\s*[kKMGT]?B)/(?P<total>[\d.]+\s*[kKMGT]?B))?\s*$"
+)
+
+# "main: Pulling from open-webui/open-webui" names the image being pulled by 'docker run'
+_PULLING_FROM = re.compile(r"^(?P<tag>\S+): Pulling from (?P<repository>\S+)")
+
+
+def format_pull_progress(progress):
+    """Return a one-line summary of an image's download progress."""
+    message = f"{progress.image}: {progress.layers_done}/{progress.layers} layers complete"
+    if progress.size:
+        message += f" ({progress.downloaded / 1e6:.0f} MB of {progress.size / 1e6:.0f} MB)"
+    return message
+
+
+def parse_size(text):
+    """Convert a Docker size string such as '12.3MB' or '1.5GiB' into a number of bytes, or None if it is not a size."""
+    match = _SIZE.fullmatch((text or "").strip())
+    if not match:
+        return None
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[(unit or "b").lower()])
+
+
+class PullProgressTracker:
+    """Turns 'docker pull' output lines into PullProgress events, one layer at a time."""
+
+    def __init__(self, image=None):
+        self.image = image
+        self._layers = {}
+        self._lock = threading.Lock()
+
+    def feed(self, line):
+        """
+        Parse one line of 'docker pull' (or 'docker run') output.
+
+        Args:
+            line (str): A single output line without the trailing newline.
+
+        Returns:
+            PullProgress | None: An event if the line described a layer, None otherwise.
+        """
+        line = line.strip()
+        pulling_from = _PULLING_FROM.match(line)
+        if pulling_from and self.image is None:
+            self.image = f"{pulling_from.group('repository')}:{pulling_from.group('tag')}"
+            return None
+
+        match = _LAYER_LINE.match(line)
+        if not match:
+            return None
+
+        current = parse_size(match.group("current")) if match.group("current") else None
+        total = parse_size(match.group("total")) if match.group("total") else None
+        return self.update(match.group("layer"), match.group("status"), current, total)
+
+    def update(self, layer, status, current=None, total=None):
+        """Record the new state of a layer and return the resulting PullProgress event."""
+        with self._lock:
+            known_current, known_total = self._layers.get(layer, (None, 0, None))[1:]
+            total = total if total is not None else known_total
+            if status in _DONE_STATUSES and total is not None:
+                current = total
+            current = current if current is not None else known_current
+            self._layers[layer] = (status, current, total)
+
+            downloaded = sum(layer_current for _, layer_current, _ in self._layers.values())
+            size = sum(layer_total or 0 for _, _, layer_total in self._layers.values())
+            layers_done = sum(1 for layer_status, _, _ in self._layers.values() if layer_status in _DONE_STATUSES)
+            return PullProgress(
+                self.image, layer, status, current, total, downloaded, size, layers_done, len(self._layers)
+            )
@@ -0,0 +1,147 @@
+# helpers/readiness.py
+
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Seconds a container may take after 'docker run' until it serves requests
+READINESS_TIMEOUT = 300
+
+# Delay between probes, growing by BACKOFF_FACTOR up to MAX_BACKOFF
+INITIAL_BACKOFF = 0.5
+BACKOFF_FACTOR = 1.5
+MAX_BACKOFF = 5
+
+# Seconds to wait for a single HTTP probe
+HTTP_TIMEOUT = 2
+
+# Path probed on each managed container's published port
+READINESS_PATHS = {
+    "open-webui": "/health",
+    "pipelines": "/",
+}
+
+# Container states from which a container will not become ready on its own
+_FAILED_STATES = {"exited", "dead"}
+
+# A container to probe: name, URL to request, and time.monotonic() at which it was started
+ReadinessTarget = namedtuple("ReadinessTarget", ["container", "url", "started_at"])
+
+# Outcome of probing one container. seconds is the time to ready (or until giving up).
+ReadinessResult = namedtuple("ReadinessResult", ["container", "ready", "seconds", "attempts", "diagnosis"])
+
+
+def probe_host_for(docker_host):
+    """Return the host name published ports are reachable on for a DOCKER_HOST value or context endpoint."""
+    if docker_host:
+        hostname = urlparse(docker_host).hostname
+        if hostname:
+            return hostname
+    return "localhost"
+
+
+class ReadinessProber:
+    """Polls containers' HTTP ports and health status until they serve requests."""
+
+    def __init__(self, docker_manager, timeout=READINESS_TIMEOUT, initial_backoff=INITIAL_BACKOFF,
+                 max_backoff=MAX_BACKOFF, http_timeout=HTTP_TIMEOUT):
+        """
+        Args:
+            docker_manager (DockerManager): Used to inspect container state and read logs.
+            timeout (float): Seconds after a container's start before it is declared not ready.
+            initial_backoff (float): Delay before the second probe.
+            max_backoff (float): Upper bound for the delay between probes.
+            http_timeout (float): Timeout of a single HTTP request.
+        """
+        self.docker_manager = docker_manager
+        self.timeout = timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.http_timeout = http_timeout
+        # Published ports are reached directly; a proxy from HTTP_PROXY cannot reach this machine's localhost
+        self._opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    def target_for(self, container, port, started_at=None, path=None):
+        """
+        Build the ReadinessTarget for a container published on a host port, probing path or its default one.
+
+        Returns None when the daemon's machine is unknown, as for a context whose endpoint cannot be read.
+        """
+        path = path or READINESS_PATHS.get(container, "/")
+        endpoint = self.docker_manager.daemon_endpoint()
+        if endpoint is None:
+            return None
+        host = probe_host_for(endpoint)
+        return ReadinessTarget(container, f"http://{host}:{port}{path}", started_at or time.monotonic())
+
+    def probe_all(self, targets):
+        """Probe several containers at the same time and return their ReadinessResults in order."""
+        if not targets:
+            return []
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            return list(executor.map(self.probe, targets))
+
+    def probe(self, target):
+        """
+        Wait until one container serves HTTP requests and is not unhealthy.
+
+        Returns:
+            ReadinessResult: ready is False on timeout or when the container stopped or turned
+            unhealthy, with a diagnosis explaining why.
+        """
+        deadline = target.started_at + self.timeout
+        delay = self.initial_backoff
+        attempts = 0
+        last_problem = "no probe was made"
+
+        while True:
+            attempts += 1
+            state = self.docker_manager.inspect_container_state(target.container)
+            if state is None:
+                return self._failed(target, attempts, "the container does not exist")
+
+            status = state.get("Status", "")
+            health = (state.get("Health") or {}).get("Status")
+            if status in _FAILED_STATES:
+                return self._failed(target, attempts, f"the container {status} with exit code {state.get('ExitCode')}")
+            if health == "unhealthy":
+                return self._failed(target, attempts, "Docker reports the container as unhealthy")
+
+            served, last_problem = self._check_http(target.url)
+            if served and status == "running":
+                return ReadinessResult(target.container, True, time.monotonic() - target.started_at, attempts, None)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return self._failed(
+                    target, attempts,
+                    f"not ready after {self.timeout:g} seconds (status {status or 'unknown'}, "
+                    f"health {health or 'none'}, last HTTP probe: {last_problem})"
+                )
+            time.sleep(min(delay, remaining))
+            delay = min(delay * BACKOFF_FACTOR, self.max_backoff)
+
+    def _check_http(self, url):
+        """Return (True, None) if anything answers on url without a server error, else (False, reason)."""
+        try:
+            with self._opener.open(url, timeout=self.http_timeout) as response:
+                return True, f"HTTP {response.status}"
+        except urllib.error.HTTPError as e:
+            # A client error still means the server is up and handling requests
+            if e.code < 500:
+                return True, f"HTTP {e.code}"
+            return False, f"HTTP {e.code} from {url}"
+        except (urllib.error.URLError, OSError) as e:
+            reason = getattr(e, "reason", e)
+            return False, f"{url} unreachable ({reason})"
+
+    def _failed(self, target, attempts, reason):
+        """Build a failed result whose diagnosis includes the container's latest log lines."""
+        diagnosis = f"Container '{target.container}' is not ready: {reason}."
+        logs = self.docker_manager.container_logs_tail(target.container)
+        if logs:
+            diagnosis += f"\nLast log lines:\n{logs}"
+        return ReadinessResult(target.container, False, time.monotonic() - target.started_at, attempts, diagnosis)
@@ -0,0 +1,151 @@
+# helpers/registry.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from urllib.parse import urlencode
+
+# Registries reached over plain HTTP, as comma separated host[:port]; localhost always is
+INSECURE_REGISTRIES_ENV = "INSTALLER_INSECURE_REGISTRIES"
+
+# Registry of image names without a registry host, and the host its API is served from
+DOCKER_HUB = "docker.io"
+DOCKER_HUB_API = "registry-1.docker.io"
+
+# Seconds to wait for the registry before a request fails
+REGISTRY_TIMEOUT = 10
+
+# Manifest types accepted; multi-platform indexes come first, as 'docker pull' records their digest
+MANIFEST_TYPES = (
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+)
+
+_CHALLENGE_PATTERN = re.compile(r'(\w+)="([^"]*)"')
+
+# An image reference split into the registry host, repository path and tag
+ImageReference = namedtuple("ImageReference", ["registry", "repository", "tag"])
+
+
+class RegistryError(Exception):
+    """Raised when a registry cannot be reached or does not know an image."""
+
+
+def parse_reference(image):
+    """
+    Split an image reference the way Docker does, e.g. 'containrrr/watchtower' becomes
+    ('docker.io', 'containrrr/watchtower', 'latest') and 'ubuntu' becomes ('docker.io', 'library/ubuntu', 'latest').
+
+    Raises:
+        ValueError: If the reference pins a digest, which has no tag to check.
+    """
+    if "@" in image:
+        raise ValueError(f"'{image}' is pinned to a digest.")
+    name, tag = image, "latest"
+    last_part = image.rsplit("/", 1)[-1]
+    if ":" in last_part:
+        name, tag = image.rsplit(":", 1)
+    first, _, rest = name.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        return ImageReference(first, rest, tag)
+    if not rest:
+        name = f"library/{name}"
+    return ImageReference(DOCKER_HUB, name, tag)
+
+
+class RegistryClient:
+    """Looks up the digest an image tag currently points to, without downloading the image."""
+
+    def __init__(self, timeout=REGISTRY_TIMEOUT, insecure_registries=None):
+        """
+        Args:
+            timeout (float): Socket timeout of every request in seconds.
+            insecure_registries (list): Registries reached over HTTP, defaults to $INSTALLER_INSECURE_REGISTRIES.
+                Registries on localhost or 127.0.0.1 always are, like in Docker.
+        """
+        self.timeout = timeout
+        if insecure_registries is None:
+            insecure_registries = [host.strip() for host in os.environ.get(INSECURE_REGISTRIES_ENV, "").split(",")]
+        self.insecure_registries = {host for host in insecure_registries if host}
+        # Bearer tokens per (registry, repository), reused for every tag of the repository
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def _base_url(self, registry):
+        host = DOCKER_HUB_API if registry == DOCKER_HUB else registry
+        hostname = host.rsplit(":", 1)[0]
+        insecure = hostname in ("localhost", "127.0.0.1") or host in self.insecure_registries
+        return f"{'http' if insecure else 'https'}://{host}"
+
+    def remote_digest(self, image):
+        """
+        Return the digest the registry serves for an image's tag, e.g. 'sha256:4f3e...'.
+
+        Args:
+            image (str): Image reference, e.g. 'ghcr.io/open-webui/open-webui:main'.
+
+        Raises:
+            RegistryError: If the registry is unreachable, refuses access or does not know the tag.
+        """
+        try:
+            reference = parse_reference(image)
+        except ValueError as e:
+            raise RegistryError(str(e)) from e
+        url = f"{self._base_url(reference.registry)}/v2/{reference.repository}/manifests/{reference.tag}"
+        key = (reference.registry, reference.repository)
+
+        for attempt in range(2):
+            headers = {"Accept": ", ".join(MANIFEST_TYPES)}
+            with self._lock:
+                token = self._tokens.get(key)
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            # HEAD does not count against Docker Hub's pull rate limit
+            request = urllib.request.Request(url, headers=headers, method="HEAD")
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    digest = response.headers.get("Docker-Content-Digest")
+                if digest:
+                    return digest
+                return self._digest_from_body(url, headers)
+            except urllib.error.HTTPError as e:
+                challenge = e.headers.get("WWW-Authenticate", "")
+                if e.code == 401 and attempt == 0 and challenge.lower().startswith("bearer "):
+                    self._authenticate(key, challenge, reference.repository)
+                    continue
+                if e.code == 404:
+                    raise RegistryError(f"{image} does not exist in {reference.registry}.") from e
+                raise RegistryError(f"Could not check {image}: HTTP {e.code} from {reference.registry}.") from e
+            except (urllib.error.URLError, OSError) as e:
+                raise RegistryError(f"Could not reach {reference.registry}: {getattr(e, 'reason', e)}") from e
+        raise RegistryError(f"{reference.registry} refused access to {image}.")
+
+    def _digest_from_body(self, url, headers):
+        """Hash the manifest itself, for registries that leave out the Docker-Content-Digest header."""
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout) as response:
+            return "sha256:" + hashlib.sha256(response.read()).hexdigest()
+
+    def _authenticate(self, key, challenge, repository):
+        """Fetch an anonymous pull token from the realm named in a 'Bearer' challenge."""
+        parameters = dict(_CHALLENGE_PATTERN.findall(challenge))
+        realm = parameters.pop("realm", None)
+        if not realm:
+            raise RegistryError(f"The registry sent an authentication challenge without a realm: {challenge}")
+        parameters.setdefault("scope", f"repository:{repository}:pull")
+        try:
+            with urllib.request.urlopen(f"{realm}?{urlencode(parameters)}", timeout=self.timeout) as response:
+                answer = json.load(response)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise RegistryError(f"Could not get a registry token from {realm}: {getattr(e, 'reason', e)}") from e
+        token = answer.get("token") or answer.get("access_token")
+        if not token:
+            raise RegistryError(f"{realm} did not return a token.")
+        with self._lock:
+            self._tokens[key] = token
@@ -0,0 +1,408 @@
+# helpers/resource_monitor.py
+
+import csv
+import json
+import platform
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+from .docker_events import MANAGED_CONTAINERS, MAX_RECONNECT_DELAY, RECONNECT_DELAY
+from .pull_progress import parse_size
+
+# History kept per container as (seconds per point, points): 15 minutes of the samples 'docker stats'
+# produces about once a second, then 3 hours, 24 hours and 30 days of averages. Every level is a
+# fixed-size ring buffer, so memory use stays the same however long the monitor runs.
+RESOLUTIONS = ((1, 900), (10, 1080), (60, 1440), (900, 2880))
+
+# Seconds before a container that could not be inspected for its CPU limit is inspected again
+CPU_LIMIT_RETRY = 30
+
+# Share of the memory limit, or of the CPU limit, above which a container counts as throttled
+MEMORY_PRESSURE = 0.9
+CPU_SATURATION = 0.9
+
+# One point of a container's history. Averaged points hold the mean CPU and memory of their
+# interval, the peaks, and the last value of the cumulative network and block I/O counters.
+ResourceSample = namedtuple("ResourceSample", [
+    "time", "cpu_percent", "cpu_peak", "memory_bytes", "memory_peak", "memory_limit",
+    "net_rx_bytes", "net_tx_bytes", "block_read_bytes", "block_write_bytes", "pids",
+])
+
+
+def _pair(text):
+    # Stopped containers report '--', which counts as 0
+    first, _, second = (text or "").partition("/")
+    return parse_size(first) or 0, parse_size(second) or 0
+
+
+def _stats_entry(line):
+    """Decode one line of 'docker stats --format "{{json .}}"', or return None for lines without stats."""
+    # Each refresh starts with terminal escape codes that clear the screen
+    start = line.find("{")
+    if start < 0:
+        return None
+    try:
+        entry = json.loads(line[start:])
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) and entry.get("Name") else None
+
+
+def _sample_from_entry(entry, now=None):
+    try:
+        cpu_percent = float(entry.get("CPUPerc", "").rstrip("%"))
+    except ValueError:
+        cpu_percent = 0.0
+    memory_bytes, memory_limit = _pair(entry.get("MemUsage"))
+    net_rx, net_tx = _pair(entry.get("NetIO"))
+    block_read, block_write = _pair(entry.get("BlockIO"))
+    pids = entry.get("PIDs", "")
+    return ResourceSample(
+        time=now if now is not None else time.time(), cpu_percent=cpu_percent, cpu_peak=cpu_percent,
+        memory_bytes=memory_bytes, memory_peak=memory_bytes, memory_limit=memory_limit,
+        net_rx_bytes=net_rx, net_tx_bytes=net_tx, block_read_bytes=block_read, block_write_bytes=block_write,
+        pids=int(pids) if pids.isdigit() else 0,
+    )
+
+
+def parse_stats_line(line, now=None):
+    """
+    Parse one line of 'docker stats --format "{{json .}}"'.
+
+    Returns:
+        tuple: (container name, ResourceSample), or None for lines without stats.
+    """
+    entry = _stats_entry(line)
+    if entry is None:
+        return None
+    return entry["Name"], _sample_from_entry(entry, now)
+
+
+class _Aggregate:
+    """Running average of the samples falling into one interval of a coarser resolution."""
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.cpu_total = 0.0
+        self.memory_total = 0
+        self.cpu_peak = 0.0
+        self.memory_peak = 0
+        self.last = None
+
+    def add(self, sample):
+        self.count += 1
+        self.cpu_total += sample.cpu_percent
+        self.memory_total += sample.memory_bytes
+        self.cpu_peak = max(self.cpu_peak, sample.cpu_peak)
+        self.memory_peak = max(self.memory_peak, sample.memory_peak)
+        self.last = sample
+
+    def sample(self):
+        return self.last._replace(
+            time=self.start, cpu_percent=self.cpu_total / self.count, cpu_peak=self.cpu_peak,
+            memory_bytes=self.memory_total // self.count, memory_peak=self.memory_peak,
+        )
+
+
+class ResourceHistory:
+    """
+    Thread-safe per-container history of ResourceSamples at several resolutions.
+
+    Every sample goes into the finest ring buffer as it is, and into a running average for each
+    coarser resolution, which is appended to that resolution's ring buffer when its interval ends.
+    """
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        """
+        Args:
+            resolutions (tuple): (seconds per point, points) pairs, finest first.
+        """
+        self.resolutions = tuple(resolutions)
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._aggregates = {}
+
+    def add(self, container, sample):
+        with self._lock:
+            if container not in self._buffers:
+                self._buffers[container] = [deque(maxlen=points) for _, points in self.resolutions]
+                self._aggregates[container] = [None] * len(self.resolutions)
+            buffers, aggregates = self._buffers[container], self._aggregates[container]
+            buffers[0].append(sample)
+            for level, (seconds, _) in enumerate(self.resolutions[1:], start=1):
+                start = sample.time - sample.time % seconds
+                aggregate = aggregates[level]
+                if aggregate is not None and aggregate.start != start:
+                    buffers[level].append(aggregate.sample())
+                    aggregate = None
+                if aggregate is None:
+                    aggregate = aggregates[level] = _Aggregate(start)
+                aggregate.add(sample)
+
+    def containers(self):
+        with self._lock:
+            return sorted(self._buffers)
+
+    def latest(self, container):
+        """Return the newest sample of a container, or None."""
+        with self._lock:
+            buffers = self._buffers.get(container)
+            return buffers[0][-1] if buffers and buffers[0] else None
+
+    def samples(self, container, resolution=None):
+        """
+        Return a container's history at one resolution, oldest first.
+
+        Args:
+            container (str): Container name.
+            resolution (int): Seconds per point, one of RESOLUTIONS; defaults to the finest.
+                Averaged resolutions end with the interval still in progress.
+        """
+        with self._lock:
+            if container not in self._buffers:
+                return []
+            level = self._level(resolution)
+            samples = list(self._buffers[container][level])
+            aggregate = self._aggregates[container][level]
+            if aggregate is not None:
+                samples.append(aggregate.sample())
+            return samples
+
+    def _level(self, resolution):
+        if resolution is None:
+            return 0
+        for level, (seconds, _) in enumerate(self.resolutions):
+            if seconds == resolution:
+                return level
+        raise ValueError(f"No history is kept at {resolution} seconds per point.")
+
+    def resolution_for(self, seconds):
+        """Return the finest resolution whose history spans the given number of seconds, or the coarsest."""
+        for resolution, points in self.resolutions:
+            if resolution * points >= seconds:
+                return resolution
+        return self.resolutions[-1][0]
+
+    def recent(self, container, seconds):
+        """Return the samples of the last given seconds, at the finest resolution that reaches back that far."""
+        since = time.time() - seconds
+        samples = self.samples(container, self.resolution_for(seconds))
+        return [sample for sample in samples if sample.time >= since]
+
+
+def summarize(samples, cpu_limit=None):
+    """
+    Summarize a stretch of history and flag resource limits that hold a container back.
+
+    Args:
+        samples (list): ResourceSamples, oldest first.
+        cpu_limit (float): The container's --cpus limit, if it has one.
+
+    Returns:
+        dict: Mean and peak CPU and memory, I/O during the stretch, and a list of warnings.
+    """
+    if not samples:
+        return None
+    first, last = samples[0], samples[-1]
+    cpu_mean = sum(sample.cpu_percent for sample in samples) / len(samples)
+    memory_peak = max(sample.memory_peak for sample in samples)
+    summary = {
+        "samples": len(samples),
+        "cpu_mean": cpu_mean,
+        "cpu_peak": max(sample.cpu_peak for sample in samples),
+        "memory_mean": sum(sample.memory_bytes for sample in samples) // len(samples),
+        "memory_peak": memory_peak,
+        "memory_limit": last.memory_limit,
+        # Counters start again from 0 when a container restarts
+        "net_rx_bytes": max(0, last.net_rx_bytes - first.net_rx_bytes),
+        "net_tx_bytes": max(0, last.net_tx_bytes - first.net_tx_bytes),
+        "block_read_bytes": max(0, last.block_read_bytes - first.block_read_bytes),
+        "block_write_bytes": max(0, last.block_write_bytes - first.block_write_bytes),
+        "warnings": [],
+    }
+    if last.memory_limit and memory_peak >= MEMORY_PRESSURE * last.memory_limit:
+        summary["warnings"].append(
+            f"memory peaked at {memory_peak / last.memory_limit:.0%} of its {last.memory_limit / 1024 ** 3:.1f} GiB limit"
+        )
+    # docker stats reports 100% per fully used CPU
+    if cpu_limit and cpu_mean >= CPU_SATURATION * cpu_limit * 100:
+        summary["warnings"].append(f"CPU averaged {cpu_mean:.0f}% against its limit of {cpu_limit:g} CPUs")
+    return summary
+
+
+def _rows(history):
+    for container in history.containers():
+        for resolution, _ in history.resolutions:
+            for sample in history.samples(container, resolution):
+                yield container, resolution, sample
+
+
+def export_csv(history, path):
+    """Write every resolution of every container's history to a CSV file, one row per point."""
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["container", "resolution_seconds", "timestamp"] + list(ResourceSample._fields))
+        for container, resolution, sample in _rows(history):
+            timestamp = datetime.fromtimestamp(sample.time).isoformat(timespec="seconds")
+            writer.writerow([container, resolution, timestamp] + list(sample))
+
+
+def export_json(history, path):
+    """Write the history as {"resolutions": [...], "containers": {name: {seconds: [sample, ...]}}}."""
+    containers = {}
+    for container, resolution, sample in _rows(history):
+        containers.setdefault(container, {}).setdefault(str(resolution), []).append(sample._asdict())
+    with open(path, "w", encoding="utf-8") as json_file:
+        json.dump({"resolutions": [list(level) for level in history.resolutions], "containers": containers}, json_file)
+
+
+class ResourceMonitor:
+    """Background thread that follows 'docker stats' and records the managed containers' resource use."""
+
+    def __init__(self, docker_manager, container_names=MANAGED_CONTAINERS, history=None,
+                 reconnect_delay=RECONNECT_DELAY, max_reconnect_delay=MAX_RECONNECT_DELAY):
+        """
+        Args:
+            docker_manager (DockerManager): Provides logging, the command environment and container details.
+            container_names (tuple): Containers whose samples are recorded.
+            history (ResourceHistory): Where samples are recorded, a new one by default.
+            reconnect_delay (float): Initial delay before restarting 'docker stats' after it ends.
+            max_reconnect_delay (float): Upper bound for the reconnect delay.
+        """
+        self.docker_manager = docker_manager
+        self.container_names = tuple(container_names)
+        self.history = history or ResourceHistory()
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        # Container name -> (ID in the stats stream, --cpus limit), and (ID, time.monotonic()) of failed inspections
+        self._cpu_limits = {}
+        self._failed_inspections = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._process = None
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Register callback(container_name, sample) to be called from the monitor thread on every sample."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self):
+        """Start monitoring in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="docker-stats", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop monitoring and terminate the 'docker stats' process."""
+        self._stop_event.set()
+        process = self._process
+        if process and process.poll() is None:
+            process.terminate()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def cpu_limit(self, container_name):
+        """Return the --cpus limit of a container, or None if it has none or has not been inspected yet."""
+        with self._lock:
+            _, limit = self._cpu_limits.get(container_name, (None, None))
+            return limit
+
+    def _inspect_cpu_limit(self, container_name, container_id):
+        """
+        Read a container's --cpus limit on the monitor thread, as inspecting spawns docker.
+
+        The limit is read again when the container's ID changes, i.e. after it was recreated with
+        other settings. A failed inspection is retried after CPU_LIMIT_RETRY seconds, not on every sample.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._cpu_limits.get(container_name, (None, None))[0] == container_id:
+                return
+            failed_id, failed_at = self._failed_inspections.get(container_name, (None, None))
+            if failed_id == container_id and now - failed_at < CPU_LIMIT_RETRY:
+                return
+        details = self.docker_manager.inspect_container(container_name)
+        with self._lock:
+            if not details:
+                self._failed_inspections[container_name] = (container_id, now)
+                # The limit of a container that was replaced no longer applies
+                self._cpu_limits.pop(container_name, None)
+                return
+            nano_cpus = (details.get("HostConfig") or {}).get("NanoCpus") or 0
+            self._cpu_limits[container_name] = (container_id, nano_cpus / 1e9 or None)
+            self._failed_inspections.pop(container_name, None)
+
+    def summary(self, container_name, seconds):
+        """Return summarize() of the last given seconds of a container, or None without samples."""
+        samples = self.history.recent(container_name, seconds)
+        return summarize(samples, self.cpu_limit(container_name)) if samples else None
+
+    def _watch(self):
+        delay = self.reconnect_delay
+        while not self._stop_event.is_set():
+            connected_at = time.monotonic()
+            self._follow_stats()
+            if self._stop_event.is_set():
+                break
+
+            # Reset the backoff if the stream was healthy for a while before it ended
+            if time.monotonic() - connected_at > self.max_reconnect_delay:
+                delay = self.reconnect_delay
+            self.docker_manager.log(
+                f"Docker stats stream ended, restarting in {delay:g} seconds.", output_mode="file"
+            )
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _follow_stats(self):
+        """Run one 'docker stats' session until it ends or the monitor is stopped."""
+        # Without names, docker stats follows every running container, including ones started later
+        command = ["docker", "stats", "--format", "{{json .}}"]
+
+        popen_kwargs = {}
+        if platform.system() == "Windows":
+            popen_kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        try:
+            self._process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1,
+                env=self.docker_manager.command_env, **popen_kwargs
+            )
+        except OSError as e:
+            self.docker_manager.log(f"Could not start 'docker stats': {e}", output_mode="file")
+            return
+
+        try:
+            for line in self._process.stdout:
+                if self._stop_event.is_set():
+                    break
+                self._handle_line(line)
+        finally:
+            if self._process.poll() is None:
+                self._process.terminate()
+            self._process.wait()
+
+    def _handle_line(self, line):
+        entry = _stats_entry(line)
+        if entry is None or entry["Name"] not in self.container_names:
+            return
+        name, sample = entry["Name"], _sample_from_entry(entry)
+        self._inspect_cpu_limit(name, entry.get("ID", ""))
+        self.history.add(name, sample)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(name, sample)
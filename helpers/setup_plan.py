@@ -0,0 +1,236 @@
+# helpers/setup_plan.py
+
+import hashlib
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Label holding the hash of the spec a container was created from
+SPEC_HASH_LABEL = "org.openwebui.installer.spec-hash"
+
+# Plan actions, from least to most work
+SKIP = "skip"
+START = "start"
+CREATE = "create"
+RECREATE = "recreate"
+
+# What to do with one container and why. depends_on lists the names of containers in the same
+# plan that must be up before this one is touched.
+PlanStep = namedtuple("PlanStep", ["spec", "action", "reason", "depends_on"])
+
+# Outcome of one step. started_at is the time.monotonic() value at which the container was up.
+StepResult = namedtuple("StepResult", ["step", "ok", "started_at"])
+
+
+def spec_hash(spec):
+    """Return a short hash of everything in a spec that ends up in its 'docker run' command."""
+    settings = spec.to_dict()
+    settings.pop("depends_on", None)
+    if "labels" in settings:
+        settings["labels"] = {key: value for key, value in settings["labels"].items() if key != SPEC_HASH_LABEL}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def with_spec_hash(spec):
+    """Return a copy of the spec labelled with its hash, so a later plan can tell whether it changed."""
+    return spec.with_overrides(labels={SPEC_HASH_LABEL: spec_hash(spec)})
+
+
+def _port_bindings(ports):
+    """Return '-p' values as a set of (container_port, host_ip, host_port) tuples, as 'docker inspect' reports them."""
+    bindings = set()
+    for port in ports:
+        parts = port.split(":")
+        container_port = parts[-1] if "/" in parts[-1] else parts[-1] + "/tcp"
+        host_ip = parts[-3] if len(parts) > 2 else ""
+        host_port = parts[-2] if len(parts) > 1 else ""
+        bindings.add((container_port, _any_address(host_ip), host_port))
+    return bindings
+
+
+def _any_address(host_ip):
+    """Docker reports a port published on every address with either an empty or the 0.0.0.0 host IP."""
+    return "" if host_ip in (None, "0.0.0.0") else host_ip
+
+
+def matches_container(spec, details):
+    """
+    Tell whether an existing container has the settings of a spec, judged from its 'docker inspect' output.
+
+    Used for containers created without a spec hash, e.g. by an earlier version of the installer.
+    Image name, environment, labels, ports, volumes, extra hosts, restart policy, GPUs and command
+    are compared. The performance knobs are not reported by 'docker inspect' in the form a spec
+    holds them, so a spec that sets any of them never matches.
+
+    Args:
+        spec (ContainerSpec): The desired container.
+        details (dict): The container's 'docker inspect' output.
+
+    Returns:
+        bool: True if the container can be kept as it is.
+    """
+    if spec.cpus is not None or spec.memory or spec.shm_size or spec.ulimits:
+        return False
+    config = details.get("Config") or {}
+    host_config = details.get("HostConfig") or {}
+    labels = config.get("Labels") or {}
+    env = set(config.get("Env") or [])
+    published = {
+        (container_port, _any_address(binding.get("HostIp")), binding.get("HostPort") or "")
+        for container_port, bindings in (host_config.get("PortBindings") or {}).items()
+        for binding in bindings or []
+    }
+    return (
+        config.get("Image") == spec.image
+        # The image adds variables and labels of its own
+        and all(f"{key}={value}" in env for key, value in spec.environment().items())
+        and all(labels.get(key) == value for key, value in spec.labels.items() if key != SPEC_HASH_LABEL)
+        and published == _port_bindings(spec.ports)
+        and set(host_config.get("Binds") or []) == set(spec.volumes)
+        and set(host_config.get("ExtraHosts") or []) == set(spec.extra_hosts)
+        and ((host_config.get("RestartPolicy") or {}).get("Name") or "no") == (spec.restart or "no")
+        and bool(host_config.get("DeviceRequests")) == bool(spec.gpus)
+        # Without a command the image's default is used, which inspect cannot tell apart
+        and (not spec.command or config.get("Cmd") == list(spec.command))
+    )
+
+
+def diff_container(spec, details, image_id):
+    """
+    Compare a desired spec to the container that exists under its name.
+
+    A container without a spec hash is kept when matches_container() finds its settings equal to
+    the spec. Docker cannot add a label to an existing container, so such a container stays
+    unlabelled and is compared again on every plan until it is recreated for another reason.
+
+    Args:
+        spec (ContainerSpec): The desired container.
+        details (dict | None): The container's 'docker inspect' output, None if it does not exist.
+        image_id (str | None): ID of the local image the spec names, None if unknown.
+
+    Returns:
+        tuple: (action, reason).
+    """
+    if details is None:
+        return CREATE, "not present"
+
+    labels = (details.get("Config") or {}).get("Labels") or {}
+    current_hash = labels.get(SPEC_HASH_LABEL)
+    if current_hash is None:
+        if not matches_container(spec, details):
+            return RECREATE, "created without a spec hash, settings differ"
+    elif current_hash != spec_hash(spec):
+        return RECREATE, "settings changed"
+    if image_id and details.get("Image") != image_id:
+        return RECREATE, "a newer image is available"
+
+    if (details.get("State") or {}).get("Status") != "running":
+        return START, "stopped"
+    if current_hash is None:
+        return SKIP, "up to date, created without a spec hash"
+    return SKIP, "up to date"
+
+
+class SetupPlan:
+    """Brings a set of containers to their desired state, starting independent containers in parallel."""
+
+    def __init__(self, docker_manager, specs):
+        """
+        Args:
+            docker_manager (DockerManager): Used to inspect, remove, start and run containers.
+            specs (list): ContainerSpecs to set up. Dependencies on containers outside this list are ignored.
+
+        Raises:
+            ValueError: If two specs share a name or the dependencies form a cycle.
+        """
+        self.docker_manager = docker_manager
+        self.specs = list(specs)
+        names = [spec.name for spec in self.specs]
+        if len(set(names)) != len(names):
+            raise ValueError("Container names in a setup plan must be unique.")
+        self._depends_on = {spec.name: [name for name in spec.depends_on if name in names] for spec in self.specs}
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = dict(self._depends_on)
+        while remaining:
+            ready = [name for name, depends_on in remaining.items() if not set(depends_on) & set(remaining)]
+            if not ready:
+                raise ValueError(f"Container dependencies form a cycle: {', '.join(sorted(remaining))}.")
+            for name in ready:
+                del remaining[name]
+
+    def build(self):
+        """
+        Compare every spec to the container running under its name.
+
+        Returns:
+            list: PlanSteps in spec order.
+        """
+        def plan_step(spec):
+            details = self.docker_manager.inspect_container(spec.name)
+            image_id = self.docker_manager.image_id(spec.image) if details is not None else None
+            action, reason = diff_container(spec, details, image_id)
+            return PlanStep(spec, action, reason, self._depends_on[spec.name])
+
+        with self.docker_manager.step("plan"):
+            with ThreadPoolExecutor(max_workers=max(1, len(self.specs))) as executor:
+                return list(executor.map(plan_step, self.specs))
+
+    def execute(self, steps, progress_callback=None):
+        """
+        Carry out a plan. Each step starts as soon as the steps it depends on have succeeded;
+        steps whose dependencies failed are not attempted.
+
+        Args:
+            steps (list): PlanSteps from build().
+            progress_callback (callable): Called with a PullProgress event for each layer update.
+
+        Returns:
+            dict: Maps container names to StepResults.
+        """
+        results = {}
+        pending = {step.spec.name: step for step in steps}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, len(steps))) as executor:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    in_progress = set(pending) | set(running.values())
+                    if in_progress & set(step.depends_on):
+                        continue
+                    del pending[name]
+                    failed = [dependency for dependency in step.depends_on if not results[dependency].ok]
+                    if failed:
+                        self.docker_manager.log(
+                            f"Not setting up '{name}' because {', '.join(failed)} failed.", output_mode="both"
+                        )
+                        results[name] = StepResult(step, False, None)
+                    else:
+                        running[executor.submit(self._apply, step, progress_callback)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return results
+
+    def _apply(self, step, progress_callback):
+        """Carry out one step and return its StepResult."""
+        spec = with_spec_hash(step.spec)
+        manager = self.docker_manager
+        if step.action == SKIP:
+            ok = True
+        elif step.action == START:
+            ok = manager.start_container(spec.name)
+        elif step.action == RECREATE:
+            ok = manager.remove_container(spec.name) and manager.run_container(spec, progress_callback)
+        else:
+            ok = manager.run_container(spec, progress_callback)
+        return StepResult(step, ok, time.monotonic() if ok else None)
+
+
+def format_plan(steps):
+    """Return a one-line summary of a plan, e.g. 'open-webui: skip (up to date), pipelines: create (not present)'."""
+    return ", ".join(f"{step.spec.name}: {step.action} ({step.reason})" for step in steps)
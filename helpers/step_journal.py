@@ -0,0 +1,104 @@
+# helpers/step_journal.py
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+# File recording completed install steps, so reruns can skip them
+JOURNAL_ENV = "INSTALLER_JOURNAL"
+DEFAULT_JOURNAL_PATH = "./state/install_journal.json"
+
+JOURNAL_VERSION = 1
+
+
+class JournalError(Exception):
+    """Raised when the journal file cannot be written."""
+
+
+class StepJournal:
+    """
+    On-disk record of completed steps and a fingerprint of what each one left behind.
+
+    A fingerprint is a short string that can be recomputed cheaply, such as an installed package
+    version. A step is skipped on a later run only while its recomputed fingerprint still matches
+    the recorded one, so a journal that no longer reflects the machine never hides work.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        """
+        Args:
+            path (str): The journal file, created with its directory on the first completed step.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._steps = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as journal_file:
+                data = json.load(journal_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != JOURNAL_VERSION:
+            return {}
+        return data.get("steps", {})
+
+    def _write(self):
+        """
+        Replace the journal file atomically, so a crash mid-write keeps the previous version. Called with the lock held.
+
+        Raises:
+            JournalError: If the file cannot be written, e.g. on a full disk or a read-only directory.
+        """
+        directory = os.path.dirname(self.path) or "."
+        temporary_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            descriptor, temporary_path = tempfile.mkstemp(prefix=".journal-", dir=directory)
+            with os.fdopen(descriptor, "w", encoding="utf-8") as journal_file:
+                json.dump({"version": JOURNAL_VERSION, "steps": self._steps}, journal_file, indent=2)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            if temporary_path is not None and os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise JournalError(f"Could not write the install journal {self.path}: {e}") from e
+
+    def get(self, name):
+        """Return the recorded fingerprint of a step, or None if it has not completed."""
+        with self._lock:
+            entry = self._steps.get(name)
+        return entry["fingerprint"] if entry else None
+
+    def steps(self):
+        """Return {step name: {"fingerprint", "completed_at"}} for every completed step."""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._steps.items()}
+
+    def record(self, name, fingerprint):
+        """
+        Mark a step as completed with the given fingerprint.
+
+        Raises:
+            JournalError: If the file cannot be written.
+        """
+        with self._lock:
+            self._steps[name] = {"fingerprint": fingerprint, "completed_at": datetime.now().isoformat(timespec="seconds")}
+            self._write()
+
+    def forget(self, name=None):
+        """
+        Drop the record of one step, or of every step when name is None.
+
+        Raises:
+            JournalError: If the file cannot be written.
+        """
+        with self._lock:
+            if name is None:
+                self._steps.clear()
+            elif self._steps.pop(name, None) is None:
+                return
+            self._write()
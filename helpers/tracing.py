@@ -0,0 +1,195 @@
+# helpers/tracing.py
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# Directory for trace files; tracing is off when it is not set
+TRACE_DIR_ENV = "INSTALLER_TRACE_DIR"
+
+# Quantiles reported for every span name in the Prometheus summary
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Span:
+    """One timed operation. Attributes can be added until the span ends."""
+
+    __slots__ = ("name", "category", "attributes", "started_at", "duration", "thread_id")
+
+    def __init__(self, name, category, attributes, started_at, thread_id):
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.started_at = started_at
+        self.duration = None
+        self.thread_id = thread_id
+
+    def set(self, **attributes):
+        """Add attributes, such as a return code only known at the end."""
+        self.attributes.update(attributes)
+
+
+class _NullSpan:
+    """Span handed out while tracing is off; entering, leaving and set() do nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Records timed spans of installer steps and commands, exportable as a Chrome trace or Prometheus text."""
+
+    def __init__(self, enabled=True):
+        """
+        Args:
+            enabled (bool): Record spans. A disabled tracer hands out a shared no-op span.
+        """
+        self.enabled = enabled
+        self._spans = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def span(self, name, category="step", **attributes):
+        """
+        Time the enclosed block.
+
+        Args:
+            name (str): Operation name, e.g. 'pull' or 'docker run'.
+            category (str): Kind of operation: 'step', 'command' or 'status'.
+            **attributes: Details stored with the span.
+
+        Returns:
+            A context manager yielding the span, whose set() adds attributes.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._record(name, category, attributes)
+
+    @contextmanager
+    def _record(self, name, category, attributes):
+        span = Span(name, category, attributes, time.perf_counter(), threading.get_ident())
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.started_at
+            with self._lock:
+                self._spans.append(span)
+
+    def spans(self):
+        """Return the finished spans in the order they ended."""
+        with self._lock:
+            return list(self._spans)
+
+    def chrome_trace(self):
+        """Return the spans as a Chrome trace-event document, viewable in chrome://tracing or Perfetto."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.started_at - self._origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {key: _json_value(value) for key, value in span.attributes.items()},
+            }
+            for span in self.spans()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def prometheus_summary(self):
+        """Return span durations, command output sizes and failures in the Prometheus text format."""
+        durations = defaultdict(list)
+        output_bytes = defaultdict(int)
+        failures = defaultdict(int)
+        for span in self.spans():
+            key = (span.category, span.name)
+            durations[key].append(span.duration)
+            output_bytes[key] += span.attributes.get("output_bytes", 0)
+            if span.attributes.get("returncode") or "error" in span.attributes:
+                failures[key] += 1
+
+        lines = [
+            "# HELP installer_span_duration_seconds Time spent in installer steps, status checks and docker commands.",
+            "# TYPE installer_span_duration_seconds summary",
+        ]
+        for key, values in sorted(durations.items()):
+            labels = _labels(*key)
+            values.sort()
+            for quantile in SUMMARY_QUANTILES:
+                value = values[min(len(values) - 1, int(quantile * len(values)))]
+                lines.append(f'installer_span_duration_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+            lines.append(f"installer_span_duration_seconds_sum{{{labels}}} {sum(values):.6f}")
+            lines.append(f"installer_span_duration_seconds_count{{{labels}}} {len(values)}")
+
+        lines += [
+            "# HELP installer_command_output_bytes_total Bytes of output read from commands.",
+            "# TYPE installer_command_output_bytes_total counter",
+        ]
+        lines += [
+            f"installer_command_output_bytes_total{{{_labels(*key)}}} {total}"
+            for key, total in sorted(output_bytes.items()) if key[0] == "command"
+        ]
+        lines += [
+            "# HELP installer_span_failures_total Spans that ended with an error or a non-zero return code.",
+            "# TYPE installer_span_failures_total counter",
+        ]
+        lines += [f"installer_span_failures_total{{{_labels(*key)}}} {count}" for key, count in sorted(failures.items())]
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory):
+        """
+        Write a Chrome trace and a Prometheus summary into directory.
+
+        Returns:
+            tuple: Paths of the trace file and the metrics file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        trace_path = os.path.join(directory, f"trace_{timestamp}.json")
+        metrics_path = os.path.join(directory, f"metrics_{timestamp}.prom")
+        with open(trace_path, "w", encoding="utf-8") as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
+        with open(metrics_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.prometheus_summary())
+        return trace_path, metrics_path
+
+
+# Tracer used when none is given; records nothing
+NULL_TRACER = Tracer(enabled=False)
+
+
+def _json_value(value):
+    """Make an attribute JSON friendly, joining argument lists into one string."""
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(category, name):
+    return f'category="{_escape(category)}",name="{_escape(name)}"'
@@ -0,0 +1,432 @@
+# helpers/volume_snapshot.py
+
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .docker_events import MANAGED_CONTAINERS
+
+# Directory of volume snapshots, one subdirectory per volume
+SNAPSHOT_DIR_ENV = "INSTALLER_SNAPSHOT_DIR"
+SNAPSHOT_DIR = "./snapshots"
+
+# Named volumes mounted by the flavors and the pipelines container
+MANAGED_VOLUMES = ("open-webui", "ollama", "pipelines")
+
+# Small image whose GNU tar and find read and write the volume contents; busybox find has no -printf
+HELPER_IMAGE = "debian:bookworm-slim"
+
+# Where the helper container mounts the volume
+MOUNT_POINT = "/volume"
+
+# Directory inside the volume that a restore extracts into before it replaces the contents
+STAGING_DIR = ".snapshot-restore"
+
+# gzip level of the archives; model blobs barely compress, so the fastest level loses little
+COMPRESSION_LEVEL = 1
+
+# Blocks compressed at the same time; zlib releases the GIL, so threads use several cores
+COMPRESSION_THREADS = max(1, min(8, os.cpu_count() or 1))
+
+# Bytes compressed as one gzip member. The members are concatenated into a standard .tar.gz.
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# Bytes read from the helper container or an archive at a time
+CHUNK_SIZE = 1024 * 1024
+
+ARCHIVE_FILE = "data.tar.gz"
+MANIFEST_FILE = "manifest.json"
+
+# One snapshot of a volume. files maps every file in the volume ('./path') to [size, mtime];
+# archived lists the files in the archive, or is None when a full snapshot archived all of them.
+# base is the id of the snapshot an incremental one builds on.
+Snapshot = namedtuple(
+    "Snapshot", ["volume", "id", "base", "created", "files", "archived", "archive_size", "sha256", "path"]
+)
+
+
+class SnapshotError(Exception):
+    """Raised when a volume cannot be archived or restored."""
+
+
+class ParallelGzipWriter:
+    """
+    File-like writer that gzips fixed-size blocks on several threads.
+
+    Each block becomes its own gzip member and members are written in order, which any gzip
+    reader (including 'tar -xzf') reads as one stream. At most two blocks per thread are held
+    in memory, so the archive streams to disk without a full-size copy anywhere.
+    """
+
+    def __init__(self, file, level=COMPRESSION_LEVEL, threads=COMPRESSION_THREADS, block_size=BLOCK_SIZE):
+        """
+        Args:
+            file: Binary file object receiving the compressed stream.
+            level (int): gzip compression level.
+            threads (int): Blocks compressed at the same time.
+            block_size (int): Uncompressed bytes per gzip member.
+        """
+        self.file = file
+        self.level = level
+        self.block_size = block_size
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._pending = deque()
+        self._max_pending = threads * 2
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            block = bytes(self._buffer[:self.block_size])
+            del self._buffer[:self.block_size]
+            self._submit(block)
+
+    def _submit(self, block):
+        if len(self._pending) >= self._max_pending:
+            self._write_out(self._pending.popleft().result())
+        self._pending.append(self._executor.submit(gzip.compress, block, self.level, mtime=0))
+
+    def _write_out(self, compressed):
+        self.file.write(compressed)
+        self.sha256.update(compressed)
+        self.size += len(compressed)
+
+    def close(self):
+        """Compress what is left and wait until every block is written."""
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._write_out(self._pending.popleft().result())
+        self._executor.shutdown()
+
+
+def _null_separated(paths):
+    """Encode file names for 'tar --null -T' and 'xargs -0', keeping any undecodable bytes of the index."""
+    return b"".join(path.encode(errors="surrogateescape") + b"\0" for path in paths)
+
+
+def _hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class VolumeSnapshots:
+    """
+    Snapshots of Docker volumes, streamed through a helper container into compressed archives.
+
+    A snapshot is a directory holding data.tar.gz and manifest.json; the manifest is written last,
+    so an interrupted snapshot is never listed. Incremental snapshots archive only the files whose
+    size or modification time changed since the previous snapshot, which skips the large, never
+    changing model blobs of the ollama volume.
+    """
+
+    def __init__(self, docker_manager, directory=SNAPSHOT_DIR, level=COMPRESSION_LEVEL,
+                 threads=COMPRESSION_THREADS, helper_image=HELPER_IMAGE):
+        """
+        Args:
+            docker_manager (DockerManager): Runs the helper containers and stops and starts the
+                containers using a volume.
+            directory (str): Snapshot directory.
+            level (int): gzip compression level.
+            threads (int): Compression threads.
+            helper_image (str): Image of the helper containers; it needs sh, xargs, GNU tar and GNU find.
+        """
+        self.docker_manager = docker_manager
+        self.directory = directory
+        self.level = level
+        self.threads = threads
+        self.helper_image = helper_image
+
+    def list(self, volume):
+        """Return the complete snapshots of a volume, oldest first."""
+        volume_dir = os.path.join(self.directory, volume)
+        try:
+            names = sorted(os.listdir(volume_dir))
+        except FileNotFoundError:
+            return []
+        snapshots = []
+        for name in names:
+            snapshot = self._read_manifest(os.path.join(volume_dir, name))
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        return snapshots
+
+    def get(self, volume, snapshot_id=None):
+        """Return a snapshot of a volume by id, or the latest one. None if there is no such snapshot."""
+        snapshots = self.list(volume)
+        if snapshot_id is None:
+            return snapshots[-1] if snapshots else None
+        return next((snapshot for snapshot in snapshots if snapshot.id == snapshot_id), None)
+
+    @staticmethod
+    def new_id():
+        """Return an id for snapshots taken now; snapshots of several volumes taken together share it."""
+        return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    def _read_manifest(self, path):
+        try:
+            with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+            return Snapshot(path=path, **manifest)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def volume_exists(self, volume):
+        return self._docker(["volume", "inspect", volume]).returncode == 0
+
+    def _docker(self, args, stdin=None):
+        """Run a short docker command and return the CompletedProcess with text output."""
+        return subprocess.run(
+            ["docker"] + args, input=stdin, capture_output=True, text=True, env=self.docker_manager.command_env
+        )
+
+    def _helper(self, volume, script, read_only=False):
+        """Return the argv of a helper container running a shell script with the volume at MOUNT_POINT."""
+        mount = f"{volume}:{MOUNT_POINT}" + (":ro" if read_only else "")
+        return ["docker", "run", "--rm", "-i", "-v", mount, self.helper_image, "sh", "-c", script]
+
+    def _index(self, volume):
+        """Return {'./path': [size, mtime]} of every regular file in a volume."""
+        # NUL-terminated records, since file names may contain newlines and spaces
+        script = f"cd {MOUNT_POINT} && find . -type f -printf '%s %T@ %p\\0'"
+        result = subprocess.run(
+            self._helper(volume, script, read_only=True), capture_output=True, env=self.docker_manager.command_env
+        )
+        if result.returncode != 0:
+            error_text = result.stderr.decode(errors="replace").strip()
+            raise SnapshotError(f"Could not list the files of volume '{volume}': {error_text}")
+        files = {}
+        for record in result.stdout.decode(errors="surrogateescape").split("\0"):
+            parts = record.split(" ", 2)
+            try:
+                files[parts[2]] = [int(parts[0]), float(parts[1])]
+            except (IndexError, ValueError):
+                # The empty string after the last record, or a line that is not a record
+                continue
+        return files
+
+    def _volume_users(self, volume):
+        """Return the names of the running managed containers that mount a volume."""
+        users = []
+        for name in MANAGED_CONTAINERS:
+            details = self.docker_manager.inspect_container(name)
+            if not details or (details.get("State") or {}).get("Status") != "running":
+                continue
+            if any(mount.get("Name") == volume for mount in details.get("Mounts") or []):
+                users.append(name)
+        return users
+
+    def create(self, volume, snapshot_id=None, incremental=True, stop_containers=False):
+        """
+        Archive a volume.
+
+        Args:
+            volume (str): Name of the volume.
+            snapshot_id (str): Id of the snapshot, defaults to new_id().
+            incremental (bool): Archive only files changed since the latest snapshot of the volume.
+                The first snapshot of a volume is always full.
+            stop_containers (bool): Stop the containers using the volume while it is read, for a
+                consistent copy of databases. They are started again afterwards.
+
+        Returns:
+            Snapshot: The new snapshot.
+
+        Raises:
+            SnapshotError: If the volume cannot be read or the archive cannot be written.
+        """
+        base = self.get(volume) if incremental else None
+        snapshot_id = snapshot_id or self.new_id()
+        path = os.path.join(self.directory, volume, snapshot_id)
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            raise SnapshotError(f"Snapshot {snapshot_id} of volume '{volume}' already exists.")
+
+        stopped = self._volume_users(volume) if stop_containers else []
+        with self.docker_manager.step("snapshot", container=volume):
+            try:
+                for name in stopped:
+                    self.docker_manager.stop_container(name)
+                files = self._index(volume)
+                if base is None:
+                    archived = None
+                    script = f"tar -C {MOUNT_POINT} -cf - ."
+                else:
+                    archived = sorted(file for file, stat in files.items() if base.files.get(file) != stat)
+                    # The file list arrives on stdin and is read completely before tar writes anything
+                    script = f"cat > /tmp/files && tar -C {MOUNT_POINT} -cf - --null -T /tmp/files"
+                os.makedirs(path, exist_ok=True)
+                archive_size, sha256 = self._write_archive(volume, script, archived, os.path.join(path, ARCHIVE_FILE))
+            finally:
+                for name in stopped:
+                    self.docker_manager.start_container(name)
+
+            manifest = {
+                "volume": volume, "id": snapshot_id, "base": base.id if base else None,
+                "created": datetime.now().isoformat(timespec="seconds"), "files": files, "archived": archived,
+                "archive_size": archive_size, "sha256": sha256,
+            }
+            temporary_path = os.path.join(path, MANIFEST_FILE + ".tmp")
+            with open(temporary_path, "w", encoding="utf-8") as manifest_file:
+                json.dump(manifest, manifest_file)
+            os.replace(temporary_path, os.path.join(path, MANIFEST_FILE))
+
+        snapshot = Snapshot(path=path, **manifest)
+        kind = "full" if base is None else f"incremental on {base.id}, {len(archived)} of {len(files)} files"
+        self.docker_manager.log(
+            f"Snapshot {snapshot_id} of volume '{volume}' written ({kind}, {archive_size / 1000 ** 2:.1f} MB).",
+            output_mode="both"
+        )
+        return snapshot
+
+    def _write_archive(self, volume, script, file_list, archive_path):
+        """Stream tar output of a helper container through the parallel compressor. Returns (size, sha256)."""
+        if file_list == []:
+            # Nothing changed; an empty archive keeps the chain and records deletions
+            open(archive_path, "wb").close()
+            return 0, hashlib.sha256().hexdigest()
+        partial_path = archive_path + ".partial"
+        try:
+            with tempfile.TemporaryFile() as error_output, open(partial_path, "wb") as archive:
+                process = subprocess.Popen(
+                    self._helper(volume, script, read_only=True), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                    stderr=error_output, env=self.docker_manager.command_env
+                )
+                if file_list is not None:
+                    process.stdin.write(_null_separated(file_list))
+                process.stdin.close()
+                writer = ParallelGzipWriter(archive, level=self.level, threads=self.threads)
+                try:
+                    for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), b""):
+                        writer.write(chunk)
+                finally:
+                    writer.close()
+                process.stdout.close()
+                if process.wait() != 0:
+                    error_output.seek(0)
+                    error_text = error_output.read().decode(errors="replace").strip()
+                    raise SnapshotError(f"Could not archive volume '{volume}': {error_text}")
+            os.replace(partial_path, archive_path)
+        except OSError as e:
+            raise SnapshotError(f"Could not write the snapshot of volume '{volume}': {e}") from e
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        return writer.size, writer.sha256.hexdigest()
+
+    def chain(self, volume, snapshot_id=None):
+        """
+        Return the snapshots needed to restore a snapshot: its full base first, itself last.
+
+        Raises:
+            SnapshotError: If the snapshot or one of its bases is missing.
+        """
+        snapshots = {snapshot.id: snapshot for snapshot in self.list(volume)}
+        snapshot = self.get(volume, snapshot_id)
+        if snapshot is None:
+            raise SnapshotError(f"Volume '{volume}' has no snapshot {snapshot_id or 'yet'}.")
+        chain = [snapshot]
+        while chain[0].base is not None:
+            base = snapshots.get(chain[0].base)
+            if base is None:
+                raise SnapshotError(f"Snapshot {chain[0].id} of volume '{volume}' builds on {chain[0].base}, which is missing.")
+            chain.insert(0, base)
+        return chain
+
+    def restore(self, volume, snapshot_id=None):
+        """
+        Replace the contents of a volume with a snapshot.
+
+        Every archive of the chain is checked against its checksum and extracted into a staging
+        directory inside the volume before the current contents are removed, so a damaged or
+        unreadable archive leaves the volume as it was. The volume needs room for both copies
+        meanwhile. Running containers using the volume are stopped during the restore and
+        started again.
+
+        Args:
+            volume (str): Name of the volume, created if it does not exist.
+            snapshot_id (str): Snapshot to restore, defaults to the latest.
+
+        Returns:
+            Snapshot: The restored snapshot.
+
+        Raises:
+            SnapshotError: If a snapshot is missing or damaged, or the volume cannot be written.
+        """
+        chain = self.chain(volume, snapshot_id)
+        target = chain[-1]
+        with self.docker_manager.step("restore", container=volume):
+            for snapshot in chain:
+                if _hash_file(os.path.join(snapshot.path, ARCHIVE_FILE)) != snapshot.sha256:
+                    raise SnapshotError(f"The archive of snapshot {snapshot.id} of volume '{volume}' is damaged.")
+
+            staging = f"{MOUNT_POINT}/{STAGING_DIR}"
+            stopped = self._volume_users(volume)
+            try:
+                for name in stopped:
+                    self.docker_manager.stop_container(name)
+                # Left behind by an interrupted restore
+                self._run_helper(volume, f"rm -rf {staging} && mkdir {staging}")
+                try:
+                    extracted = set()
+                    for snapshot in chain:
+                        if snapshot.archived != []:
+                            self._extract(volume, os.path.join(snapshot.path, ARCHIVE_FILE), staging)
+                        extracted.update(snapshot.files if snapshot.archived is None else snapshot.archived)
+                    # Files deleted between the full snapshot and the target were extracted from older archives
+                    deleted = sorted(extracted - set(target.files))
+                    if deleted:
+                        self._run_helper(volume, f"cd {staging} && xargs -0 rm -f --", _null_separated(deleted))
+                except SnapshotError:
+                    self._run_helper(volume, f"rm -rf {staging}")
+                    raise
+                # Only now is the volume emptied; renames within the volume are instant
+                self._run_helper(volume, (
+                    f"cd {MOUNT_POINT} && find . -mindepth 1 -maxdepth 1 ! -name {STAGING_DIR} -exec rm -rf {{}} + "
+                    f"&& find {STAGING_DIR} -mindepth 1 -maxdepth 1 -exec mv {{}} . \\; && rmdir {STAGING_DIR}"
+                ))
+            finally:
+                for name in stopped:
+                    self.docker_manager.start_container(name)
+        self.docker_manager.log(f"Volume '{volume}' restored from snapshot {target.id}.", output_mode="both")
+        return target
+
+    def _run_helper(self, volume, script, stdin=b""):
+        result = subprocess.run(
+            self._helper(volume, script), input=stdin, capture_output=True, env=self.docker_manager.command_env
+        )
+        if result.returncode != 0:
+            raise SnapshotError(f"Could not write volume '{volume}': {result.stderr.decode(errors='replace').strip()}")
+
+    def _extract(self, volume, archive_path, directory=MOUNT_POINT):
+        """Stream an archive, decompressed here, into tar extracting to a directory of a helper container."""
+        with tempfile.TemporaryFile() as error_output:
+            process = subprocess.Popen(
+                self._helper(volume, f"tar -C {directory} -xf -"), stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL, stderr=error_output, env=self.docker_manager.command_env
+            )
+            try:
+                with gzip.open(archive_path, "rb") as archive:
+                    for chunk in iter(lambda: archive.read(CHUNK_SIZE), b""):
+                        process.stdin.write(chunk)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            except OSError as e:
+                process.kill()
+                process.wait()
+                raise SnapshotError(f"Could not read {archive_path}: {e}") from e
+            if process.wait() != 0:
+                error_output.seek(0)
+                error_text = error_output.read().decode(errors="replace").strip()
+                raise SnapshotError(f"Could not restore volume '{volume}': {error_text}")
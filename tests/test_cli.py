@@ -0,0 +1,59 @@
+# tests/test_cli.py
+
+import json
+
+import pytest
+
+from benchmarks.fake_docker import install_fake_docker
+from helpers import cli
+from helpers.docker_events import MANAGED_CONTAINERS
+from helpers.flavors import FLAVOR_OPTIONS, flavor_slug
+
+
+def _main(tmp_path, *argv, **kwargs):
+    return cli.main(["--log-dir", str(tmp_path / "logs"), *argv], **kwargs)
+
+
+def test_commands_are_dispatched_with_their_arguments(tmp_path, monkeypatch):
+    calls = []
+
+    def run_status(args, logger):
+        calls.append((args.command, args.json, logger.quiet))
+        return 42
+    monkeypatch.setitem(cli.COMMANDS, "status", run_status)
+    assert _main(tmp_path, "status", "--json") == 42
+    # Machine-readable output is kept free of progress messages
+    assert calls == [("status", True, True)]
+
+
+def test_every_subcommand_has_a_handler():
+    subcommands = next(action for action in cli.build_parser()._actions if action.dest == "command").choices
+    assert set(subcommands) == set(cli.COMMANDS)
+
+
+def test_usage_errors_exit_with_code_2(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        _main(tmp_path, "no-such-command")
+    assert exit_info.value.code == cli.EXIT_USAGE
+    assert _main(tmp_path, "setup", "--flavor", "no-such-flavor") == cli.EXIT_USAGE
+    assert "Unknown flavor 'no-such-flavor'" in capsys.readouterr().err
+
+
+def test_flavors_lists_every_slug(tmp_path, capsys):
+    assert _main(tmp_path, "flavors") == cli.EXIT_OK
+    listed = [line.split()[0] for line in capsys.readouterr().out.splitlines()]
+    assert listed == [flavor_slug(flavor) for flavor in FLAVOR_OPTIONS]
+
+
+def test_startup_budget(tmp_path, capsys):
+    assert _main(tmp_path, "--check-startup-budget", "flavors", started_at=-1e9) == cli.EXIT_OVER_BUDGET
+    assert "CLI ready in" in capsys.readouterr().err
+
+
+def test_status_json_against_the_fake_docker(tmp_path, monkeypatch, capsys):
+    for key, value in install_fake_docker(str(tmp_path)).items():
+        monkeypatch.setenv(key, value)
+    assert _main(tmp_path, "status", "--json") == cli.EXIT_OK
+    assert json.loads(capsys.readouterr().out) == {
+        "docker_installed": True, "containers": {name: None for name in MANAGED_CONTAINERS},
+    }
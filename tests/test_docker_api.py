@@ -0,0 +1,95 @@
+# tests/test_docker_api.py
+
+import threading
+
+import pytest
+
+from benchmarks.fake_docker import _save_container
+from benchmarks.fake_engine_api import FakeEngineAPI
+from helpers.docker_api import DockerAPIClient, DockerAPIError
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = FakeEngineAPI(str(tmp_path))
+    yield api
+    api.stop()
+
+
+def _container(name, status="running"):
+    return {
+        "Id": name * 4, "Name": name, "Image": "sha256:" + "1" * 64,
+        "Config": {"Image": "ghcr.io/open-webui/open-webui:main", "Labels": {}}, "State": {"Status": status},
+    }
+
+
+def test_connections_are_reused(api):
+    client = DockerAPIClient(socket_path=api.socket_path)
+    assert client.ping()
+    pooled = client._pool.get_nowait()
+    client._release(pooled)
+    assert client.version()["ApiVersion"]
+    assert client._pool.get_nowait() is pooled
+    client.close()
+
+
+def test_pool_keeps_at_most_pool_size_connections(api):
+    api.latency = 0.05
+    client = DockerAPIClient(socket_path=api.socket_path, pool_size=2)
+    threads = [threading.Thread(target=client.ping) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert api.requests == 5
+    assert client._pool.qsize() == 2
+    client.close()
+    assert client._pool.qsize() == 0
+
+
+def test_stale_pooled_connection_is_retried_once(tmp_path):
+    api = FakeEngineAPI(str(tmp_path))
+    client = DockerAPIClient(socket_path=api.socket_path)
+    assert client.ping()
+    # A restarted daemon drops the pooled keep-alive connection
+    api.stop()
+    api = FakeEngineAPI(str(tmp_path))
+    try:
+        assert client.ping()
+    finally:
+        client.close()
+        api.stop()
+
+
+def test_unreachable_daemon_raises(tmp_path):
+    client = DockerAPIClient(socket_path=str(tmp_path / "missing.sock"))
+    with pytest.raises(DockerAPIError):
+        client.ping()
+
+
+def test_containers_and_missing_ones(api):
+    _save_container(api.state_dir, _container("open-webui"))
+    _save_container(api.state_dir, _container("pipelines", status="exited"))
+    client = DockerAPIClient(socket_path=api.socket_path)
+    assert [container["Names"] for container in client.list_containers()] == [["/open-webui"]]
+    assert len(client.list_containers(all=True)) == 2
+    assert client.inspect_container("open-webui")["Name"] == "/open-webui"
+    assert client.inspect_container("watchtower") is None
+    client.close()
+
+
+@pytest.mark.parametrize("docker_host, expected", [
+    ("unix:///run/user/1000/docker.sock", ("/run/user/1000/docker.sock", None, None)),
+    ("tcp://10.0.0.5:2376", (None, "10.0.0.5", 2376)),
+    ("tcp://10.0.0.5", (None, "10.0.0.5", 2375)),
+])
+def test_from_env(monkeypatch, docker_host, expected):
+    monkeypatch.delenv("DOCKER_TLS_VERIFY", raising=False)
+    client = DockerAPIClient.from_env(docker_host)
+    assert (client.socket_path, client.host, client.port) == expected
+
+
+def test_from_env_leaves_ssh_and_tls_to_the_cli(monkeypatch):
+    assert DockerAPIClient.from_env("ssh://admin@gpu-01") is None
+    monkeypatch.setenv("DOCKER_TLS_VERIFY", "1")
+    assert DockerAPIClient.from_env("tcp://10.0.0.5:2376") is None
@@ -0,0 +1,45 @@
+# tests/test_docker_manager.py
+
+import json
+import sys
+
+from helpers.docker_manager import DockerManager, redact_command
+from helpers.file_log import FileLogWriter
+
+SECRET = "sk-test-0123456789"
+
+
+def test_redact_command():
+    argv = ["docker", "run", "-e", f"OPENAI_API_KEY={SECRET}", f"--env=TOKEN={SECRET}", "--env", "EMPTY=", "image"]
+    assert redact_command(argv) == [
+        "docker", "run", "-e", "OPENAI_API_KEY=***", "--env=TOKEN=***", "--env", "EMPTY=***", "image"
+    ]
+    assert redact_command(f"docker run -e OPENAI_API_KEY={SECRET} --env=A={SECRET} image") == (
+        "docker run -e OPENAI_API_KEY=*** --env=A=*** image"
+    )
+    # Arguments that only look like assignments are kept
+    assert redact_command(["sh", "-c", "A=1 run"]) == ["sh", "-c", "A=1 run"]
+
+
+def _run_logged(tmp_path, json_lines, returncode):
+    path = tmp_path / ("installer.jsonl" if json_lines else "installer.log")
+    writer = FileLogWriter(str(path), json_lines=json_lines)
+    manager = DockerManager(log_callback=lambda message, output_mode="both", **fields: writer.write(message, **fields))
+    command = [sys.executable, "-c", f"import sys; sys.exit({returncode})", "-e", f"OPENAI_API_KEY={SECRET}"]
+    result = manager._run_command(command, check=True)
+    writer.close()
+    assert result.returncode == returncode
+    return path.read_text(encoding="utf-8")
+
+
+def test_secret_env_values_stay_out_of_the_text_log(tmp_path):
+    text = _run_logged(tmp_path, json_lines=False, returncode=1)
+    assert "OPENAI_API_KEY=***" in text
+    assert SECRET not in text
+
+
+def test_secret_env_values_stay_out_of_the_json_log(tmp_path):
+    text = _run_logged(tmp_path, json_lines=True, returncode=0)
+    commands = [json.loads(line).get("command") for line in text.splitlines()]
+    assert any(command and "OPENAI_API_KEY=***" in command for command in commands)
+    assert SECRET not in text
@@ -0,0 +1,126 @@
+# tests/test_downloader.py
+
+import hashlib
+import json
+import os
+
+import pytest
+
+import helpers.downloader as downloader_module
+from benchmarks.fake_file_server import FakeFileServer
+from helpers.downloader import MAX_ATTEMPTS, META_FILE, DownloadError, Downloader
+
+SIZE = 1024 * 1024
+
+
+@pytest.fixture
+def content():
+    return os.urandom(SIZE)
+
+
+@pytest.fixture
+def server(content):
+    server = FakeFileServer(content)
+    yield server
+    server.stop()
+
+
+def _gets(server):
+    return [request.range for request in server.requests if request.method == "GET"]
+
+
+def _read(path):
+    with open(path, "rb") as downloaded:
+        return downloaded.read()
+
+
+def test_download_and_reuse(tmp_path, server, content):
+    downloader = Downloader(str(tmp_path), parallel_chunks=1)
+    path = downloader.download(server.url("Docker.dmg"), sha256=hashlib.sha256(content).hexdigest())
+    assert _read(path) == content
+    assert os.path.basename(path) == "Docker.dmg"
+
+    server.requests.clear()
+    assert downloader.download(server.url("Docker.dmg")) == path
+    assert _gets(server) == []
+
+
+def test_parallel_ranges(tmp_path, server, content):
+    path = Downloader(str(tmp_path), parallel_chunks=4, min_parallel_size=1).download(server.url("Docker.dmg"))
+    assert _read(path) == content
+    quarter = SIZE // 4
+    assert sorted(_gets(server)) == sorted(f"bytes={start}-{start + quarter - 1}" for start in range(0, SIZE, quarter))
+
+
+def test_resume_with_a_pinned_checksum(tmp_path, server, content):
+    digest = hashlib.sha256(content).hexdigest()
+    server.interrupt(MAX_ATTEMPTS, after=SIZE // 8)
+    with pytest.raises(DownloadError):
+        Downloader(str(tmp_path), parallel_chunks=1).download(server.url("Docker.dmg"), sha256=digest)
+
+    server.requests.clear()
+    path = Downloader(str(tmp_path), parallel_chunks=1).download(server.url("Docker.dmg"), sha256=digest)
+    assert _read(path) == content
+    assert _gets(server) == [f"bytes={MAX_ATTEMPTS * (SIZE // 8)}-"]
+
+
+def test_unpinned_downloads_start_over(tmp_path, server, content):
+    server.interrupt(MAX_ATTEMPTS, after=SIZE // 8)
+    with pytest.raises(DownloadError):
+        Downloader(str(tmp_path), parallel_chunks=1).download(server.url("Docker.dmg"))
+
+    server.requests.clear()
+    path = Downloader(str(tmp_path), parallel_chunks=1).download(server.url("Docker.dmg"))
+    assert _read(path) == content
+    assert _gets(server) == [None]
+
+
+def test_changed_file_is_fetched_whole(tmp_path, server):
+    changed = os.urandom(SIZE // 2)
+    server.interrupt(1, after=SIZE // 4, publish=changed)
+    path = Downloader(str(tmp_path), parallel_chunks=1).download(server.url("Docker.dmg"))
+    assert _read(path) == changed
+    assert server.requests[-1].if_range is not None and server.requests[-1].status == 200
+
+
+def test_checksum_mismatch(tmp_path, server):
+    with pytest.raises(DownloadError, match="Checksum mismatch"):
+        Downloader(str(tmp_path), parallel_chunks=1).download(server.url("Docker.dmg"), sha256="0" * 64)
+    assert not any(name.endswith(".dmg") for _, _, files in os.walk(tmp_path) for name in files)
+
+
+def test_offline_reuse_of_a_complete_download(tmp_path, server, content):
+    url = server.url("Docker.dmg")
+    path = Downloader(str(tmp_path), parallel_chunks=1).download(url)
+    server.stop()
+    assert Downloader(str(tmp_path), parallel_chunks=1, timeout=2).download(url) == path
+    with pytest.raises(DownloadError):
+        Downloader(str(tmp_path / "empty"), parallel_chunks=1, timeout=2).download(url)
+
+
+def test_range_progress_is_only_recorded_once_on_disk(tmp_path, server, content, monkeypatch):
+    monkeypatch.setattr(downloader_module, "PROGRESS_STEP", 32 * 1024)
+    digest = hashlib.sha256(content).hexdigest()
+    # Every response stops part way, so every range fails with some of its bytes written
+    server.interrupt(4 * MAX_ATTEMPTS, after=50 * 1024)
+    with pytest.raises(DownloadError):
+        Downloader(str(tmp_path), parallel_chunks=4, min_parallel_size=1).download(server.url("Docker.dmg"),
+                                                                                     sha256=digest)
+
+    (entry,) = os.listdir(tmp_path)
+    with open(tmp_path / entry / META_FILE, encoding="utf-8") as meta_file:
+        chunks = json.load(meta_file)["chunks"]
+    part = _read(tmp_path / entry / "Docker.dmg.part")
+    quarter = SIZE // 4
+    for index, flushed in enumerate(chunks):
+        start = index * quarter
+        assert 0 < flushed <= quarter
+        assert part[start:start + flushed] == content[start:start + flushed]
+
+    server.requests.clear()
+    path = Downloader(str(tmp_path), parallel_chunks=4, min_parallel_size=1).download(server.url("Docker.dmg"),
+                                                                                       sha256=digest)
+    assert _read(path) == content
+    assert sorted(_gets(server)) == sorted(
+        f"bytes={index * quarter + flushed}-{(index + 1) * quarter - 1}" for index, flushed in enumerate(chunks)
+    )
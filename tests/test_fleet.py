@@ -0,0 +1,76 @@
+# tests/test_fleet.py
+
+import json
+import time
+
+import pytest
+
+from benchmarks.fake_docker import install_fake_docker
+from helpers.fleet import FleetHost, HostResult, format_results_table, load_inventory, provision_fleet
+from helpers.flavors import FLAVOR_OPTIONS
+
+
+def _inventory(tmp_path, hosts):
+    path = tmp_path / "hosts.json"
+    path.write_text(json.dumps({"hosts": hosts}), encoding="utf-8")
+    return str(path)
+
+
+def test_load_inventory(tmp_path):
+    hosts = load_inventory(_inventory(tmp_path, [
+        {"name": "gpu-01", "docker_host": "ssh://admin@gpu-01", "flavor": "bundled-ollama-with-gpu",
+         "tuning": {"memory": "24g"}},
+        {"context": "ws-17", "flavor": "Default (Ollama Local)"},
+    ]))
+    assert [(host.name, host.flavor, host.docker_host, host.context) for host in hosts] == [
+        ("gpu-01", "Bundled Ollama with GPU", "ssh://admin@gpu-01", None),
+        ("ws-17", "Default (Ollama Local)", None, "ws-17"),
+    ]
+    assert hosts[0].spec.memory == "24g"
+    assert hosts[1].spec == FLAVOR_OPTIONS["Default (Ollama Local)"]
+
+
+@pytest.mark.parametrize("hosts", [
+    [{"flavor": "default-ollama-local"}],
+    [{"name": "a", "flavor": "no-such-flavor"}],
+    [{"name": "a", "flavor": "default-ollama-local", "tuning": {"memory": "lots"}}],
+    [{"name": "a", "flavor": "default-ollama-local", "tuning": {"no_such_setting": 1}}],
+    [{"name": "a", "flavor": "default-ollama-local"}, {"name": "a", "flavor": "ollama-remote"}],
+])
+def test_load_inventory_rejects_malformed_entries(tmp_path, hosts):
+    with pytest.raises(ValueError):
+        load_inventory(_inventory(tmp_path, hosts))
+
+
+def test_host_deadline_kills_slow_commands(tmp_path, monkeypatch):
+    # Every docker command of the fake takes longer than the whole host is allowed
+    for key, value in install_fake_docker(str(tmp_path), latency=5).items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.chdir(tmp_path)
+    hosts = [
+        FleetHost(name, "Default (Ollama Local)", "ssh://fake-docker", None, FLAVOR_OPTIONS["Default (Ollama Local)"])
+        for name in ("gpu-01", "gpu-02")
+    ]
+    finished = []
+    started_at = time.monotonic()
+    results = provision_fleet(hosts, lambda *args, **fields: None, timeout=0.5, result_callback=finished.append)
+    assert time.monotonic() - started_at < 3
+    assert [result.host.name for result in results] == ["gpu-01", "gpu-02"]
+    assert sorted(result.host.name for result in finished) == ["gpu-01", "gpu-02"]
+    for result in results:
+        assert not result.ok
+        assert result.error == "Timed out after 0.5 seconds"
+        assert "connect" in result.steps
+
+
+def test_format_results_table():
+    host = FleetHost("gpu-01", "Ollama Remote", None, "gpu-01", FLAVOR_OPTIONS["Ollama Remote"])
+    table = format_results_table([
+        HostResult(host, True, None, 12.34, {"connect": 0.5, "pull": 10.0}),
+        HostResult(host._replace(name="ws-17"), False, "Docker is not reachable", 1.0, {"connect": 1.0}),
+    ])
+    assert table.splitlines() == [
+        "host    flavor         result                           total  connect  pull",
+        "gpu-01  Ollama Remote  ok                               12.3s  0.5s     10.0s",
+        "ws-17   Ollama Remote  FAILED: Docker is not reachable  1.0s   1.0s     -",
+    ]
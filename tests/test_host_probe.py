@@ -0,0 +1,52 @@
+# tests/test_host_probe.py
+
+from helpers.flavors import FLAVOR_OPTIONS
+from helpers.host_probe import (CPU_FLAVOR, GIB, GPU_FLAVOR, REMOTE_FLAVOR, HostCapacity, recommend_flavor,
+                                tuned_settings)
+
+
+def _capacity(cpus=8, memory_gb=32, disk_gb=200, gpus=(), gpu_runtime=False):
+    return HostCapacity(cpus, memory_gb * GIB if memory_gb is not None else None, disk_gb * GIB, "/var/lib/docker",
+                        list(gpus), gpu_runtime)
+
+
+def test_recommend_flavor():
+    assert recommend_flavor(_capacity(gpus=[("RTX 4090", 24 * GIB)], gpu_runtime=True), FLAVOR_OPTIONS)[0] == GPU_FLAVOR
+    assert recommend_flavor(_capacity(), FLAVOR_OPTIONS)[0] == CPU_FLAVOR
+    assert recommend_flavor(_capacity(memory_gb=4), FLAVOR_OPTIONS)[0] == REMOTE_FLAVOR
+    assert recommend_flavor(_capacity(memory_gb=None), FLAVOR_OPTIONS)[0] == REMOTE_FLAVOR
+    assert recommend_flavor(_capacity(disk_gb=10), FLAVOR_OPTIONS)[0] == REMOTE_FLAVOR
+
+
+def test_recommend_flavor_without_the_nvidia_runtime():
+    flavor, reason = recommend_flavor(_capacity(gpus=[("RTX 4090", 24 * GIB)]), FLAVOR_OPTIONS)
+    assert flavor == CPU_FLAVOR
+    assert "no nvidia runtime" in reason
+
+
+def test_recommend_flavor_missing_from_the_table():
+    assert recommend_flavor(_capacity(), {})[0] is None
+
+
+def test_tuned_settings_cpu():
+    settings = tuned_settings(FLAVOR_OPTIONS[CPU_FLAVOR], _capacity(cpus=8, memory_gb=32))
+    assert settings == {"memory": "24g", "shm_size": "2048m", "ollama_num_parallel": 2, "ollama_max_loaded_models": 2}
+
+
+def test_tuned_settings_gpu():
+    capacity = _capacity(memory_gb=16, gpus=[("RTX 4090", 24 * GIB - 1)], gpu_runtime=True)
+    settings = tuned_settings(FLAVOR_OPTIONS[GPU_FLAVOR], capacity)
+    assert settings["ollama_num_parallel"] == 3
+    assert settings["ollama_max_loaded_models"] == 2
+
+
+def test_tuned_settings_keep_values_from_the_spec():
+    spec = FLAVOR_OPTIONS[CPU_FLAVOR].with_overrides(memory="6g", ollama_num_parallel=1)
+    settings = tuned_settings(spec, _capacity())
+    assert "memory" not in settings
+    assert "ollama_num_parallel" not in settings
+
+
+def test_tuned_settings_skip_ollama_for_other_images():
+    settings = tuned_settings(FLAVOR_OPTIONS["Default (Ollama Local)"], _capacity())
+    assert set(settings) == {"memory", "shm_size"}
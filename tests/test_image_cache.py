@@ -0,0 +1,86 @@
+# tests/test_image_cache.py
+
+import os
+import subprocess
+
+import pytest
+
+from benchmarks.fake_docker import IMAGE_BYTES_ENV, image_id, install_fake_docker
+from helpers.image_cache import ImageCache, ImageCacheError
+
+IMAGE = "ghcr.io/open-webui/pipelines:main"
+
+
+def _digest(number):
+    return "sha256:" + str(number) * 64
+
+
+def _cache_with_blobs(tmp_path, sizes, max_bytes=1000):
+    """Return a cache holding one archive per size, used in that order, with images 'image-<n>'."""
+    cache = ImageCache(str(tmp_path / "cache"), max_bytes=max_bytes)
+    os.makedirs(cache.directory)
+    for number, size in enumerate(sizes, start=1):
+        file_name = f"blob-{number}.tar.gz"
+        with open(os.path.join(cache.directory, file_name), "wb") as blob_file:
+            blob_file.write(b"x" * size)
+        cache._index["blobs"][_digest(number)] = {"file": file_name, "size": size, "sha256": "", "last_used": number}
+        cache._index["images"][f"image-{number}"] = _digest(number)
+    return cache
+
+
+def test_evict_removes_least_recently_used_first(tmp_path):
+    cache = _cache_with_blobs(tmp_path, [400, 300, 200, 100], max_bytes=350)
+    assert cache.evict() == [_digest(1), _digest(2)]
+    assert [entry[0] for entry in cache.entries()] == [_digest(4), _digest(3)]
+    assert cache.lookup("image-1") is None
+    assert not os.path.exists(os.path.join(cache.directory, "blob-1.tar.gz"))
+    assert cache.lookup("image-3") == _digest(3)
+
+
+def test_evict_keeps_the_given_digest(tmp_path):
+    cache = _cache_with_blobs(tmp_path, [400, 300])
+    assert cache.evict(max_bytes=300, keep=_digest(1)) == [_digest(2)]
+    assert cache.total_size() == 400
+
+
+def test_touch_makes_an_archive_recent(tmp_path):
+    cache = _cache_with_blobs(tmp_path, [100, 100, 100])
+    assert cache._touch("image-1", _digest(1))
+    assert cache.evict(max_bytes=200) == [_digest(2)]
+
+
+def test_touch_of_an_evicted_archive_is_a_miss(tmp_path):
+    cache = _cache_with_blobs(tmp_path, [100])
+    cache.remove(_digest(1))
+    assert not cache._touch("image-1", _digest(1))
+    assert cache.lookup("image-1") is None and cache.entries() == []
+
+
+@pytest.fixture
+def docker_env(tmp_path):
+    env = install_fake_docker(str(tmp_path / "docker"))
+    env[IMAGE_BYTES_ENV] = str(64 * 1024)
+    subprocess.run(["docker", "pull", IMAGE], env=env, check=True, capture_output=True)
+    return env
+
+
+def test_store_and_load(tmp_path, docker_env):
+    cache = ImageCache(str(tmp_path / "cache"))
+    digest = image_id(IMAGE)
+    assert cache.store(IMAGE, digest, env=docker_env)
+    # Another tag of the same image shares the archive
+    assert not cache.store("pipelines:latest", digest, env=docker_env)
+    assert ImageCache(cache.directory).entries()[0][:2] == (digest, ["ghcr.io/open-webui/pipelines:main", "pipelines:latest"])
+    assert cache.load(IMAGE, env=docker_env) == digest
+    assert cache.load("ubuntu:latest", env=docker_env) is None
+
+
+def test_damaged_archive_is_removed_on_load(tmp_path, docker_env):
+    cache = ImageCache(str(tmp_path / "cache"))
+    digest = image_id(IMAGE)
+    cache.store(IMAGE, digest, env=docker_env)
+    with open(cache._blob_path(cache._index["blobs"][digest]), "r+b") as archive:
+        archive.write(b"damaged")
+    with pytest.raises(ImageCacheError):
+        cache.load(IMAGE, env=docker_env)
+    assert cache.lookup(IMAGE) is None
@@ -0,0 +1,51 @@
+# tests/test_pull_progress.py
+
+import pytest
+
+from helpers.pull_progress import PullProgress, PullProgressTracker, format_pull_progress, parse_size
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12.3MB", 12_300_000),
+    ("1.5GiB", 3 * 1024 ** 3 // 2),
+    ("512 kB", 512_000),
+    ("42", 42),
+    ("0B", 0),
+    ("", None),
+    ("--", None),
+    (None, None),
+])
+def test_parse_size(text, expected):
+    assert parse_size(text) == expected
+
+
+def test_tracker_reports_layer_progress():
+    tracker = PullProgressTracker()
+    assert tracker.feed("main: Pulling from open-webui/open-webui") is None
+    assert tracker.image == "open-webui/open-webui:main"
+
+    event = tracker.feed("a2abf6c4d29d: Downloading [=====>     ]  12.3MB/45.6MB")
+    assert event == PullProgress("open-webui/open-webui:main", "a2abf6c4d29d", "Downloading",
+                                 12_300_000, 45_600_000, 12_300_000, 45_600_000, 0, 1)
+    assert tracker.feed("b3bcf7d5e30e: Already exists").layers_done == 1
+
+    # A finished layer counts as fully downloaded, even without sizes on the line
+    event = tracker.feed("a2abf6c4d29d: Pull complete")
+    assert (event.current, event.downloaded, event.size) == (45_600_000, 45_600_000, 45_600_000)
+    assert (event.layers_done, event.layers) == (2, 2)
+
+
+def test_tracker_ignores_other_output():
+    tracker = PullProgressTracker("ubuntu:latest")
+    assert tracker.feed("Digest: sha256:" + "0" * 64) is None
+    assert tracker.feed("Status: Downloaded newer image for ubuntu:latest") is None
+    assert tracker.feed("latest: Pulling from library/ubuntu") is None
+    # An image given up front is not replaced by the one 'docker run' names
+    assert tracker.image == "ubuntu:latest"
+
+
+def test_format_pull_progress():
+    tracker = PullProgressTracker("ubuntu:latest")
+    tracker.feed("a2abf6c4d29d: Downloading [==>  ]  10MB/30MB")
+    event = tracker.feed("a2abf6c4d29d: Pull complete")
+    assert format_pull_progress(event) == "ubuntu:latest: 1/1 layers complete (30 MB of 30 MB)"
@@ -0,0 +1,115 @@
+# tests/test_readiness.py
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from helpers import readiness
+from helpers.readiness import ReadinessProber, ReadinessTarget, probe_host_for
+
+
+class FakeClock:
+    """Stands in for the time module, so backoff delays are recorded instead of slept."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+class FakeDockerManager:
+    def __init__(self, states):
+        self.states = list(states)
+
+    def inspect_container_state(self, name):
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+    def container_logs_tail(self, name, lines=20):
+        return "Error: database is locked"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(readiness, "time", clock)
+    return clock
+
+
+def _prober(states, answers, **settings):
+    prober = ReadinessProber(FakeDockerManager(states), **settings)
+    answers = list(answers)
+    prober._check_http = lambda url: answers.pop(0) if len(answers) > 1 else answers[0]
+    return prober
+
+
+def test_backoff_grows_up_to_the_maximum(clock):
+    prober = _prober([{"Status": "running"}], [(False, "refused")], timeout=2, initial_backoff=0.2, max_backoff=0.5)
+    result = prober.probe(ReadinessTarget("open-webui", "http://localhost:3000/health", 0.0))
+    assert not result.ready
+    # 0.2, 0.3, 0.45, then capped at 0.5 until the last sleep ends at the timeout
+    assert clock.sleeps == [0.2, 0.3, 0.45, 0.5, 0.5, 0.05]
+    assert result.attempts == 7
+    assert "not ready after 2 seconds" in result.diagnosis
+    assert "last HTTP probe: refused" in result.diagnosis
+    assert "database is locked" in result.diagnosis
+
+
+def test_ready_once_the_port_answers(clock):
+    answers = [(False, "refused"), (False, "refused"), (True, "HTTP 200")]
+    prober = _prober([{"Status": "running"}], answers, initial_backoff=1)
+    result = prober.probe(ReadinessTarget("pipelines", "http://localhost:9099/", 0.0))
+    assert (result.ready, result.attempts, result.seconds, result.diagnosis) == (True, 3, 2.5, None)
+
+
+@pytest.mark.parametrize("state, reason", [
+    ({"Status": "exited", "ExitCode": 3}, "the container exited with exit code 3"),
+    ({"Status": "running", "Health": {"Status": "unhealthy"}}, "Docker reports the container as unhealthy"),
+    (None, "the container does not exist"),
+])
+def test_failed_containers_are_not_waited_for(clock, state, reason):
+    prober = _prober([state], [(True, "HTTP 200")])
+    result = prober.probe(ReadinessTarget("open-webui", "http://localhost:3000/health", 0.0))
+    assert not result.ready and result.attempts == 1 and clock.sleeps == []
+    assert result.diagnosis.startswith(f"Container 'open-webui' is not ready: {reason}.")
+
+
+def test_http_probe_ignores_proxy_settings(monkeypatch):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Nothing listens on the discard port, so a probe sent through the proxy would fail
+    for variable in ("http_proxy", "HTTP_PROXY"):
+        monkeypatch.setenv(variable, "http://127.0.0.1:9")
+    for variable in ("no_proxy", "NO_PROXY"):
+        monkeypatch.delenv(variable, raising=False)
+    try:
+        prober = ReadinessProber(FakeDockerManager([{"Status": "running"}]))
+        assert prober._check_http(f"http://127.0.0.1:{server.server_address[1]}/health") == (True, "HTTP 404")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("endpoint, host", [
+    (None, "localhost"),
+    ("unix:///var/run/docker.sock", "localhost"),
+    ("ssh://admin@gpu-01", "gpu-01"),
+    ("tcp://10.0.0.5:2376", "10.0.0.5"),
+])
+def test_probe_host_for(endpoint, host):
+    assert probe_host_for(endpoint) == host
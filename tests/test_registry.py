@@ -0,0 +1,22 @@
+# tests/test_registry.py
+
+import pytest
+
+from helpers.registry import DOCKER_HUB, ImageReference, parse_reference
+
+
+@pytest.mark.parametrize("image, expected", [
+    ("ubuntu", ImageReference(DOCKER_HUB, "library/ubuntu", "latest")),
+    ("containrrr/watchtower", ImageReference(DOCKER_HUB, "containrrr/watchtower", "latest")),
+    ("ghcr.io/open-webui/open-webui:main", ImageReference("ghcr.io", "open-webui/open-webui", "main")),
+    ("localhost/team/app:1.0", ImageReference("localhost", "team/app", "1.0")),
+    ("127.0.0.1:5000/open-webui/pipelines:main", ImageReference("127.0.0.1:5000", "open-webui/pipelines", "main")),
+    ("127.0.0.1:5000/app", ImageReference("127.0.0.1:5000", "app", "latest")),
+])
+def test_parse_reference(image, expected):
+    assert parse_reference(image) == expected
+
+
+def test_parse_reference_rejects_digests():
+    with pytest.raises(ValueError):
+        parse_reference("ubuntu@sha256:" + "0" * 64)
@@ -0,0 +1,48 @@
+# tests/test_resource_monitor.py
+
+from helpers.resource_monitor import ResourceHistory, ResourceSample, parse_stats_line
+
+STATS_LINE = ('\x1b[2J\x1b[H{"Name": "open-webui", "ID": "abc", "CPUPerc": "12.50%", "MemUsage": "1.5GiB / 2GiB",'
+              ' "NetIO": "1.5kB / 500B", "BlockIO": "2MB / 0B", "PIDs": "12"}')
+
+
+def _sample(time, cpu_percent, memory_bytes=1000, net_rx_bytes=0):
+    return ResourceSample(time, cpu_percent, cpu_percent, memory_bytes, memory_bytes, 4000,
+                          net_rx_bytes, 0, 0, 0, 1)
+
+
+def test_parse_stats_line():
+    name, sample = parse_stats_line(STATS_LINE, now=100.0)
+    assert name == "open-webui"
+    assert sample == ResourceSample(100.0, 12.5, 12.5, 1610612736, 1610612736, 2147483648, 1500, 500, 2000000, 0, 12)
+    assert parse_stats_line("\x1b[2J\x1b[H") is None
+
+
+def test_history_downsamples_into_averages():
+    history = ResourceHistory(resolutions=((1, 5), (10, 3)))
+    for second in range(25):
+        history.add("open-webui", _sample(second, cpu_percent=second % 10, memory_bytes=second, net_rx_bytes=second))
+
+    # The finest level is a ring buffer of the newest samples
+    assert [sample.time for sample in history.samples("open-webui")] == [20, 21, 22, 23, 24]
+
+    # Each coarser point averages its interval, keeps the peaks and the last counter values
+    first, second, in_progress = history.samples("open-webui", resolution=10)
+    assert (first.time, first.cpu_percent, first.cpu_peak) == (0, 4.5, 9)
+    assert (first.memory_bytes, first.memory_peak, first.net_rx_bytes) == (4, 9, 9)
+    assert second.time == 10
+    assert (in_progress.time, in_progress.cpu_percent, in_progress.net_rx_bytes) == (20, 2.0, 24)
+
+
+def test_history_coarse_ring_buffer_drops_the_oldest_points():
+    history = ResourceHistory(resolutions=((1, 5), (10, 3)))
+    for second in range(60):
+        history.add("open-webui", _sample(second, cpu_percent=1))
+    assert [sample.time for sample in history.samples("open-webui", resolution=10)] == [20, 30, 40, 50]
+
+
+def test_history_resolution_for():
+    history = ResourceHistory(resolutions=((1, 5), (10, 3)))
+    assert history.resolution_for(5) == 1
+    assert history.resolution_for(30) == 10
+    assert history.resolution_for(3600) == 10
@@ -0,0 +1,79 @@
+# tests/test_setup_plan.py
+
+import pytest
+
+from helpers.flavors import FLAVOR_OPTIONS, PIPELINES_SPEC
+from helpers.setup_plan import (
+    CREATE, RECREATE, SKIP, SPEC_HASH_LABEL, START, diff_container, matches_container, spec_hash, with_spec_hash,
+)
+
+IMAGE_ID = "sha256:" + "1" * 64
+
+
+def _details(spec, status="running", image_id=IMAGE_ID):
+    """'docker inspect' output of a container created from spec."""
+    return {"Config": {"Labels": dict(spec.labels)}, "Image": image_id, "State": {"Status": status}}
+
+
+def test_spec_hash_ignores_its_own_label():
+    assert spec_hash(with_spec_hash(PIPELINES_SPEC)) == spec_hash(PIPELINES_SPEC)
+    assert with_spec_hash(PIPELINES_SPEC).labels[SPEC_HASH_LABEL] == spec_hash(PIPELINES_SPEC)
+
+
+def test_spec_hash_changes_with_settings():
+    assert spec_hash(PIPELINES_SPEC.with_overrides(env={"DEBUG": "1"})) != spec_hash(PIPELINES_SPEC)
+
+
+def test_diff_container_actions():
+    spec = with_spec_hash(PIPELINES_SPEC)
+    assert diff_container(PIPELINES_SPEC, None, None)[0] == CREATE
+    assert diff_container(PIPELINES_SPEC, _details(spec), IMAGE_ID) == (SKIP, "up to date")
+    assert diff_container(PIPELINES_SPEC, _details(spec, status="exited"), IMAGE_ID)[0] == START
+    assert diff_container(PIPELINES_SPEC, _details(spec), "sha256:" + "2" * 64) == (RECREATE, "a newer image is available")
+    assert diff_container(PIPELINES_SPEC, _details(PIPELINES_SPEC), IMAGE_ID)[0] == RECREATE
+    changed = PIPELINES_SPEC.with_overrides(ports=["9100:9099"])
+    assert diff_container(changed, _details(spec), IMAGE_ID) == (RECREATE, "settings changed")
+
+
+def test_diff_container_without_image_id_keeps_the_container():
+    spec = with_spec_hash(PIPELINES_SPEC)
+    assert diff_container(PIPELINES_SPEC, _details(spec), None)[0] == SKIP
+
+
+def _inspected(spec, status="running"):
+    """Fuller 'docker inspect' output of a container created from spec by an installer that set no spec hash."""
+    details = _details(spec, status)
+    details["Config"].update(Image=spec.image, Env=["PATH=/usr/bin"] + [f"{key}={value}" for key, value in spec.env.items()])
+    details["HostConfig"] = {
+        "PortBindings": {
+            port.split(":")[-1] + "/tcp": [{"HostIp": "0.0.0.0", "HostPort": port.split(":")[0]}] for port in spec.ports
+        },
+        "Binds": list(spec.volumes), "ExtraHosts": list(spec.extra_hosts),
+        "RestartPolicy": {"Name": spec.restart or "no"},
+        "DeviceRequests": [{"Count": -1, "Capabilities": [["gpu"]]}] if spec.gpus else None,
+    }
+    return details
+
+
+def test_unlabelled_container_with_matching_settings_is_kept():
+    spec = FLAVOR_OPTIONS["Nvidia GPU Support"]
+    assert matches_container(spec, _inspected(spec))
+    assert diff_container(spec, _inspected(spec), IMAGE_ID) == (SKIP, "up to date, created without a spec hash")
+    assert diff_container(spec, _inspected(spec, status="exited"), IMAGE_ID)[0] == START
+    assert diff_container(spec, _inspected(spec), "sha256:" + "2" * 64)[0] == RECREATE
+
+
+@pytest.mark.parametrize("overrides", [
+    {"image": "ghcr.io/open-webui/open-webui:main"},
+    {"env": {"WEBUI_AUTH": "False"}},
+    {"ports": ["127.0.0.1:3000:8080"]},
+    {"volumes": ["open-webui-data:/app/backend/data"]},
+    {"gpus": None},
+    {"restart": "unless-stopped"},
+    {"memory": "8g"},
+])
+def test_unlabelled_container_with_other_settings_is_recreated(overrides):
+    spec = FLAVOR_OPTIONS["Nvidia GPU Support"]
+    assert diff_container(spec.with_overrides(**overrides), _inspected(spec), IMAGE_ID) == (
+        RECREATE, "created without a spec hash, settings differ"
+    )
@@ -0,0 +1,67 @@
+# tests/test_step_journal.py
+
+import json
+import os
+
+import pytest
+
+from helpers.docker_manager import DockerManager
+from helpers.step_journal import JournalError, StepJournal
+
+
+def test_records_survive_a_restart(tmp_path):
+    path = tmp_path / "state" / "journal.json"
+    StepJournal(str(path)).record("install-docker", "docker 27.0.0")
+
+    journal = StepJournal(str(path))
+    assert journal.get("install-docker") == "docker 27.0.0"
+    assert journal.get("configure") is None
+    assert set(journal.steps()["install-docker"]) == {"fingerprint", "completed_at"}
+
+
+def test_forget(tmp_path):
+    path = str(tmp_path / "journal.json")
+    journal = StepJournal(path)
+    journal.record("download", "sha256:1")
+    journal.record("install", "1.0")
+
+    journal.forget("download")
+    assert StepJournal(path).steps().keys() == {"install"}
+    journal.forget()
+    assert StepJournal(path).steps() == {}
+
+
+def test_unreadable_or_outdated_journals_are_empty(tmp_path):
+    path = tmp_path / "journal.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert StepJournal(str(path)).steps() == {}
+
+    path.write_text(json.dumps({"version": 0, "steps": {"install": {"fingerprint": "1.0"}}}), encoding="utf-8")
+    assert StepJournal(str(path)).get("install") is None
+
+
+def test_unwritable_journal_raises_and_leaves_no_temporary_file(tmp_path, monkeypatch):
+    journal = StepJournal(str(tmp_path / "journal.json"))
+
+    def fail_replace(source, destination):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "replace", fail_replace)
+    with pytest.raises(JournalError, match="No space left on device"):
+        journal.record("install", "1.0")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_install_continues_without_an_unwritable_journal(tmp_path, monkeypatch):
+    messages = []
+    docker_manager = DockerManager(lambda message, output_mode="both", **fields: messages.append(message),
+                                   journal=StepJournal(str(tmp_path / "journal.json")))
+
+    def fail_write(journal):
+        raise JournalError("Disk full.")
+    monkeypatch.setattr(StepJournal, "_write", fail_write)
+
+    assert docker_manager.run_journaled_step("linux:docker.io", lambda: "27.0.0", lambda: True)
+    assert docker_manager.journal is None
+    assert any(message.startswith("Disk full. Continuing without the journal") for message in messages)
+    # Later steps run without it
+    assert docker_manager.run_journaled_step("linux:docker-service", lambda: "active", lambda: True)
@@ -0,0 +1,78 @@
+# tests/test_tracing.py
+
+import json
+import sys
+
+import pytest
+
+from helpers.docker_manager import DockerManager
+from helpers.tracing import Tracer
+
+SECRET = "sk-test-0123456789"
+
+
+def _quiet_log(message, output_mode="both", **fields):
+    pass
+
+
+def test_chrome_trace_events():
+    tracer = Tracer()
+    with tracer.span("pull", category="step", image="ubuntu") as span:
+        span.set(argv=["docker", "pull", "ubuntu"])
+    (event,) = tracer.chrome_trace()["traceEvents"]
+    assert (event["name"], event["cat"], event["ph"]) == ("pull", "step", "X")
+    assert event["args"] == {"image": "ubuntu", "argv": "docker pull ubuntu"}
+    assert event["dur"] >= 0
+
+
+def test_failed_spans_are_recorded_with_the_error():
+    tracer = Tracer()
+    with pytest.raises(RuntimeError):
+        with tracer.span("setup"):
+            raise RuntimeError("boom")
+    assert tracer.spans()[0].attributes["error"] == "RuntimeError"
+
+
+def test_prometheus_summary():
+    tracer = Tracer()
+    for returncode in (0, 1):
+        with tracer.span("docker pull", category="command") as span:
+            span.set(returncode=returncode, output_bytes=10)
+    text = tracer.prometheus_summary()
+    assert 'installer_span_duration_seconds_count{category="command",name="docker pull"} 2' in text
+    assert 'installer_command_output_bytes_total{category="command",name="docker pull"} 20' in text
+    assert 'installer_span_failures_total{category="command",name="docker pull"} 1' in text
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span("pull") as span:
+        span.set(returncode=0)
+    assert tracer.spans() == []
+    assert tracer.chrome_trace()["traceEvents"] == []
+
+
+def test_export_writes_both_files(tmp_path):
+    tracer = Tracer()
+    with tracer.span("pull"):
+        pass
+    trace_path, metrics_path = tracer.export(str(tmp_path))
+    assert json.load(open(trace_path, encoding="utf-8"))["traceEvents"][0]["name"] == "pull"
+    assert "installer_span_duration_seconds" in open(metrics_path, encoding="utf-8").read()
+
+
+def test_command_spans_leave_out_secret_env_values():
+    tracer = Tracer()
+    manager = DockerManager(log_callback=_quiet_log, tracer=tracer)
+    manager._run_command([sys.executable, "-c", "pass", "-e", f"OPENAI_API_KEY={SECRET}"])
+    trace = json.dumps(tracer.chrome_trace())
+    assert "OPENAI_API_KEY=***" in trace
+    assert SECRET not in trace
+
+
+def test_step_attributes_may_repeat_the_trace_attributes():
+    tracer = Tracer()
+    manager = DockerManager(log_callback=_quiet_log, tracer=tracer, docker_host="ssh://gpu-01")
+    with manager.step("probe", host="gpu-02"):
+        pass
+    assert tracer.spans()[0].attributes["host"] == "gpu-02"
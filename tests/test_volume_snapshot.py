@@ -0,0 +1,124 @@
+# tests/test_volume_snapshot.py
+
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+
+import pytest
+
+from benchmarks.fake_docker import install_fake_docker
+from helpers import volume_snapshot
+from helpers.docker_manager import DockerManager
+from helpers.volume_snapshot import MANIFEST_FILE, STAGING_DIR, SnapshotError, VolumeSnapshots
+
+VOLUME = "open-webui"
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    env = install_fake_docker(str(tmp_path / "docker"))
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.chdir(tmp_path)
+    docker_manager = DockerManager(lambda *args, **fields: None)
+    snapshots = VolumeSnapshots(docker_manager, directory=str(tmp_path / "snapshots"), threads=2)
+    _write({"webui.db": "tables", "uploads/report.pdf": "pdf", "cache/old.bin": "old"})
+    return snapshots
+
+
+def _volume_path(*names):
+    """Path of the fake daemon's volume directory, or of a file in it."""
+    return os.path.join(os.environ["FAKE_DOCKER_STATE"], "volumes", VOLUME, *names)
+
+
+def _write(files, mtime=1_700_000_000):
+    for name, content in files.items():
+        path = _volume_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as volume_file:
+            volume_file.write(content)
+        os.utime(path, (mtime, mtime))
+
+
+def _contents():
+    contents = {}
+    for directory, _, file_names in os.walk(_volume_path()):
+        for file_name in file_names:
+            path = os.path.join(directory, file_name)
+            with open(path, encoding="utf-8") as volume_file:
+                contents[os.path.relpath(path, _volume_path())] = volume_file.read()
+    return contents
+
+
+def test_incremental_snapshot_archives_only_changed_files(snapshots):
+    full = snapshots.create(VOLUME, "1")
+    assert full.base is None and full.archived is None
+    assert sorted(full.files) == ["./cache/old.bin", "./uploads/report.pdf", "./webui.db"]
+
+    _write({"webui.db": "migrated tables", "uploads/new\nline name.txt": "new"}, mtime=1_700_000_100)
+    os.remove(_volume_path("cache", "old.bin"))
+    incremental = snapshots.create(VOLUME, "2")
+    assert incremental.base == "1"
+    assert incremental.archived == ["./uploads/new\nline name.txt", "./webui.db"]
+    assert incremental.files["./webui.db"] == [len("migrated tables"), 1_700_000_100.0]
+    assert "./cache/old.bin" not in incremental.files
+    assert [snapshot.id for snapshot in snapshots.chain(VOLUME)] == ["1", "2"]
+
+    # Nothing changed: an empty archive still records the state
+    assert snapshots.create(VOLUME, "3").archived == []
+
+
+def test_restore_applies_the_chain_and_deletions(snapshots):
+    snapshots.create(VOLUME, "1")
+    _write({"webui.db": "migrated tables", "uploads/new file.txt": "new"}, mtime=1_700_000_100)
+    os.remove(_volume_path("cache", "old.bin"))
+    snapshots.create(VOLUME, "2")
+    _write({"webui.db": "broken"}, mtime=1_700_000_200)
+
+    snapshots.restore(VOLUME, "2")
+    assert _contents() == {
+        "webui.db": "migrated tables", "uploads/report.pdf": "pdf", "uploads/new file.txt": "new",
+    }
+    snapshots.restore(VOLUME, "1")
+    assert _contents() == {"webui.db": "tables", "uploads/report.pdf": "pdf", "cache/old.bin": "old"}
+
+
+def test_damaged_archive_leaves_the_volume_alone(snapshots):
+    snapshot = snapshots.create(VOLUME, "1")
+    _write({"webui.db": "current"})
+    with open(os.path.join(snapshot.path, "data.tar.gz"), "ab") as archive:
+        archive.write(b"damage")
+    with pytest.raises(SnapshotError, match="damaged"):
+        snapshots.restore(VOLUME, "1")
+    assert _contents()["webui.db"] == "current"
+
+
+def test_unreadable_archive_is_found_before_the_volume_is_emptied(snapshots):
+    snapshot = snapshots.create(VOLUME, "1")
+    _write({"webui.db": "current"})
+    # Matches its recorded checksum, but is not a tar archive
+    archive_path = os.path.join(snapshot.path, "data.tar.gz")
+    with open(archive_path, "wb") as archive:
+        archive.write(gzip.compress(b"not a tar archive" * 100))
+    manifest_path = os.path.join(snapshot.path, MANIFEST_FILE)
+    with open(manifest_path, encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    with open(archive_path, "rb") as archive:
+        manifest["sha256"] = hashlib.sha256(archive.read()).hexdigest()
+    with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file)
+
+    with pytest.raises(SnapshotError):
+        snapshots.restore(VOLUME, "1")
+    assert _contents()["webui.db"] == "current"
+    assert not os.path.exists(_volume_path(STAGING_DIR))
+
+
+def test_index_skips_malformed_records(snapshots, monkeypatch):
+    output = b"6 1700000000.5000000000 ./webui.db\0garbage\0x y ./bad\0003 1700000001.0 ./a b\nc\0"
+    monkeypatch.setattr(
+        volume_snapshot.subprocess, "run", lambda *args, **kwargs: subprocess.CompletedProcess(args, 0, output, b"")
+    )
+    assert snapshots._index(VOLUME) == {"./webui.db": [6, 1700000000.5], "./a b\nc": [3, 1700000001.0]}